@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: analytics.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Daily circulation series for trend charts: loans and returns per day, their
+rolling 7- and 30-day means, and loans outstanding and overdue at the end of
+each day. One SQL statement (queries.CIRCULATION_SERIES) does the GROUP BY
+and window functions over index ranges on the loan timestamps. Finished days
+are cached; each call only recomputes today, the open bucket.
+
+Usage: 
+analytics = CirculationAnalytics(); analytics.series(days=90)
+python -m library_ms.analytics --days 30
+
+Notes: 
+- Days are local calendar days, as in the annual report.
+- Finished days are not re-read. Call invalidate() after editing past
+  loans by hand or purging members with loans still out.
+
+===================================================================
+"""
+from __future__ import annotations
+
+import argparse
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional
+
+from .db import get_connection
+from .models import to_epoch
+from .queries import CIRCULATION_SERIES
+
+SHORT_WINDOW = 7
+LONG_WINDOW = 30
+MAX_DAYS = 3660
+
+
+@dataclass(slots=True)
+class DayStats:
+    day: date
+    loans: int
+    returns: int
+    loans_7d: float  # mean loans per day over the 7 days ending here
+    loans_30d: float
+    outstanding: int  # out at the end of the day
+    overdue: int
+
+    @property
+    def overdue_rate(self) -> float:
+        """Share of outstanding loans that are overdue."""
+        return self.overdue / self.outstanding if self.outstanding else 0.0
+
+
+def _midnight(day: date) -> int:
+    return to_epoch(datetime.combine(day, time()))
+
+
+def query_series(first: date, last: date, db_path: Optional[str] = None) -> List[DayStats]:
+    """Run the series statement for ``first``..``last`` (inclusive), uncached.
+
+    Rolling means only see days from ``first`` on, so start 29 days early
+    when they must be complete.
+    """
+    params = (_midnight(first), _midnight(last + timedelta(days=1)), first.isoformat(), last.isoformat())
+    with get_connection(db_path) as conn:
+        rows = conn.execute(CIRCULATION_SERIES, params).fetchall()
+    return [
+        DayStats(date.fromisoformat(day), loans, returns, avg7, avg30, outstanding, overdue)
+        for day, loans, returns, _late, _cleared, avg7, avg30, outstanding, overdue in rows
+    ]
+
+
+class CirculationAnalytics:
+    """Series with finished days cached in memory."""
+
+    def __init__(self, db_path: Optional[str] = None) -> None:
+        self.db_path = db_path
+        self.queries = 0  # statements run, for tests and tuning
+        self._days: Dict[date, DayStats] = {}
+        self._lock = threading.Lock()
+
+    def series(self, days: int = 90, today: Optional[date] = None) -> List[DayStats]:
+        """The last ``days`` days, oldest first, ending with today so far."""
+        if not 1 <= days <= MAX_DAYS:
+            raise ValueError(f"days must be between 1 and {MAX_DAYS}")
+        today = today or date.today()
+        start = today - timedelta(days=days - 1)
+        with self._lock:
+            # Today's rolling means need the finished days of its long window.
+            self._fill(min(start, today - timedelta(days=LONG_WINDOW - 1)), today - timedelta(days=1))
+            finished = [self._days[start + timedelta(days=i)] for i in range(days - 1)]
+            return finished + [self._open_day(today)]
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._days.clear()
+
+    def _fill(self, first: date, last: date) -> None:
+        missing = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+        missing = [d for d in missing if d not in self._days]
+        if not missing:
+            return
+        lo, hi = missing[0], missing[-1]
+        self.queries += 1
+        for row in query_series(lo - timedelta(days=LONG_WINDOW - 1), hi, self.db_path):
+            if row.day >= lo:  # earlier rows are lookback with truncated windows
+                self._days[row.day] = row
+
+    def _open_day(self, today: date) -> DayStats:
+        self.queries += 1
+        (row,) = query_series(today, today, self.db_path)
+        # The statement only saw today; take the rest of each window from the cache.
+        past = [self._days[today - timedelta(days=i)].loans for i in range(1, LONG_WINDOW)]  # yesterday first
+        row.loans_7d = (row.loans + sum(past[:SHORT_WINDOW - 1])) / SHORT_WINDOW
+        row.loans_30d = (row.loans + sum(past)) / LONG_WINDOW
+        return row
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="library_ms.analytics", description="Daily circulation series")
+    parser.add_argument("--db", default=None, help="database path (default: ./library.db)")
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args(argv)
+    print(f"{'day':<10}  {'loans':>5} {'returns':>7} {'7d avg':>7} {'30d avg':>7} "
+          f"{'out':>5} {'overdue':>7} {'rate':>6}")
+    for d in CirculationAnalytics(args.db).series(args.days):
+        print(f"{d.day:%Y-%m-%d}  {d.loans:>5} {d.returns:>7} {d.loans_7d:>7.2f} {d.loans_30d:>7.2f} "
+              f"{d.outstanding:>5} {d.overdue:>7} {d.overdue_rate:>6.1%}")
+
+
+if __name__ == "__main__":
+    main()
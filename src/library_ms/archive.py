@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: archive.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Loan archival job: moves loans returned more than N days ago from the hot
+``loans`` table into ``loan_history`` in small, separately committed chunks.
+
+Usage: 
+python -m library_ms.archive --days 365
+python -c "from library_ms.archive import archive_returned_loans; archive_returned_loans(365)"
+
+Notes: 
+- Each chunk is its own transaction so desks are never blocked for long.
+- Use ``LibraryRepository.list_loans(include_history=True)`` to read both tables.
+
+===================================================================
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import List, Optional
+
+from .db import get_connection
+from .queries import LOAN_COLUMNS
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def archive_returned_loans(
+    older_than_days: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    db_path: Optional[str] = None,
+    pause: float = 0.0,
+) -> int:
+    """Move returned loans older than ``older_than_days`` into ``loan_history``.
+
+    Args:
+        older_than_days: Only loans returned at least this many days ago are moved.
+        chunk_size: Maximum loans moved per transaction.
+        db_path: Optional database path.
+        pause: Seconds to sleep between chunks.
+
+    Returns:
+        Number of loans archived.
+    """
+    if older_than_days < 0:
+        raise ValueError("older_than_days must be >= 0")
+    if not 1 <= chunk_size <= 900:
+        raise ValueError("chunk_size must be between 1 and 900")
+
+    cutoff = int(time.time()) - int(older_than_days) * 86400
+    moved = 0
+    with get_connection(db_path) as conn:
+        while True:
+            ids: List[int] = [
+                r[0]
+                for r in conn.execute(
+                    """
+                    SELECT id FROM loans
+                    WHERE returned_at IS NOT NULL AND returned_at < ?
+                    ORDER BY returned_at
+                    LIMIT ?
+                    """,
+                    (cutoff, chunk_size),
+                )
+            ]
+            if not ids:
+                break
+            marks = ", ".join("?" * len(ids))
+            conn.execute(
+                f"INSERT OR REPLACE INTO loan_history({LOAN_COLUMNS}) "
+                f"SELECT {LOAN_COLUMNS} FROM loans WHERE id IN ({marks})",
+                ids,
+            )
+            conn.execute(f"DELETE FROM loans WHERE id IN ({marks})", ids)
+            conn.commit()
+            moved += len(ids)
+            if len(ids) < chunk_size:
+                break
+            if pause:
+                time.sleep(pause)
+    return moved
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="library_ms.archive", description="Archive returned loans")
+    parser.add_argument("--db", default=None, help="database path (default: ./library.db)")
+    parser.add_argument("--days", type=int, required=True, help="archive loans returned more than N days ago")
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK_SIZE, help="loans per transaction")
+    parser.add_argument("--pause", type=float, default=0.0, help="pause between chunks (s)")
+    args = parser.parse_args(argv)
+    n = archive_returned_loans(args.days, chunk_size=args.chunk, db_path=args.db, pause=args.pause)
+    print(f"archived {n} loans")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: audit.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Append-only audit log of service events (actor, action, entity, before and
+after values). Events are queued in a bounded in-memory ring and written in
+batches by a background thread, either every ``interval`` seconds or as soon
+as ``batch_size`` records are waiting, so a desk write never waits on the
+audit INSERT.
+
+Usage: 
+audit = AuditLog(); audit.attach(service); audit.start()
+audit.history("book", 42)
+python -m library_ms.audit book 42
+
+Notes: 
+- close() (also registered with atexit) flushes what is still queued; a
+  killed process loses at most one interval of records.
+- When the ring is full the oldest queued record is dropped and counted.
+
+===================================================================
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import getpass
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .db import get_connection, run_with_retry
+from .models import from_epoch
+from .queries import AUDIT_FOR_ENTITY, INSERT_AUDIT
+from .services import LibraryService, ServiceEvent
+
+ACTOR_ENV = "LIBRARY_MS_ACTOR"
+DEFAULT_CAPACITY = 10_000
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_INTERVAL = 2.0
+
+log = logging.getLogger(__name__)
+
+# (epoch seconds, event) as queued; serialised only when flushed.
+_Pending = Tuple[float, ServiceEvent]
+
+
+@dataclass(slots=True)
+class AuditEntry:
+    id: int
+    at: datetime
+    actor: Optional[str]
+    action: str
+    entity: str
+    entity_id: int
+    before: Dict[str, Any]
+    after: Dict[str, Any]
+
+
+def default_actor() -> Optional[str]:
+    """Desk user recorded on events: LIBRARY_MS_ACTOR, else the OS login."""
+    try:
+        return os.environ.get(ACTOR_ENV) or getpass.getuser()
+    except (KeyError, OSError):  # no login name (e.g. some containers)
+        return None
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ", timespec="seconds")
+    return str(value)
+
+
+def _row(at: float, event: ServiceEvent) -> tuple:
+    changes = json.dumps({"before": event.before, "after": event.fields}, default=_json_default, ensure_ascii=False)
+    return int(at), event.actor, event.action, event.entity, event.entity_id, changes
+
+
+class AuditLog:
+    """Batched writer for the ``audit_log`` table."""
+
+    def __init__(self, db_path: Optional[str] = None, capacity: int = DEFAULT_CAPACITY,
+                 batch_size: int = DEFAULT_BATCH_SIZE, interval: float = DEFAULT_INTERVAL) -> None:
+        if capacity < 1 or batch_size < 1:
+            raise ValueError("capacity and batch_size must be >= 1")
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dropped = 0
+        self.written = 0
+        self._ring: Deque[_Pending] = deque(maxlen=capacity)
+        self._ring_lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # one batch in flight at a time
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._unsubscribe: List[Callable[[], None]] = []
+
+    # --- capture (hot path) ---
+    def record(self, event: ServiceEvent) -> None:
+        """Queue ``event``; a ServiceListener, so it must stay cheap."""
+        with self._ring_lock:
+            if len(self._ring) == self._ring.maxlen:
+                self.dropped += 1
+            self._ring.append((time.time(), event))
+            full = len(self._ring) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def attach(self, service: LibraryService) -> None:
+        self._unsubscribe.append(service.subscribe(self.record))
+
+    @property
+    def pending(self) -> int:
+        return len(self._ring)
+
+    # --- flushing ---
+    def flush(self) -> int:
+        """Write everything queued so far, ``batch_size`` rows per transaction.
+
+        Returns:
+            Number of records written.
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._ring_lock:
+                    batch = [self._ring.popleft() for _ in range(min(self.batch_size, len(self._ring)))]
+                if not batch:
+                    break
+                try:
+                    run_with_retry(self._write, [_row(at, e) for at, e in batch])
+                except Exception:
+                    with self._ring_lock:  # keep them for the next attempt, oldest first
+                        self._ring.extendleft(reversed(batch))
+                    raise
+                written += len(batch)
+        self.written += written
+        return written
+
+    def _write(self, rows: List[tuple]) -> None:
+        with get_connection(self.db_path) as conn:
+            conn.executemany(INSERT_AUDIT, rows)
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:  # keep flushing on the next tick; records stay queued
+                log.exception("audit flush failed; %d records pending", self.pending)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="audit-flush", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Detach, stop the flusher and write what is left."""
+        for unsubscribe in self._unsubscribe:
+            unsubscribe()
+        self._unsubscribe.clear()
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        atexit.unregister(self.close)
+        self.flush()
+
+    # --- queries ---
+    def history(self, entity: str, entity_id: int, limit: int = 100) -> List[AuditEntry]:
+        """Latest audit entries for one row, including ones not flushed yet."""
+        self.flush()
+        return entity_history(entity, entity_id, limit, self.db_path)
+
+
+def entity_history(entity: str, entity_id: int, limit: int = 100,
+                   db_path: Optional[str] = None) -> List[AuditEntry]:
+    """Latest first; an index range on (entity, entity_id)."""
+    with get_connection(db_path) as conn:
+        rows = conn.execute(AUDIT_FOR_ENTITY, (entity, entity_id, limit)).fetchall()
+    entries = []
+    for id_, at, actor, action, ent, ent_id, changes in rows:
+        diff = json.loads(changes)
+        entries.append(AuditEntry(id_, from_epoch(at), actor, action, ent, ent_id, diff["before"], diff["after"]))
+    return entries
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="library_ms.audit", description="Show the audit trail of a row")
+    parser.add_argument("entity", choices=("book", "copy", "member", "loan", "hold"))
+    parser.add_argument("id", type=int)
+    parser.add_argument("--db", default=None, help="database path (default: ./library.db)")
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args(argv)
+    for e in entity_history(args.entity, args.id, args.limit, args.db):
+        changed = ", ".join(
+            f"{k}: {e.before[k]!r} -> {e.after.get(k)!r}" if k in e.before else f"{k}={e.after[k]!r}"
+            for k in e.after
+        ) or ", ".join(f"{k}={v!r}" for k, v in e.before.items())
+        print(f"{e.at:%Y-%m-%d %H:%M:%S}  {e.actor or '-':<12} {e.action:<7} {changed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: backup.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Online backups built on sqlite3's backup API. Pages are copied in small
+steps with a pause in between so desks can keep writing while a backup runs.
+Supports scheduled runs, rotation, gzip compression and integrity checks.
+
+Usage: 
+python -m library_ms.backup --dest backups --keep 7 --compress
+python -m library_ms.backup --dest backups --interval 3600
+
+Notes: 
+- Copying library.db by hand is not safe under WAL; use this module instead.
+- Backups are written to a temporary file and renamed once verified.
+
+===================================================================
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import shutil
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from .db import get_db_path
+
+BACKUP_PREFIX = "library-"
+DEFAULT_PAGES_PER_STEP = 256
+DEFAULT_STEP_SLEEP = 0.05
+
+
+@dataclass(slots=True)
+class BackupResult:
+    path: Path
+    pages: int
+    steps: int
+    elapsed: float
+    integrity_ok: bool
+    compressed: bool = False
+
+
+def _backup_name(when: datetime, compress: bool) -> str:
+    return f"{BACKUP_PREFIX}{when.strftime('%Y%m%d-%H%M%S-%f')}.db" + (".gz" if compress else "")
+
+
+def check_integrity(path: Path) -> bool:
+    """Run ``PRAGMA integrity_check`` on a standalone database file."""
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute("PRAGMA integrity_check;").fetchall()
+    finally:
+        conn.close()
+    return rows == [("ok",)]
+
+
+def backup_database(
+    dest: str | Path,
+    db_path: Optional[str] = None,
+    pages_per_step: int = DEFAULT_PAGES_PER_STEP,
+    step_sleep: float = DEFAULT_STEP_SLEEP,
+    compress: bool = False,
+    verify: bool = True,
+) -> BackupResult:
+    """Copy the live database into ``dest`` without holding it for long.
+
+    Args:
+        dest: Target file, or a directory to receive a timestamped backup.
+        db_path: Source database (defaults to CWD/library.db).
+        pages_per_step: Pages copied per step; smaller values yield more often.
+        step_sleep: Seconds to pause between steps so writers can get in.
+        compress: Gzip the finished copy (adds a ``.gz`` suffix).
+        verify: Run an integrity check on the copy before publishing it.
+
+    Raises:
+        ValueError: if ``pages_per_step`` is not positive or the copy is corrupt.
+    """
+    if pages_per_step < 1:
+        raise ValueError("pages_per_step must be >= 1")
+    dest = Path(dest)
+    if dest.is_dir():
+        dest = dest / _backup_name(datetime.now(), compress)
+    elif compress and dest.suffix != ".gz":
+        dest = dest.with_name(dest.name + ".gz")
+    dest.parent.mkdir(parents=True, exist_ok=True)
+
+    # Both the raw copy and the gzip stream end in ".part", so rotation skips
+    # them and only a finished, verified file is ever renamed to ``dest``.
+    tmp = dest.with_name(dest.name + ".part")
+    raw = dest.with_name(dest.with_suffix("").name + ".part") if compress else tmp
+    progress = {"steps": 0, "pages": 0}
+
+    def _on_progress(status: int, remaining: int, total: int) -> None:
+        progress["steps"] += 1
+        progress["pages"] = total - remaining
+
+    started = time.perf_counter()
+    src = sqlite3.connect(get_db_path(db_path))
+    dst = sqlite3.connect(raw)
+    try:
+        src.backup(dst, pages=pages_per_step, progress=_on_progress, sleep=step_sleep)
+    finally:
+        dst.close()
+        src.close()
+
+    try:
+        ok = check_integrity(raw) if verify else True
+        if not ok:
+            raise ValueError(f"backup failed integrity check: {raw}")
+        if compress:
+            with raw.open("rb") as fin, gzip.open(tmp, "wb") as fout:
+                shutil.copyfileobj(fin, fout)
+            raw.unlink()
+        tmp.replace(dest)
+    except BaseException:
+        raw.unlink(missing_ok=True)
+        tmp.unlink(missing_ok=True)
+        raise
+
+    return BackupResult(
+        path=dest,
+        pages=progress["pages"],
+        steps=progress["steps"],
+        elapsed=time.perf_counter() - started,
+        integrity_ok=ok,
+        compressed=compress,
+    )
+
+
+def rotate_backups(directory: str | Path, keep: int) -> List[Path]:
+    """Delete all but the newest ``keep`` backups in ``directory``.
+
+    Returns:
+        The paths that were removed.
+    """
+    if keep < 1:
+        raise ValueError("keep must be >= 1")
+    backups = sorted(Path(directory).glob(f"{BACKUP_PREFIX}*.db*"))
+    backups = [p for p in backups if not p.name.endswith(".part")]
+    removed = backups[:-keep]
+    for p in removed:
+        p.unlink()
+    return removed
+
+
+class BackupScheduler:
+    """Run backups on a fixed interval in a daemon thread.
+
+    Each run writes a timestamped file into ``directory`` and then rotates
+    old copies. The most recent result (or error) is kept for inspection.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        interval: float,
+        keep: int = 7,
+        db_path: Optional[str] = None,
+        compress: bool = False,
+        pages_per_step: int = DEFAULT_PAGES_PER_STEP,
+        step_sleep: float = DEFAULT_STEP_SLEEP,
+    ) -> None:
+        self.directory = Path(directory)
+        self.interval = interval
+        self.keep = keep
+        self.db_path = db_path
+        self.compress = compress
+        self.pages_per_step = pages_per_step
+        self.step_sleep = step_sleep
+        self.last_result: Optional[BackupResult] = None
+        self.last_error: Optional[BaseException] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> BackupResult:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        result = backup_database(
+            self.directory,
+            db_path=self.db_path,
+            pages_per_step=self.pages_per_step,
+            step_sleep=self.step_sleep,
+            compress=self.compress,
+        )
+        rotate_backups(self.directory, self.keep)
+        self.last_result = result
+        return result
+
+    def run_forever(self, on_run: Optional[Callable[["BackupScheduler"], None]] = None) -> None:
+        """Back up every ``interval`` seconds until :meth:`stop`; ``on_run`` sees each outcome."""
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+                self.last_error = None
+            except Exception as ex:  # keep the schedule alive; surface via last_error
+                self.last_error = ex
+            if on_run is not None:
+                on_run(self)
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="library-backup", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+
+def _format_result(r: BackupResult) -> str:
+    return (
+        f"{r.path}: {r.pages} pages in {r.steps} steps, {r.elapsed:.2f}s, "
+        f"integrity {'ok' if r.integrity_ok else 'FAILED'}"
+    )
+
+
+def _print_run(scheduler: BackupScheduler) -> None:
+    if scheduler.last_error is not None:
+        print(f"backup failed: {scheduler.last_error}", flush=True)
+    else:
+        print(_format_result(scheduler.last_result), flush=True)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="library_ms.backup", description="Online SQLite backup")
+    parser.add_argument("--db", default=None, help="source database (default: ./library.db)")
+    parser.add_argument("--dest", required=True, help="backup directory")
+    parser.add_argument("--keep", type=int, default=7, help="number of backups to retain")
+    parser.add_argument("--compress", action="store_true", help="gzip the backup")
+    parser.add_argument("--pages", type=int, default=DEFAULT_PAGES_PER_STEP, help="pages per step")
+    parser.add_argument("--sleep", type=float, default=DEFAULT_STEP_SLEEP, help="pause between steps (s)")
+    parser.add_argument("--interval", type=float, default=0, help="repeat every N seconds (0 = once)")
+    args = parser.parse_args(argv)
+
+    scheduler = BackupScheduler(
+        args.dest, interval=args.interval, keep=args.keep, db_path=args.db,
+        compress=args.compress, pages_per_step=args.pages, step_sleep=args.sleep,
+    )
+    if args.interval <= 0:
+        print(_format_result(scheduler.run_once()))
+        return
+    try:
+        scheduler.run_forever(_print_run)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -19,18 +19,222 @@ python -c "from library_ms.db import get_connection, migrate; migrate()"
 Notes: 
 - The database file is created in the working directory (library.db).
 - Migrations are idempotent.
+- Storage PRAGMAs come from a named profile (LIBRARY_MS_STORAGE_PROFILE).
 
 ===================================================================
 """
 from __future__ import annotations
 
+import functools
+import os
+import random
 import sqlite3
+import threading
+import time
 from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterator, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar, Union
 
 DB_FILENAME = "library.db"
 
+# Tables replicated through the change outbox; loan_history is included so an
+# archived loan shows up downstream as a move rather than a plain delete, and
+# copies and holds so a replica sees which item is where and who waits for it.
+CDC_TABLES = ("books", "members", "copies", "loans", "loan_history", "holds")
+CDC_IGNORED_COLUMNS = frozenset({"id", "created_at", "updated_at", "archived_at", "version"})
+
+# How long a connection waits on a locked database before raising, and the
+# retry policy applied on top of that to whole repository operations. Tuned
+# with ``python -m library_ms.loadtest``; override per process with
+# LIBRARY_MS_BUSY_TIMEOUT_MS or configure_connections().
+BUSY_TIMEOUT_ENV = "LIBRARY_MS_BUSY_TIMEOUT_MS"
+DEFAULT_BUSY_TIMEOUT_MS = 2000
+
+# Storage profile applied to every connection; pick one per process with
+# LIBRARY_MS_STORAGE_PROFILE or configure_connections(profile=...). Compare
+# them on a copy of your database with ``python -m library_ms.storage tune``.
+STORAGE_PROFILE_ENV = "LIBRARY_MS_STORAGE_PROFILE"
+DEFAULT_STORAGE_PROFILE = "desk"
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True, slots=True)
+class RetryPolicy:
+    """Exponential backoff with jitter for SQLITE_BUSY/"database is locked"."""
+
+    attempts: int = 5
+    base_delay: float = 0.02
+    max_delay: float = 0.5
+    jitter: float = 0.5
+
+    def delay(self, attempt: int) -> float:
+        """Sleep before retry number ``attempt`` (1-based)."""
+        d = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return d * (1 - self.jitter * random.random())
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+@dataclass(frozen=True, slots=True)
+class StorageProfile:
+    """Per-connection storage PRAGMAs.
+
+    Attributes:
+        cache_kib: Page cache of each connection.
+        mmap_mib: Memory-mapped read window (0 = plain reads).
+        temp_store: Where sorts and temp B-trees go: DEFAULT, FILE or MEMORY.
+        wal_autocheckpoint: WAL size in pages that triggers a checkpoint.
+        page_size: Only takes effect when the database file is created.
+        synchronous: NORMAL is durable in WAL mode except for the last
+            commits before a power cut; OFF can lose more.
+        query_only: Refuse all writes (migrate() included).
+    """
+
+    name: str
+    cache_kib: int = 8 * 1024
+    mmap_mib: int = 0
+    temp_store: str = "DEFAULT"
+    wal_autocheckpoint: int = 1000
+    page_size: int = 4096
+    synchronous: str = "NORMAL"
+    query_only: bool = False
+
+    @property
+    def durable(self) -> bool:
+        return self.synchronous != "OFF"
+
+    def pragmas(self) -> List[str]:
+        """Statements applied after the journal mode is set."""
+        return [
+            f"PRAGMA cache_size = -{int(self.cache_kib)};",
+            f"PRAGMA mmap_size = {int(self.mmap_mib) * 1024 * 1024};",
+            f"PRAGMA temp_store = {self.temp_store};",
+            f"PRAGMA wal_autocheckpoint = {int(self.wal_autocheckpoint)};",
+            f"PRAGMA synchronous = {self.synchronous};",
+            f"PRAGMA query_only = {'ON' if self.query_only else 'OFF'};",
+        ]
+
+
+PROFILES: Dict[str, StorageProfile] = {
+    p.name: p
+    for p in (
+        # Circulation desks: short transactions, many small reads.
+        StorageProfile("desk", cache_kib=8 * 1024, mmap_mib=64),
+        # Public catalogue terminals: search only, never write.
+        StorageProfile("kiosk-readonly", cache_kib=16 * 1024, mmap_mib=256, temp_store="MEMORY", query_only=True),
+        # One-off loads; rerun the import after a crash rather than pay for syncs.
+        StorageProfile("bulk-import", cache_kib=64 * 1024, temp_store="MEMORY",
+                       wal_autocheckpoint=10000, synchronous="OFF"),
+        # Long scans and sorts over loans and history.
+        StorageProfile("reporting", cache_kib=64 * 1024, mmap_mib=256, temp_store="MEMORY"),
+    )
+}
+
+
+def get_profile(name: str) -> StorageProfile:
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"unknown storage profile: {name} (choose from {', '.join(PROFILES)})") from None
+
+_busy_timeout_ms = int(os.environ.get(BUSY_TIMEOUT_ENV, DEFAULT_BUSY_TIMEOUT_MS))
+_retry_policy = DEFAULT_RETRY_POLICY
+_storage_profile = get_profile(os.environ.get(STORAGE_PROFILE_ENV) or DEFAULT_STORAGE_PROFILE)
+_retry_lock = threading.Lock()
+_retry_count = 0
+
+
+def configure_connections(
+    busy_timeout_ms: Optional[int] = None,
+    retry: Optional[RetryPolicy] = None,
+    profile: Union[str, StorageProfile, None] = None,
+) -> None:
+    """Set the process-wide busy timeout, retry policy and/or storage profile."""
+    global _busy_timeout_ms, _retry_policy, _storage_profile
+    if busy_timeout_ms is not None:
+        if busy_timeout_ms < 0:
+            raise ValueError("busy_timeout_ms must be >= 0")
+        _busy_timeout_ms = busy_timeout_ms
+    if retry is not None:
+        if retry.attempts < 1:
+            raise ValueError("retry attempts must be >= 1")
+        _retry_policy = retry
+    if profile is not None:
+        _storage_profile = get_profile(profile) if isinstance(profile, str) else profile
+
+
+def busy_timeout_ms() -> int:
+    """The busy timeout new connections get."""
+    return _busy_timeout_ms
+
+
+def retry_policy() -> RetryPolicy:
+    """The retry policy ``retrying`` operations follow."""
+    return _retry_policy
+
+
+def storage_profile() -> StorageProfile:
+    """The storage profile new connections get."""
+    return _storage_profile
+
+
+def retry_count() -> int:
+    """Number of busy retries performed in this process (for load testing)."""
+    return _retry_count
+
+
+def is_busy_error(ex: BaseException) -> bool:
+    if not isinstance(ex, sqlite3.OperationalError):
+        return False
+    msg = str(ex).lower()
+    return "locked" in msg or "busy" in msg
+
+
+def run_with_retry(fn: Callable[..., T], *args: Any, policy: Optional[RetryPolicy] = None, **kwargs: Any) -> T:
+    """Call ``fn`` and retry it with backoff while the database is busy.
+
+    ``fn`` must be a complete unit of work (its own connection/transaction),
+    so re-running it after a rollback is safe.
+    """
+    global _retry_count
+    policy = policy or _retry_policy
+    for attempt in range(1, policy.attempts + 1):
+        try:
+            return fn(*args, **kwargs)
+        except sqlite3.OperationalError as ex:
+            if attempt == policy.attempts or not is_busy_error(ex):
+                raise
+            with _retry_lock:
+                _retry_count += 1
+            time.sleep(policy.delay(attempt))
+    raise AssertionError("unreachable")
+
+
+def retrying(fn: Callable[..., T]) -> Callable[..., T]:
+    """Decorator form of :func:`run_with_retry` using the configured policy."""
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        return run_with_retry(fn, *args, **kwargs)
+
+    return wrapper
+
+
+# Bumped whenever migrate() changes the schema, so needs_migration() notices.
+# 1: integer epoch loan timestamps; 2: reminder log; 3: row versions on books/members;
+# 4: soft-delete tombstones on books/members; 5: holds queue;
+# 6: loan renewals and per-member loan indexes; 7: holds member index;
+# 8: audit log; 9: item-level copies; 10: timestamp indexes for analytics;
+# 11: sort indexes for the list windows; 12: change capture on copies and holds;
+# 13: renewals and copy links kept in loan_history.
+SCHEMA_VERSION = 13
+
+# Loan timestamps are stored as integer Unix epoch seconds (UTC).
+EPOCH_NOW_SQL = "CAST(strftime('%s', 'now') AS INTEGER)"
+
 
 def get_db_path(custom_path: Optional[str] = None) -> Path:
     """Return the resolved path for the SQLite database file.
@@ -45,68 +249,494 @@ def get_db_path(custom_path: Optional[str] = None) -> Path:
 def get_connection(db_path: Optional[str] = None) -> Iterator[sqlite3.Connection]:
     """Context-managed connection with pragmas for reliability.
 
+    Waits up to the configured busy timeout for locks held by other desks and
+    applies the configured storage profile.
+
     Yields:
         sqlite3.Connection
     """
     path = get_db_path(db_path)
-    conn = sqlite3.connect(path)
+    profile = _storage_profile
+    conn = sqlite3.connect(path, timeout=_busy_timeout_ms / 1000)
     try:
+        conn.execute(f"PRAGMA busy_timeout = {int(_busy_timeout_ms)};")
+        # Ignored once the file has content, and must precede WAL to apply.
+        conn.execute(f"PRAGMA page_size = {int(profile.page_size)};")
         conn.execute("PRAGMA foreign_keys = ON;")
         conn.execute("PRAGMA journal_mode = WAL;")
-        conn.execute("PRAGMA synchronous = NORMAL;")
+        for pragma in profile.pragmas():
+            conn.execute(pragma)
         yield conn
         conn.commit()
     finally:
         conn.close()
 
 
+def needs_migration(db_path: Optional[str] = None) -> bool:
+    """True when the database is missing or older than ``SCHEMA_VERSION``.
+
+    Lets the app skip ``migrate()`` (and its DDL) on every normal start.
+    """
+    if not get_db_path(db_path).exists():
+        return True
+    with get_connection(db_path) as conn:
+        return conn.execute("PRAGMA user_version;").fetchone()[0] < SCHEMA_VERSION
+
+
 def migrate(db_path: Optional[str] = None) -> None:
-    """Create tables if they do not exist (idempotent)."""
+    """Create tables if they do not exist and apply pending upgrades (idempotent).
+
+    Data-rewriting steps are gated on ``PRAGMA user_version``.
+    """
     with get_connection(db_path) as conn:
+        # Table rebuilds below must not fire ON DELETE CASCADE into loans.
+        # (Only effective outside a transaction, hence first.)
+        conn.execute("PRAGMA foreign_keys = OFF;")
         cur = conn.cursor()
 
+        _create_catalog_tables(cur)
+        # Optimistic concurrency: edits carry the version they were based on.
+        for table in ("books", "members"):
+            _add_column_if_missing(cur, table, "version", "INTEGER NOT NULL DEFAULT 1")
+
+        _create_loan_tables(cur)
+        version = cur.execute("PRAGMA user_version;").fetchone()[0]
+        if version < 1:
+            _migrate_loan_times_to_epoch(cur)
+        if version < 4:
+            _migrate_catalog_to_soft_delete(cur)
+        if version < 6:
+            cur.execute("DROP INDEX IF EXISTS idx_loans_member;")  # was (member_id) only
+        for table in ("loans", "loan_history"):
+            _add_column_if_missing(cur, table, "renewals", "INTEGER NOT NULL DEFAULT 0")
+
+        # Deleted books/members stay as tombstones until purge.py removes them.
+        # Uniqueness and the list/search order only consider live rows.
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_books_isbn ON books(isbn) WHERE deleted_at IS NULL;")
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_members_email ON members(email) WHERE deleted_at IS NULL;")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_books_live_title ON books(title COLLATE NOCASE, id) WHERE deleted_at IS NULL;")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_members_live_name ON members(name COLLATE NOCASE, id) WHERE deleted_at IS NULL;")
+        # Other sortable book columns (queries.BOOK_ORDER); isbn and email sort on their unique indexes.
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_books_live_author ON books(author COLLATE NOCASE, id) WHERE deleted_at IS NULL;")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_books_live_year ON books(year, id) WHERE deleted_at IS NULL;")
         cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS books (
+            "CREATE INDEX IF NOT EXISTS idx_books_live_available ON books(available_copies, id) WHERE deleted_at IS NULL;"
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_books_deleted ON books(deleted_at) WHERE deleted_at IS NOT NULL;")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_members_deleted ON members(deleted_at) WHERE deleted_at IS NOT NULL;")
+        # Foreign-key lookups for the purge job (and any remaining cascades).
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_loans_book ON loans(book_id);")
+        # Per-member policy checks (open/overdue counts) and history pages are
+        # range scans on this; it also serves plain member_id lookups.
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_loans_member ON loans(member_id, returned_at, due_at);")
+
+        # Active loans are the hot path; returned ones are only visited by the archiver.
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_loans_active ON loans(loaned_at) WHERE returned_at IS NULL;")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_loans_due ON loans(due_at) WHERE returned_at IS NULL;")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_loans_returned ON loans(returned_at) WHERE returned_at IS NOT NULL;")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_loan_history_loaned ON loan_history(loaned_at);")
+        # Circulation analytics (analytics.py) read each day's loans, returns
+        # and due dates as ranges on these and the indexes above.
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_loans_loaned ON loans(loaned_at);")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_loan_history_returned ON loan_history(returned_at);")
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_loan_history_member ON loan_history(member_id, returned_at, due_at);"
+        )
+        _create_compat_views(cur)
+
+        # Holds queue. Waiting holds are served by (priority, created_at) per
+        # book; ready holds sit on the hold shelf until expires_at.
+        cur.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS holds (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                isbn TEXT UNIQUE NOT NULL,
-                title TEXT NOT NULL,
-                author TEXT NOT NULL,
-                year INTEGER,
-                total_copies INTEGER NOT NULL DEFAULT 1,
-                available_copies INTEGER NOT NULL DEFAULT 1,
-                created_at TEXT NOT NULL DEFAULT (datetime('now')),
-                updated_at TEXT
+                book_id INTEGER NOT NULL,
+                member_id INTEGER NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                created_at INTEGER NOT NULL DEFAULT ({EPOCH_NOW_SQL}),
+                status TEXT NOT NULL DEFAULT 'waiting'
+                    CHECK (status IN ('waiting', 'ready', 'fulfilled', 'cancelled', 'expired')),
+                expires_at INTEGER,
+                FOREIGN KEY(book_id) REFERENCES books(id) ON DELETE CASCADE,
+                FOREIGN KEY(member_id) REFERENCES members(id) ON DELETE CASCADE
             );
             """
         )
+        # Not partial: the same index also lists a book's ready + waiting holds.
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_holds_queue ON holds(book_id, status, priority, created_at, id);")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_holds_shelf ON holds(expires_at) WHERE status = 'ready';")
+        cur.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ux_holds_open ON holds(member_id, book_id) "
+            "WHERE status IN ('waiting', 'ready');"
+        )
+        # ux_holds_open is partial, so foreign-key checks and the ON DELETE
+        # CASCADE from members need their own index on the child column.
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_holds_member ON holds(member_id);")
 
+        # Physical items, one row per barcode. books.total_copies (not
+        # withdrawn) and books.available_copies (on the open shelf) are a
+        # cache of these rows, adjusted by the repository in the same
+        # transaction as every status change.
         cur.execute(
             """
-            CREATE TABLE IF NOT EXISTS members (
+            CREATE TABLE IF NOT EXISTS copies (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                email TEXT UNIQUE,
-                phone TEXT,
+                book_id INTEGER NOT NULL,
+                barcode TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'available'
+                    CHECK (status IN ('available', 'on_loan', 'on_hold_shelf', 'missing', 'withdrawn')),
+                location TEXT,
                 created_at TEXT NOT NULL DEFAULT (datetime('now')),
-                updated_at TEXT
+                FOREIGN KEY(book_id) REFERENCES books(id) ON DELETE CASCADE
             );
             """
         )
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_copies_barcode ON copies(barcode);")
+        # Next free copy of a book, and its copy list; also the FK index.
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_copies_book ON copies(book_id, status, id);")
+        for table in ("loans", "holds"):
+            _add_column_if_missing(cur, table, "copy_id", "INTEGER REFERENCES copies(id) ON DELETE SET NULL")
+        _add_column_if_missing(cur, "loan_history", "copy_id", "INTEGER")  # no foreign keys in history
+        # Return by barcode: the copy's unreturned loan. Not partial, so it
+        # also serves the foreign-key checks.
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_loans_copy ON loans(copy_id, returned_at);")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_holds_copy ON holds(copy_id);")
+        if version < 9:
+            _migrate_counters_to_copies(cur)
 
+        # Due-date reminders already sent (reminders.py); one row per loan and kind.
         cur.execute(
             """
-            CREATE TABLE IF NOT EXISTS loans (
+            CREATE TABLE IF NOT EXISTS reminder_log (
+                loan_id INTEGER NOT NULL,
+                kind TEXT NOT NULL CHECK (kind IN ('due_soon', 'overdue')),
+                sent_at INTEGER NOT NULL,
+                PRIMARY KEY (loan_id, kind)
+            ) WITHOUT ROWID;
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS reminder_watermarks (
+                kind TEXT PRIMARY KEY,
+                upto INTEGER NOT NULL
+            );
+            """
+        )
+
+        # Change-data-capture outbox consumed by outbox.py
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS change_outbox (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                table_name TEXT NOT NULL,
+                op TEXT NOT NULL CHECK (op IN ('I', 'U', 'D')),
+                row_id INTEGER NOT NULL,
+                changed TEXT,
+                created_at TEXT NOT NULL DEFAULT (datetime('now'))
+            );
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS outbox_consumers (
+                name TEXT PRIMARY KEY,
+                acked_seq INTEGER NOT NULL DEFAULT 0
+            );
+            """
+        )
+        for table in CDC_TABLES:
+            _install_change_triggers(cur, table)
+
+        # Who changed what (audit.py). Append-only: rows are never edited.
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS audit_log (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                book_id INTEGER NOT NULL,
-                member_id INTEGER NOT NULL,
-                loaned_at TEXT NOT NULL DEFAULT (datetime('now')),
-                due_at TEXT NOT NULL,
-                returned_at TEXT,
-                FOREIGN KEY(book_id) REFERENCES books(id) ON DELETE CASCADE,
-                FOREIGN KEY(member_id) REFERENCES members(id) ON DELETE CASCADE
+                at INTEGER NOT NULL,
+                actor TEXT,
+                action TEXT NOT NULL,
+                entity TEXT NOT NULL,
+                entity_id INTEGER NOT NULL,
+                changes TEXT NOT NULL
             );
             """
         )
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_audit_entity ON audit_log(entity, entity_id, id);")
+        for op in ("UPDATE", "DELETE"):
+            cur.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS trg_audit_log_no_{op.lower()} BEFORE {op} ON audit_log
+                BEGIN SELECT RAISE(ABORT, 'audit_log is append-only'); END;
+                """
+            )
 
+        cur.execute(f"PRAGMA user_version = {SCHEMA_VERSION};")
         conn.commit()
+        conn.execute("PRAGMA foreign_keys = ON;")
+
+
+def _add_column_if_missing(cur: sqlite3.Cursor, table: str, column: str, decl: str) -> None:
+    if column not in {r[1] for r in cur.execute(f"PRAGMA table_info({table})")}:
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl};")
+
+
+def _create_catalog_tables(cur: sqlite3.Cursor, suffix: str = "") -> None:
+    """Create ``books`` and ``members`` (optionally under a temporary suffix).
+
+    ISBN/email uniqueness is enforced by partial indexes over live rows, so
+    a tombstoned row does not block re-adding the same ISBN or email.
+    """
+    cur.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS books{suffix} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            isbn TEXT NOT NULL,
+            title TEXT NOT NULL,
+            author TEXT NOT NULL,
+            year INTEGER,
+            total_copies INTEGER NOT NULL DEFAULT 1,
+            available_copies INTEGER NOT NULL DEFAULT 1,
+            version INTEGER NOT NULL DEFAULT 1,
+            deleted_at INTEGER,
+            created_at TEXT NOT NULL DEFAULT (datetime('now')),
+            updated_at TEXT
+        );
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS members{suffix} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT,
+            phone TEXT,
+            version INTEGER NOT NULL DEFAULT 1,
+            deleted_at INTEGER,
+            created_at TEXT NOT NULL DEFAULT (datetime('now')),
+            updated_at TEXT
+        );
+        """
+    )
+
+
+def _create_loan_tables(cur: sqlite3.Cursor, suffix: str = "") -> None:
+    """Create ``loans`` and ``loan_history`` (optionally under a temporary suffix)."""
+    cur.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS loans{suffix} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            book_id INTEGER NOT NULL,
+            member_id INTEGER NOT NULL,
+            loaned_at INTEGER NOT NULL DEFAULT ({EPOCH_NOW_SQL}),
+            due_at INTEGER NOT NULL,
+            returned_at INTEGER,
+            renewals INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY(book_id) REFERENCES books(id) ON DELETE CASCADE,
+            FOREIGN KEY(member_id) REFERENCES members(id) ON DELETE CASCADE
+        );
+        """
+    )
+
+    # Cold storage for returned loans (see archive.py). Ids are preserved,
+    # so no AUTOINCREMENT and no foreign keys to rows that may be purged.
+    cur.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS loan_history{suffix} (
+            id INTEGER PRIMARY KEY,
+            book_id INTEGER NOT NULL,
+            member_id INTEGER NOT NULL,
+            loaned_at INTEGER NOT NULL,
+            due_at INTEGER NOT NULL,
+            returned_at INTEGER NOT NULL,
+            renewals INTEGER NOT NULL DEFAULT 0,
+            copy_id INTEGER,
+            archived_at TEXT NOT NULL DEFAULT (datetime('now'))
+        );
+        """
+    )
+
+
+def _migrate_loan_times_to_epoch(cur: sqlite3.Cursor) -> None:
+    """Rewrite ISO-text loan timestamps as integer epoch seconds.
+
+    ``loaned_at``/``returned_at`` were written by SQLite's datetime('now') (UTC)
+    while ``due_at`` came from a naive local ``datetime``; convert each from
+    its own zone. Databases created with integer columns are left untouched.
+    """
+    _create_loan_tables(cur, suffix="_epoch")
+    epoch = "CAST(strftime('%s', {0}{1}) AS INTEGER)"
+    for table, extra in (("loans", ""), ("loan_history", ", archived_at")):
+        types = {r[1]: r[2].upper() for r in cur.execute(f"PRAGMA table_info({table})")}
+        if types.get("loaned_at") != "TEXT":
+            cur.execute(f"DROP TABLE {table}_epoch;")
+            continue
+        cur.execute(
+            f"""
+            INSERT INTO {table}_epoch(id, book_id, member_id, loaned_at, due_at, returned_at{extra})
+            SELECT id, book_id, member_id, {epoch.format("loaned_at", "")},
+                   {epoch.format("due_at", ", 'utc'")}, {epoch.format("returned_at", "")}{extra}
+            FROM {table}
+            """
+        )
+        _swap_table(cur, table, f"{table}_epoch")
+
+
+def _migrate_catalog_to_soft_delete(cur: sqlite3.Cursor) -> None:
+    """Rebuild books/members with ``deleted_at`` and without column UNIQUE constraints.
+
+    SQLite cannot drop a UNIQUE constraint in place; the tables are copied
+    into the current definition. Tables that already have ``deleted_at`` are
+    left untouched.
+    """
+    _create_catalog_tables(cur, suffix="_v4")
+    for table in ("books", "members"):
+        old_cols = [r[1] for r in cur.execute(f"PRAGMA table_info({table})")]
+        if "deleted_at" in old_cols:
+            cur.execute(f"DROP TABLE {table}_v4;")
+            continue
+        new_cols = {r[1] for r in cur.execute(f"PRAGMA table_info({table}_v4)")}
+        cols = ", ".join(c for c in old_cols if c in new_cols)
+        cur.execute(f"INSERT INTO {table}_v4({cols}) SELECT {cols} FROM {table}")
+        _swap_table(cur, table, f"{table}_v4")
+
+
+def _migrate_counters_to_copies(cur: sqlite3.Cursor) -> None:
+    """Expand each book's copy counters into copy rows, in a few set-based statements.
+
+    A book gets ``available_copies`` available copies, one on-loan copy per
+    unreturned loan and one hold-shelf copy per ready hold; copies the
+    counters claim beyond that are marked missing, so staff can find or
+    withdraw them. Loans and ready holds are then linked to their copies and
+    the counters recomputed from the rows. Books that already have copies
+    are skipped.
+    """
+    cur.execute(
+        """
+        WITH RECURSIVE
+        counts(book_id, n_available, n_loans, n_ready, n_total) AS (
+            SELECT id, n_available, n_loans, n_ready, max(total_copies, n_available + n_loans + n_ready)
+            FROM (
+                SELECT b.id, b.total_copies, max(b.available_copies, 0) AS n_available,
+                       (SELECT count(*) FROM loans l WHERE l.book_id = b.id AND l.returned_at IS NULL) AS n_loans,
+                       (SELECT count(*) FROM holds h WHERE h.book_id = b.id AND h.status = 'ready') AS n_ready
+                FROM books b
+                WHERE NOT EXISTS (SELECT 1 FROM copies c WHERE c.book_id = b.id)
+            )
+        ),
+        seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < (SELECT max(n_total) FROM counts))
+        INSERT INTO copies(book_id, barcode, status)
+        SELECT book_id, printf('B%06d-%03d', book_id, i),
+               CASE WHEN i <= n_available THEN 'available'
+                    WHEN i <= n_available + n_loans THEN 'on_loan'
+                    WHEN i <= n_available + n_loans + n_ready THEN 'on_hold_shelf'
+                    ELSE 'missing' END
+        FROM counts JOIN seq ON seq.i <= counts.n_total
+        ORDER BY book_id, i
+        """
+    )
+    # Pair the k-th unlinked loan (ready hold) of a book with its k-th
+    # on-loan (hold-shelf) copy.
+    links = (("loans", "returned_at IS NULL", "on_loan"), ("holds", "status = 'ready'", "on_hold_shelf"))
+    for table, where, status in links:
+        cur.execute("DROP TABLE IF EXISTS temp._copy_links;")
+        cur.execute("CREATE TEMP TABLE _copy_links(row_id INTEGER PRIMARY KEY, copy_id INTEGER NOT NULL);")
+        cur.execute(
+            f"""
+            INSERT INTO temp._copy_links(row_id, copy_id)
+            SELECT r.id, c.id
+            FROM (SELECT id, book_id, row_number() OVER (PARTITION BY book_id ORDER BY id) AS k
+                  FROM {table} WHERE {where} AND copy_id IS NULL) r
+            JOIN (SELECT id, book_id, row_number() OVER (PARTITION BY book_id ORDER BY id) AS k
+                  FROM copies c WHERE status = '{status}'
+                    AND NOT EXISTS (SELECT 1 FROM {table} t WHERE t.copy_id = c.id AND t.{where})) c
+              ON c.book_id = r.book_id AND c.k = r.k
+            """
+        )
+        cur.execute(
+            f"""
+            UPDATE {table} SET copy_id = (SELECT copy_id FROM temp._copy_links WHERE row_id = {table}.id)
+            WHERE id IN (SELECT row_id FROM temp._copy_links)
+            """
+        )
+        cur.execute("DROP TABLE temp._copy_links;")
+    _recount_copies(cur)
+
+
+def _recount_copies(cur: sqlite3.Cursor) -> None:
+    """Recompute every book's cached counters from its copy rows (only rows that differ are written)."""
+    cur.execute(
+        """
+        UPDATE books SET total_copies = c.total, available_copies = c.available
+        FROM (SELECT b.id AS book_id,
+                     count(CASE WHEN c.status != 'withdrawn' THEN 1 END) AS total,
+                     count(CASE WHEN c.status = 'available' THEN 1 END) AS available
+              FROM books b LEFT JOIN copies c ON c.book_id = b.id GROUP BY b.id) c
+        WHERE books.id = c.book_id AND (books.total_copies != c.total OR books.available_copies != c.available)
+        """
+    )
+
+
+def _swap_table(cur: sqlite3.Cursor, table: str, rebuilt: str) -> None:
+    """Replace ``table`` with its rebuilt copy, keeping AUTOINCREMENT's high-water mark.
+
+    Without the sequence, ids of deleted or archived rows could be reused.
+    """
+    seq = cur.execute("SELECT seq FROM sqlite_sequence WHERE name=?", (table,)).fetchone()
+    cur.execute(f"DROP TABLE {table};")
+    cur.execute(f"ALTER TABLE {rebuilt} RENAME TO {table};")
+    if seq:
+        cur.execute("UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name=?", (seq[0], table))
+        if cur.rowcount == 0:
+            cur.execute("INSERT INTO sqlite_sequence(name, seq) VALUES(?, ?)", (table, seq[0]))
+
+
+def _create_compat_views(cur: sqlite3.Cursor) -> None:
+    """Text views of the loan tables in the pre-epoch formats, for exports and ad-hoc SQL."""
+    for table in ("loans", "loan_history"):
+        cur.execute(
+            f"""
+            CREATE VIEW IF NOT EXISTS {table}_iso AS
+            SELECT id, book_id, member_id,
+                   datetime(loaned_at, 'unixepoch') AS loaned_at,
+                   strftime('%Y-%m-%dT%H:%M:%S', due_at, 'unixepoch', 'localtime') AS due_at,
+                   datetime(returned_at, 'unixepoch') AS returned_at
+            FROM {table};
+            """
+        )
+
+
+def _install_change_triggers(cur: sqlite3.Cursor, table: str) -> None:
+    """(Re)create outbox triggers for ``table`` from its current columns.
+
+    Triggers are regenerated on every migration so added columns are tracked.
+    UPDATEs record the comma-separated names of columns whose value changed
+    and are skipped entirely when nothing but bookkeeping columns changed.
+    """
+    cols = [r[1] for r in cur.execute(f"PRAGMA table_info({table})") if r[1] not in CDC_IGNORED_COLUMNS]
+    changed = " || ".join(f"CASE WHEN OLD.{c} IS NOT NEW.{c} THEN '{c},' ELSE '' END" for c in cols)
+    any_changed = " OR ".join(f"OLD.{c} IS NOT NEW.{c}" for c in cols)
+    for op in "iud":
+        cur.execute(f"DROP TRIGGER IF EXISTS trg_{table}_cdc_{op};")
+    cur.execute(
+        f"""
+        CREATE TRIGGER trg_{table}_cdc_i AFTER INSERT ON {table} BEGIN
+            INSERT INTO change_outbox(table_name, op, row_id) VALUES ('{table}', 'I', NEW.id);
+        END;
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER trg_{table}_cdc_u AFTER UPDATE ON {table} WHEN {any_changed} BEGIN
+            INSERT INTO change_outbox(table_name, op, row_id, changed)
+            VALUES ('{table}', 'U', NEW.id, rtrim({changed}, ','));
+        END;
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER trg_{table}_cdc_d AFTER DELETE ON {table} BEGIN
+            INSERT INTO change_outbox(table_name, op, row_id) VALUES ('{table}', 'D', OLD.id);
+        END;
+        """
+    )
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: federation.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Multi-branch federation. Each branch keeps its own library.db; this module
+searches all of them at once, either by ATTACHing the branch files to one
+connection and running a branch-tagged UNION ALL, or by querying every
+branch in its own thread and merging the already-sorted results.
+
+Usage: 
+export LIBRARY_MS_BRANCHES="main=library.db,north=/srv/north/library.db"
+from library_ms.federation import FederatedRepository, branches_from_env
+fed = FederatedRepository(branches_from_env())
+fed.search_books("tolkien", branches=["north"])
+
+Notes: 
+- Branch files are attached read-only; writes still go to the local branch.
+- SQLite attaches at most 10 databases per connection by default.
+
+===================================================================
+"""
+from __future__ import annotations
+
+import heapq
+import os
+import sqlite3
+import string
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from . import queries as Q
+from .db import get_db_path
+from .models import Book
+from .queries import BOOK_COLUMNS
+
+BRANCHES_ENV = "LIBRARY_MS_BRANCHES"
+MAX_ATTACHED = 10
+
+# SQLite's NOCASE only folds ASCII letters; mirror it so merged order matches SQL order.
+_NOCASE = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+@dataclass(slots=True)
+class BranchBook:
+    branch: str
+    book: Book
+
+
+def parse_branches(spec: str) -> Dict[str, str]:
+    """Parse ``"name=path,name2=path2"`` into an ordered mapping."""
+    branches: Dict[str, str] = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, sep, path = part.partition("=")
+        if not sep or not name.strip() or not path.strip():
+            raise ValueError(f"invalid branch spec: {part!r} (expected name=path)")
+        branches[name.strip()] = path.strip()
+    return branches
+
+
+def branches_from_env() -> Dict[str, str]:
+    return parse_branches(os.environ.get(BRANCHES_ENV, ""))
+
+
+def _readonly_uri(path: str) -> str:
+    # mode=ro: a missing branch file is an error instead of a new empty database.
+    return get_db_path(path).as_uri() + "?mode=ro"
+
+
+def _sort_key(item: BranchBook) -> Tuple[str, str, int]:
+    return item.book.title.translate(_NOCASE), item.branch, item.book.id
+
+
+class FederatedRepository:
+    """Read-only search across several branch databases."""
+
+    def __init__(self, branches: Mapping[str, str], max_workers: Optional[int] = None) -> None:
+        if not branches:
+            raise ValueError("at least one branch is required")
+        self.branches: Dict[str, str] = dict(branches)
+        self.max_workers = max_workers or min(len(self.branches), 8)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.branches)
+
+    def _select(self, branches: Optional[Sequence[str]]) -> List[str]:
+        if branches is None:
+            return self.names
+        unknown = [b for b in branches if b not in self.branches]
+        if unknown:
+            raise ValueError(f"unknown branch: {', '.join(unknown)}")
+        return list(branches)
+
+    # --- ATTACH + UNION ALL ---
+    @contextmanager
+    def attached(self, branches: Optional[Sequence[str]] = None) -> Iterator[Tuple[sqlite3.Connection, Dict[str, str]]]:
+        """Connection with the selected branch files attached read-only.
+
+        Yields:
+            (connection, {branch name: schema alias})
+        """
+        names = self._select(branches)
+        if len(names) > MAX_ATTACHED:
+            raise ValueError(f"cannot attach more than {MAX_ATTACHED} branches; use search_books()")
+        conn = sqlite3.connect(":memory:", uri=True)
+        try:
+            aliases: Dict[str, str] = {}
+            for i, name in enumerate(names):
+                conn.execute(f"ATTACH DATABASE ? AS b{i}", (_readonly_uri(self.branches[name]),))
+                aliases[name] = f"b{i}"
+            yield conn, aliases
+        finally:
+            conn.close()
+
+    def search_books_union(self, q: Optional[str] = None, branches: Optional[Sequence[str]] = None) -> List[BranchBook]:
+        """Branch-tagged search as a single UNION ALL over attached databases."""
+        with self.attached(branches) as (conn, aliases):
+            parts, params = [], []
+            for name, alias in aliases.items():
+                sql = f"SELECT ? AS branch, {BOOK_COLUMNS} FROM {alias}.books WHERE deleted_at IS NULL"
+                params.append(name)
+                if q:
+                    sql += " AND (title LIKE ? OR author LIKE ? OR isbn LIKE ?)"
+                    params += [f"%{q}%"] * 3
+                parts.append(sql)
+            rows = conn.execute(
+                " UNION ALL ".join(parts) + " ORDER BY title COLLATE NOCASE, branch, id", params
+            ).fetchall()
+        return [BranchBook(r[0], Book(*r[1:])) for r in rows]
+
+    def availability(self, isbn: str, branches: Optional[Sequence[str]] = None) -> List[BranchBook]:
+        """Holdings of one ISBN at every selected branch (branches lacking it are omitted)."""
+        with self.attached(branches) as (conn, aliases):
+            parts = [f"SELECT ? AS branch, {BOOK_COLUMNS} FROM {alias}.books WHERE isbn = ? AND deleted_at IS NULL" for alias in aliases.values()]
+            params = [p for name in aliases for p in (name, isbn)]
+            rows = conn.execute(" UNION ALL ".join(parts) + " ORDER BY branch", params).fetchall()
+        return [BranchBook(r[0], Book(*r[1:])) for r in rows]
+
+    # --- parallel per-branch ---
+    def search_books(self, q: Optional[str] = None, branches: Optional[Sequence[str]] = None) -> List[BranchBook]:
+        """Query each branch in its own thread and merge the title-sorted results."""
+        names = self._select(branches)
+        sql = Q.BOOK_WINDOWS["title", False, ("search",) if q else ()]
+        params = ([f"%{q}%"] * 3 if q else []) + [-1, 0]  # LIMIT -1: all rows
+
+        def _one(name: str) -> List[BranchBook]:
+            conn = sqlite3.connect(_readonly_uri(self.branches[name]), uri=True)
+            try:
+                rows = conn.execute(sql, params).fetchall()
+            finally:
+                conn.close()
+            return [BranchBook(name, Book(*r)) for r in rows]
+
+        if len(names) == 1:
+            return _one(names[0])
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="branch") as pool:
+            per_branch = list(pool.map(_one, names))
+        return list(heapq.merge(*per_branch, key=_sort_key))
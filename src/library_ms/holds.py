@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: holds.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Hold-shelf expiry sweeper. Holds whose copy was not collected by its
+pickup deadline are expired and the copy passes to the next patron in the
+queue (or back to the open shelf). Run it periodically next to reminders.
+
+Usage: 
+python -m library_ms.holds
+python -m library_ms.holds --interval 900 --shelf-days 5
+
+Notes: 
+- Each batch is one short transaction; the scan uses idx_holds_shelf.
+- Placing, cancelling and collecting holds go through LibraryService.
+
+===================================================================
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import List, Optional
+
+from .repository import LibraryRepository
+from .services import HOLD_SHELF_DAYS, LibraryService
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="library_ms.holds", description="Expire uncollected holds")
+    parser.add_argument("--db", default=None, help="database path (default: ./library.db)")
+    parser.add_argument("--shelf-days", type=int, default=HOLD_SHELF_DAYS,
+                        help="pickup window for holds that become ready")
+    parser.add_argument("--batch", type=int, default=100, help="holds per transaction")
+    parser.add_argument("--interval", type=float, default=0, help="repeat every N seconds (0 = once)")
+    args = parser.parse_args(argv)
+
+    svc = LibraryService(LibraryRepository(args.db), hold_shelf_days=args.shelf_days)
+    while True:
+        print(f"expired {svc.expire_holds(batch_size=args.batch)} holds", flush=True)
+        if args.interval <= 0:
+            return
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
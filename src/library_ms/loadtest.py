@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: loadtest.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Multi-desk load generator. Simulates N circulation desks (threads or
+processes) running a borrow/return/search mix against a throwaway database
+and reports throughput, latency percentiles, busy retries and lock errors.
+
+Usage: 
+python -m library_ms.loadtest --desks 8 --duration 10
+python -m library_ms.loadtest --desks 8 --mode process --busy-timeout 500 --attempts 3
+
+Notes: 
+- Each desk uses its own LibraryService/connection, like separate PCs.
+- "book not available" is a normal business outcome, not an error.
+
+===================================================================
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sqlite3
+import string
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from . import db
+from .db import RetryPolicy, configure_connections, is_busy_error, migrate
+from .models import auto_barcode
+from .repository import LibraryRepository
+from .services import LibraryService
+
+DEFAULT_MIX = {"borrow": 0.3, "return": 0.3, "search": 0.4}
+
+
+@dataclass(slots=True)
+class DeskResult:
+    latencies: Dict[str, List[float]] = field(default_factory=dict)
+    lock_errors: int = 0
+    other_errors: int = 0
+    retries: int = 0
+
+
+@dataclass(slots=True)
+class LoadReport:
+    desks: int
+    duration: float
+    ops: int
+    throughput: float
+    counts: Dict[str, int]
+    percentiles: Dict[str, Tuple[float, float, float]]  # op -> (p50, p95, p99) in ms
+    lock_errors: int
+    other_errors: int
+    retries: int
+
+    def format(self) -> str:
+        lines = [
+            f"desks={self.desks} duration={self.duration:.1f}s ops={self.ops} "
+            f"throughput={self.throughput:.1f} ops/s",
+            f"lock errors={self.lock_errors} other errors={self.other_errors} busy retries={self.retries}",
+            f"{'op':<8}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}",
+        ]
+        for op, (p50, p95, p99) in sorted(self.percentiles.items()):
+            lines.append(f"{op:<8}{self.counts.get(op, 0):>8}{p50:>10.2f}{p95:>10.2f}{p99:>10.2f}")
+        return "\n".join(lines)
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse ``"borrow=0.3,return=0.3,search=0.4"`` into normalised weights."""
+    mix: Dict[str, float] = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        op, _, weight = part.partition("=")
+        if op not in DEFAULT_MIX:
+            raise ValueError(f"unknown operation: {op}")
+        mix[op] = float(weight)
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError("mix weights must sum to > 0")
+    return {op: w / total for op, w in mix.items()}
+
+
+def seed_database(path: str, books: int, members: int, copies: int = 3) -> None:
+    migrate(path)
+    with db.get_connection(path) as conn:
+        conn.executemany(
+            "INSERT INTO books(isbn, title, author, total_copies, available_copies) VALUES(?, ?, ?, ?, ?)",
+            [(f"978{i:010d}", f"Title {i}", f"Author {i % 97}", copies, copies) for i in range(books)],
+        )
+        conn.executemany(
+            "INSERT INTO copies(book_id, barcode) VALUES(?, ?)",
+            [(b, auto_barcode(b, n)) for b in range(1, books + 1) for n in range(1, copies + 1)],
+        )
+        conn.executemany(
+            "INSERT INTO members(name, email) VALUES(?, ?)",
+            [(f"Member {i}", f"m{i}@example.org") for i in range(members)],
+        )
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def run_desk(
+    path: str,
+    desk: int,
+    duration: float,
+    mix: Dict[str, float],
+    books: int,
+    members: int,
+    busy_timeout_ms: int,
+    policy: RetryPolicy,
+) -> DeskResult:
+    """One desk's loop; top-level so it can run in a worker process."""
+    configure_connections(busy_timeout_ms=busy_timeout_ms, retry=policy)
+    retries_before = db.retry_count()
+    rng = random.Random(desk)
+    svc = LibraryService(LibraryRepository(path))
+    ops, weights = list(mix), list(mix.values())
+    my_loans: List[int] = []
+    result = DeskResult()
+    deadline = time.perf_counter() + duration
+
+    while time.perf_counter() < deadline:
+        op = rng.choices(ops, weights)[0]
+        if op == "return" and not my_loans:
+            op = "borrow"
+        started = time.perf_counter()
+        try:
+            if op == "borrow":
+                try:
+                    my_loans.append(svc.borrow_book(rng.randint(1, books), rng.randint(1, members)))
+                except ValueError:
+                    pass  # not available: a normal outcome at a busy desk
+            elif op == "return":
+                svc.return_book(my_loans.pop(rng.randrange(len(my_loans))))
+            else:
+                svc.list_books(rng.choice(string.ascii_lowercase) + rng.choice(string.digits))
+        except sqlite3.OperationalError as ex:
+            if is_busy_error(ex):
+                result.lock_errors += 1
+            else:
+                result.other_errors += 1
+            continue
+        result.latencies.setdefault(op, []).append(time.perf_counter() - started)
+
+    result.retries = db.retry_count() - retries_before  # meaningful in process mode only
+    return result
+
+
+def run_load(
+    desks: int = 4,
+    duration: float = 5.0,
+    mode: str = "thread",
+    mix: Optional[Dict[str, float]] = None,
+    books: int = 500,
+    members: int = 200,
+    busy_timeout_ms: int = db.DEFAULT_BUSY_TIMEOUT_MS,
+    policy: RetryPolicy = db.DEFAULT_RETRY_POLICY,
+    db_path: Optional[str] = None,
+) -> LoadReport:
+    """Seed a database (temporary unless ``db_path`` is given) and hammer it."""
+    if desks < 1:
+        raise ValueError("desks must be >= 1")
+    if mode not in ("thread", "process"):
+        raise ValueError("mode must be 'thread' or 'process'")
+    mix = mix or DEFAULT_MIX
+
+    # Thread desks configure this process's connections; put them back afterwards.
+    previous = (db.busy_timeout_ms(), db.retry_policy())
+    try:
+        with tempfile.TemporaryDirectory(prefix="library-load-") as tmp:
+            path = db_path or str(Path(tmp) / "load.db")
+            seed_database(path, books, members)
+            pool_cls = ThreadPoolExecutor if mode == "thread" else ProcessPoolExecutor
+            args = (duration, mix, books, members, busy_timeout_ms, policy)
+            retries_before = db.retry_count()
+            started = time.perf_counter()
+            with pool_cls(max_workers=desks) as pool:
+                futures = [pool.submit(run_desk, path, d, *args) for d in range(desks)]
+                results = [f.result() for f in futures]
+            elapsed = time.perf_counter() - started
+            retries_after = db.retry_count()
+    finally:
+        configure_connections(busy_timeout_ms=previous[0], retry=previous[1])
+
+    merged: Dict[str, List[float]] = {}
+    for r in results:
+        for op, lat in r.latencies.items():
+            merged.setdefault(op, []).extend(lat)
+    percentiles = {}
+    for op, lat in merged.items():
+        lat.sort()
+        percentiles[op] = tuple(_percentile(lat, q) * 1000 for q in (0.50, 0.95, 0.99))
+    ops = sum(len(v) for v in merged.values())
+    # Thread desks share this process's retry counter; process desks report their own.
+    retries = retries_after - retries_before if mode == "thread" else sum(r.retries for r in results)
+    return LoadReport(
+        desks=desks,
+        duration=elapsed,
+        ops=ops,
+        counts={op: len(v) for op, v in merged.items()},
+        throughput=ops / elapsed if elapsed else 0.0,
+        percentiles=percentiles,
+        lock_errors=sum(r.lock_errors for r in results),
+        other_errors=sum(r.other_errors for r in results),
+        retries=retries,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="library_ms.loadtest", description="Simulate concurrent desks")
+    parser.add_argument("--desks", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per run")
+    parser.add_argument("--mode", choices=("thread", "process"), default="thread")
+    parser.add_argument("--mix", default="borrow=0.3,return=0.3,search=0.4")
+    parser.add_argument("--books", type=int, default=500)
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--busy-timeout", type=int, default=db.DEFAULT_BUSY_TIMEOUT_MS, help="ms")
+    parser.add_argument("--attempts", type=int, default=db.DEFAULT_RETRY_POLICY.attempts)
+    parser.add_argument("--base-delay", type=float, default=db.DEFAULT_RETRY_POLICY.base_delay, help="s")
+    parser.add_argument("--max-delay", type=float, default=db.DEFAULT_RETRY_POLICY.max_delay, help="s")
+    args = parser.parse_args(argv)
+
+    policy = RetryPolicy(attempts=args.attempts, base_delay=args.base_delay, max_delay=args.max_delay)
+    report = run_load(
+        desks=args.desks, duration=args.duration, mode=args.mode, mix=parse_mix(args.mix),
+        books=args.books, members=args.members, busy_timeout_ms=args.busy_timeout, policy=policy,
+    )
+    print(report.format())
+
+
+if __name__ == "__main__":
+    main()
@@ -11,8 +11,9 @@ License: MIT License (see LICENSE file for details)
 =================================================================== 
 
 Description: 
-Tkinter entrypoint. Wires UI to services and repository; ensures database
-migrations run before the UI is presented.
+Tkinter entrypoint. Wires UI to services and repository. The window is
+shown first; migrations (only when the schema is out of date) and the first
+tab's data load follow, and other tabs load when first selected.
 
 Usage: 
 python -m library_ms
@@ -21,49 +22,112 @@ library-ms
 
 Notes: 
 - Keep root window simple; main content lives in tabbed views.
+- Set LIBRARY_MS_PROFILE_STARTUP=1 to print startup timings to stderr.
+- LIBRARY_MS_ACTOR names the desk user in the audit log (default: OS login).
+- LIBRARY_MS_STORAGE_PROFILE picks the SQLite storage profile (see db.PROFILES).
 
 ===================================================================
 """
 from __future__ import annotations
 
+import time
+
+_IMPORT_START = time.perf_counter()
+
+import sys
 import tkinter as tk
 from tkinter import ttk
 
-from .db import migrate
+from .analytics import CirculationAnalytics
+from .audit import AuditLog, default_actor
+from .db import migrate, needs_migration, run_with_retry, storage_profile
+from .federation import FederatedRepository, branches_from_env
 from .services import LibraryService
+from .storage import run_maintenance
+from .typeahead import CatalogTypeahead
 from .ui.theme import apply_base_theme
 from .ui.views_books import BooksView
 from .ui.views_members import MembersView
 from .ui.views_loans import LoansView
+from .ui.views_branches import BranchesView
+from .ui.views_reports import ReportsView
+from .utils.profiling import StartupProfile, profiling_enabled
 
 
 class App(ttk.Frame):
+    """Main window. Views are built empty and load their data the first
+    time their tab is shown (see ``activate``)."""
+
     def __init__(self, master: tk.Tk) -> None:
         super().__init__(master)
         self.master.title("Library Management System")
         self.master.geometry("960x600")
         self.pack(fill=tk.BOTH, expand=True)
 
-        self.service = LibraryService()
+        self.service = LibraryService(actor=default_actor())
+        self.audit = AuditLog()
+        self.audit.attach(self.service)
+        self.typeahead = CatalogTypeahead(self.service)
 
-        notebook = ttk.Notebook(self)
+        self.notebook = notebook = ttk.Notebook(self)
         notebook.pack(fill=tk.BOTH, expand=True)
 
         self.books_view = BooksView(notebook, self.service)
         self.members_view = MembersView(notebook, self.service)
-        self.loans_view = LoansView(notebook, self.service)
+        self.loans_view = LoansView(notebook, self.service, self.typeahead)
+        self.reports_view = ReportsView(notebook, CirculationAnalytics())
 
         notebook.add(self.books_view, text="Books")
         notebook.add(self.members_view, text="Members")
         notebook.add(self.loans_view, text="Loans")
+        notebook.add(self.reports_view, text="Reports")
+
+        branches = branches_from_env()
+        if branches:
+            self.branches_view = BranchesView(notebook, FederatedRepository(branches))
+            notebook.add(self.branches_view, text="Branches")
+
+        self._loaded: set[str] = set()
+
+    def activate(self) -> None:
+        """Start loading data: the visible tab now, other tabs when first selected."""
+        self.typeahead.start()
+        self.notebook.bind("<<NotebookTabChanged>>", lambda _e: self._load_current_tab())
+        self._load_current_tab()
+
+    def _load_current_tab(self) -> None:
+        tab = self.notebook.select()
+        if not tab or tab in self._loaded:
+            return
+        self._loaded.add(tab)
+        self.nametowidget(tab).refresh()
 
 
 def main() -> None:
-    migrate()  # ensure tables exist
+    profile = StartupProfile(_IMPORT_START)
+    profile.mark("import")
+
     root = tk.Tk()
     apply_base_theme(root)
-    App(root)
+    app = App(root)
+    root.update()  # show the window before touching the database
+    profile.mark("first_paint")
+
+    if needs_migration():
+        migrate()  # ensure tables exist
+    profile.mark("migrate")
+
+    app.audit.start()
+    app.activate()
+    root.update_idletasks()
+    profile.mark("first_data")
+    if profiling_enabled():
+        print(profile.report(), file=sys.stderr)
+
     root.mainloop()
+    app.audit.close()
+    if not storage_profile().query_only:
+        run_with_retry(run_maintenance)  # PRAGMA optimize before exit, as SQLite advises
 
 
 if __name__ == "__main__":
@@ -0,0 +1,571 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: memory_repository.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Pure in-memory implementation of the Repository interface for fast tests
+and benchmarks. Rows live in dicts; sorted (key, id) lists mirror the
+SQLite ordering so results match LibraryRepository exactly.
+
+Usage: 
+from library_ms.memory_repository import InMemoryRepository
+svc = LibraryService(InMemoryRepository())
+
+Notes: 
+- Constraint violations raise the same sqlite3 exception types.
+- Not persistent and not shared between processes.
+- Nothing is archived, so ``include_history`` adds no rows; the archive
+  and its history queries are tested against SQLite only.
+
+===================================================================
+"""
+from __future__ import annotations
+
+import sqlite3
+import string
+import threading
+import time
+from bisect import bisect_left, insort
+from dataclasses import replace
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .models import (
+    COPY_AVAILABLE, COPY_ON_HOLD_SHELF, COPY_ON_LOAN, COPY_WITHDRAWN,
+    HOLD_CANCELLED, HOLD_EXPIRED, HOLD_FULFILLED, HOLD_READY, HOLD_WAITING,
+    Book, Copy, HistoryCursor, Hold, Member, Loan, LoanPage, LoanRecord, LoanRow, auto_barcode, from_epoch, to_epoch,
+)
+from .repository import (
+    ACTIVE_LOAN_SORTS, BOOK_SORTS, MEMBER_SORTS, UNVERSIONED_BOOK_FIELDS, VersionConflictError, check_window,
+    copy_count_delta,
+)
+
+# SQLite's NOCASE collation and LIKE only fold ASCII letters.
+_ASCII_FOLD = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+_BOOK_COLUMNS = frozenset({"isbn", "title", "author", "year", "total_copies", "available_copies"})
+_MEMBER_COLUMNS = frozenset({"name", "email", "phone"})
+
+
+def _nocase(value: str) -> str:
+    return value.translate(_ASCII_FOLD)
+
+
+def _like(value: Optional[str], q: str) -> bool:
+    """``value LIKE '%q%'`` (NULL never matches)."""
+    return value is not None and _nocase(q) in _nocase(str(value))
+
+
+def _nulls_first(value: Any) -> Tuple[bool, Any]:
+    return value is not None, value
+
+
+# Sort keys of the list windows, as queries.BOOK_ORDER etc. order them.
+_BOOK_KEYS: Dict[str, Callable[[Book], Any]] = {
+    "title": lambda b: _nocase(b.title),
+    "author": lambda b: _nocase(b.author),
+    "year": lambda b: _nulls_first(b.year),
+    "isbn": lambda b: b.isbn,
+    "available": lambda b: b.available_copies,
+}
+_MEMBER_KEYS: Dict[str, Callable[[Member], Any]] = {
+    "name": lambda m: _nocase(m.name),
+    "email": lambda m: _nulls_first(m.email),
+}
+_LOAN_KEYS = {"loaned": 3, "due": 4}  # LoanRow positions
+
+
+def _window(rows: Iterable[Any], key: Callable[[Any], Any], descending: bool,
+            limit: Optional[int], offset: int) -> List[Any]:
+    """Sort by ``key`` (which must end with the id) and cut out ``limit`` rows from ``offset``."""
+    ordered = sorted(rows, key=key, reverse=descending)
+    return ordered[offset:None if limit is None else offset + limit]
+
+
+class InMemoryRepository:
+    """Dict-backed repository with sorted secondary indexes."""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._books: Dict[int, Book] = {}
+        self._members: Dict[int, Member] = {}
+        self._loans: Dict[int, List[Any]] = {}  # id -> [id, book_id, member_id, loaned, due, returned, renewals, copy_id]
+        self._copy_loans: Dict[int, int] = {}  # copy id -> its unreturned loan (stands in for idx_loans_copy)
+        self._member_loans: Dict[int, List[int]] = {}  # member -> loan ids (stands in for idx_loans_member)
+        # Soft-deleted rows: hidden everywhere but still referenced by loans.
+        self._deleted_books: Dict[int, Book] = {}
+        self._deleted_members: Dict[int, Member] = {}
+        # Sorted indexes: (sort key, id)
+        self._book_titles: List[Tuple[str, int]] = []
+        self._member_names: List[Tuple[str, int]] = []
+        self._isbns: Dict[str, int] = {}
+        self._emails: Dict[str, int] = {}
+        # Copies: id -> Copy, plus the barcode and per-book indexes
+        self._copies: Dict[int, Copy] = {}
+        self._barcodes: Dict[str, int] = {}
+        self._book_copies: Dict[int, List[int]] = {}  # book -> copy ids, oldest first
+        # Holds: id -> [id, book_id, member_id, priority, created, status, expires, copy_id]
+        self._holds: Dict[int, List[Any]] = {}
+        self._queues: Dict[int, List[Tuple[int, int, int]]] = {}  # book -> sorted (priority, created, id)
+        self._shelf: List[Tuple[int, int]] = []  # sorted (expires, id) of ready holds
+        self._open_holds: Dict[Tuple[int, int], int] = {}  # (member, book) -> id
+        self._seq = {"books": 0, "members": 0, "copies": 0, "loans": 0, "holds": 0}
+
+    def _next_id(self, table: str) -> int:
+        self._seq[table] += 1
+        return self._seq[table]
+
+    @staticmethod
+    def _check_version(entity: str, row_id: int, row: Any, expected: Optional[int]) -> None:
+        if expected is not None and (row is None or row.version != expected):
+            raise VersionConflictError(entity, row_id, expected, row.version if row else None)
+
+    @staticmethod
+    def _index_remove(index: List[Tuple[str, int]], key: Tuple[str, int]) -> None:
+        i = bisect_left(index, key)
+        if i < len(index) and index[i] == key:
+            del index[i]
+
+    # --- Books ---
+    def add_book(self, book: Book) -> int:
+        with self._lock:
+            if book.isbn in self._isbns:
+                raise sqlite3.IntegrityError("UNIQUE constraint failed: books.isbn")
+            book_id = self._next_id("books")
+            self._books[book_id] = replace(book, id=book_id, version=1, total_copies=0, available_copies=0)
+            self._isbns[book.isbn] = book_id
+            insort(self._book_titles, (_nocase(book.title), book_id))
+            for n in range(1, book.total_copies + 1):
+                self._insert_copy(book_id, auto_barcode(book_id, n), None)
+            return book_id
+
+    def update_book(self, book_id: int, expected_version: Optional[int] = None,
+                    ready_until: Optional[datetime] = None, **fields: Any) -> List[Hold]:
+        if not fields:
+            return []
+        unknown = set(fields) - _BOOK_COLUMNS
+        if unknown:
+            raise sqlite3.OperationalError(f"no such column: {sorted(unknown)[0]}")
+        copies = fields.pop("total_copies", None)
+        with self._lock:
+            old = self._books.get(book_id)
+            self._check_version("book", book_id, old, expected_version)
+            if old is None:
+                return []
+            new = replace(old, **fields)
+            if copies is not None or not fields.keys() <= UNVERSIONED_BOOK_FIELDS:
+                new.version += 1
+            # Check everything that can fail before touching any state.
+            owned = self._book_copies.get(book_id, [])
+            barcodes: List[str] = []
+            withdraw: List[int] = []
+            if copies is not None and copies > old.total_copies:
+                if ready_until is None:
+                    raise ValueError("ready_until is required to add copies")
+                barcodes = [auto_barcode(book_id, len(owned) + i) for i in range(1, copies - old.total_copies + 1)]
+                if any(b in self._barcodes for b in barcodes):
+                    raise sqlite3.IntegrityError("UNIQUE constraint failed: copies.barcode")
+            elif copies is not None and copies < old.total_copies:
+                shelf = [i for i in owned if self._copies[i].status == COPY_AVAILABLE]
+                if len(shelf) < old.total_copies - copies:
+                    raise ValueError(f"only {len(shelf)} copies are on the shelf to withdraw")
+                withdraw = shelf[len(shelf) - (old.total_copies - copies):]  # newest first out
+            if new.isbn != old.isbn:
+                if new.isbn in self._isbns:
+                    raise sqlite3.IntegrityError("UNIQUE constraint failed: books.isbn")
+                del self._isbns[old.isbn]
+                self._isbns[new.isbn] = book_id
+            if new.title != old.title:
+                self._index_remove(self._book_titles, (_nocase(old.title), book_id))
+                insort(self._book_titles, (_nocase(new.title), book_id))
+            self._books[book_id] = new
+            for copy_id in withdraw:
+                self._move_copy(copy_id, COPY_AVAILABLE, COPY_WITHDRAWN)
+            added = [self._insert_copy(book_id, barcode, None) for barcode in barcodes]
+            holds = [self._release_copy(book_id, copy_id, COPY_AVAILABLE, ready_until) for copy_id in added]
+            return [h for h in holds if h is not None]
+
+    def delete_book(self, book_id: int) -> None:
+        with self._lock:
+            book = self._books.pop(book_id, None)
+            if book is None:
+                return
+            del self._isbns[book.isbn]
+            self._index_remove(self._book_titles, (_nocase(book.title), book_id))
+            self._deleted_books[book_id] = book
+
+    def get_book(self, book_id: int) -> Optional[Book]:
+        with self._lock:
+            book = self._books.get(book_id)
+            return replace(book) if book else None
+
+    def list_books(self, q: Optional[str] = None, *, sort: str = "title", descending: bool = False,
+                   available_only: bool = False, year_from: Optional[int] = None, year_to: Optional[int] = None,
+                   limit: Optional[int] = None, offset: int = 0) -> List[Book]:
+        check_window("books", sort, BOOK_SORTS, limit, offset)
+        with self._lock:
+            books = (self._books[i] for _, i in self._book_titles)
+            if q:
+                books = (b for b in books if _like(b.title, q) or _like(b.author, q) or _like(b.isbn, q))
+            if available_only:
+                books = (b for b in books if b.available_copies > 0)
+            if year_from is not None or year_to is not None:
+                lo = year_from if year_from is not None else -float("inf")
+                hi = year_to if year_to is not None else float("inf")
+                books = (b for b in books if b.year is not None and lo <= b.year <= hi)
+            if sort == "title" and not descending and limit is None and not offset:  # already in title order
+                return [replace(b) for b in books]
+            key = _BOOK_KEYS[sort]
+            return [replace(b) for b in _window(books, lambda b: (key(b), b.id), descending, limit, offset)]
+
+    # --- Copies ---
+    def _adjust_counts(self, book_id: int, total: int, available: int) -> None:
+        book = self._books.get(book_id) or self._deleted_books.get(book_id)
+        if book is not None:
+            book.total_copies += total
+            book.available_copies += available
+
+    def _move_copy(self, copy_id: Optional[int], old: str, new: str) -> bool:
+        copy = self._copies.get(copy_id) if copy_id is not None else None
+        if copy is None or copy.status != old:
+            return False
+        copy.status = new
+        self._adjust_counts(copy.book_id, *copy_count_delta(old, new))
+        return True
+
+    def _insert_copy(self, book_id: int, barcode: str, location: Optional[str]) -> int:
+        if barcode in self._barcodes:
+            raise sqlite3.IntegrityError("UNIQUE constraint failed: copies.barcode")
+        copy_id = self._next_id("copies")
+        self._copies[copy_id] = Copy(copy_id, book_id, barcode, COPY_AVAILABLE, location)
+        self._barcodes[barcode] = copy_id
+        self._book_copies.setdefault(book_id, []).append(copy_id)
+        self._adjust_counts(book_id, 1, 1)
+        return copy_id
+
+    def add_copy(self, book_id: int, barcode: Optional[str] = None, location: Optional[str] = None, *,
+                 ready_until: datetime) -> Tuple[int, Optional[Hold]]:
+        with self._lock:
+            if book_id not in self._books and book_id not in self._deleted_books:
+                raise sqlite3.IntegrityError("FOREIGN KEY constraint failed")
+            if barcode is None:
+                barcode = auto_barcode(book_id, len(self._book_copies.get(book_id, [])) + 1)
+            copy_id = self._insert_copy(book_id, barcode, location)
+            return copy_id, self._release_copy(book_id, copy_id, COPY_AVAILABLE, ready_until)
+
+    def get_copy(self, copy_id: int) -> Optional[Copy]:
+        with self._lock:
+            copy = self._copies.get(copy_id)
+            return replace(copy) if copy else None
+
+    def get_copy_by_barcode(self, barcode: str) -> Optional[Copy]:
+        with self._lock:
+            copy_id = self._barcodes.get(barcode)
+            return replace(self._copies[copy_id]) if copy_id else None
+
+    def list_copies(self, book_id: int) -> List[Copy]:
+        with self._lock:
+            return [replace(self._copies[i]) for i in self._book_copies.get(book_id, [])]
+
+    def find_available_copy(self, book_id: int) -> Optional[Copy]:
+        with self._lock:
+            for i in self._book_copies.get(book_id, []):
+                if self._copies[i].status == COPY_AVAILABLE:
+                    return replace(self._copies[i])
+            return None
+
+    def set_copy_status(self, copy_id: int, status: str, expected_status: str,
+                        ready_until: datetime) -> Tuple[bool, Optional[Hold]]:
+        with self._lock:
+            copy = self._copies.get(copy_id)
+            if copy is None or copy.status != expected_status:
+                return False, None
+            if status == COPY_AVAILABLE:
+                return True, self._release_copy(copy.book_id, copy_id, expected_status, ready_until)
+            return self._move_copy(copy_id, expected_status, status), None
+
+    # --- Members ---
+    def add_member(self, member: Member) -> int:
+        with self._lock:
+            if member.email is not None and member.email in self._emails:
+                raise sqlite3.IntegrityError("UNIQUE constraint failed: members.email")
+            member_id = self._next_id("members")
+            self._members[member_id] = replace(member, id=member_id, version=1)
+            if member.email is not None:
+                self._emails[member.email] = member_id
+            insort(self._member_names, (_nocase(member.name), member_id))
+            return member_id
+
+    def update_member(self, member_id: int, expected_version: Optional[int] = None, **fields: Any) -> None:
+        if not fields:
+            return
+        unknown = set(fields) - _MEMBER_COLUMNS
+        if unknown:
+            raise sqlite3.OperationalError(f"no such column: {sorted(unknown)[0]}")
+        with self._lock:
+            old = self._members.get(member_id)
+            self._check_version("member", member_id, old, expected_version)
+            if old is None:
+                return
+            new = replace(old, version=old.version + 1, **fields)
+            if new.email != old.email:
+                if new.email is not None and new.email in self._emails:
+                    raise sqlite3.IntegrityError("UNIQUE constraint failed: members.email")
+                self._emails.pop(old.email, None)
+                if new.email is not None:
+                    self._emails[new.email] = member_id
+            if new.name != old.name:
+                self._index_remove(self._member_names, (_nocase(old.name), member_id))
+                insort(self._member_names, (_nocase(new.name), member_id))
+            self._members[member_id] = new
+
+    def delete_member(self, member_id: int) -> None:
+        with self._lock:
+            member = self._members.pop(member_id, None)
+            if member is None:
+                return
+            self._emails.pop(member.email, None)
+            self._index_remove(self._member_names, (_nocase(member.name), member_id))
+            self._deleted_members[member_id] = member
+
+    def get_member(self, member_id: int) -> Optional[Member]:
+        with self._lock:
+            member = self._members.get(member_id)
+            return replace(member) if member else None
+
+    def list_members(self, q: Optional[str] = None, *, sort: str = "name", descending: bool = False,
+                     limit: Optional[int] = None, offset: int = 0) -> List[Member]:
+        check_window("members", sort, MEMBER_SORTS, limit, offset)
+        with self._lock:
+            members = (self._members[i] for _, i in self._member_names)
+            if q:
+                members = (m for m in members if _like(m.name, q) or _like(m.email, q) or _like(m.phone, q))
+            key = _MEMBER_KEYS[sort]
+            return [replace(m) for m in _window(members, lambda m: (key(m), m.id), descending, limit, offset)]
+
+    # --- Loans ---
+    def _create_loan(self, book_id: int, member_id: int, due_at: datetime) -> int:
+        with self._lock:
+            if (book_id not in self._books and book_id not in self._deleted_books) or \
+                    (member_id not in self._members and member_id not in self._deleted_members):
+                raise sqlite3.IntegrityError("FOREIGN KEY constraint failed")
+            loan_id = self._next_id("loans")
+            self._loans[loan_id] = [loan_id, book_id, member_id, int(time.time()), to_epoch(due_at), None, 0, None]
+            self._member_loans.setdefault(member_id, []).append(loan_id)
+            return loan_id
+
+    def checkout_copy(self, copy_id: int, member_id: int, due_at: datetime,
+                      hold_id: Optional[int] = None) -> Optional[int]:
+        expected = COPY_AVAILABLE if hold_id is None else COPY_ON_HOLD_SHELF
+        with self._lock:
+            copy = self._copies.get(copy_id)
+            if copy is None or copy.status != expected:
+                return None
+            if hold_id is not None and not self.fulfil_hold(hold_id):
+                return None
+            loan_id = self._create_loan(copy.book_id, member_id, due_at)
+            self._move_copy(copy_id, expected, COPY_ON_LOAN)
+            self._loans[loan_id][7] = copy_id
+            self._copy_loans[copy_id] = loan_id
+            return loan_id
+
+    def find_active_loan_by_barcode(self, barcode: str) -> Optional[Loan]:
+        with self._lock:
+            loan_id = self._copy_loans.get(self._barcodes.get(barcode, 0))
+            return self.get_loan(loan_id) if loan_id else None
+
+    def mark_returned(self, loan_id: int) -> None:
+        with self._lock:
+            row = self._loans.get(loan_id)
+            if row is not None and row[5] is None:
+                row[5] = int(time.time())
+                self._copy_loans.pop(row[7], None)
+
+    def list_loan_rows(self, active_only: bool = False, include_history: bool = False) -> List[LoanRow]:
+        with self._lock:
+            rows = [tuple(r) for r in self._loans.values() if not active_only or r[5] is None]
+        rows.sort(key=lambda r: (r[3], r[0]), reverse=True)
+        return rows
+
+    def list_loan_records(self, active_only: bool = False, include_history: bool = False) -> List[LoanRecord]:
+        return [LoanRecord(*r) for r in self.list_loan_rows(active_only, include_history)]
+
+    def list_active_loans(self, *, sort: str = "loaned", descending: bool = True,
+                          overdue_before: Optional[datetime] = None,
+                          limit: Optional[int] = None, offset: int = 0) -> List[Loan]:
+        check_window("loans", sort, ACTIVE_LOAN_SORTS, limit, offset)
+        cutoff = to_epoch(overdue_before) if overdue_before is not None else None
+        with self._lock:
+            rows = [tuple(r) for r in self._loans.values() if r[5] is None and (cutoff is None or r[4] < cutoff)]
+        pos = _LOAN_KEYS[sort]
+        return [self._row_to_loan(r) for r in _window(rows, lambda r: (r[pos], r[0]), descending, limit, offset)]
+
+    def list_loans(self, include_history: bool = False) -> List[Loan]:
+        return [self._row_to_loan(r) for r in self.list_loan_rows(include_history=include_history)]
+
+    def list_overdue_loans(self, now: Optional[datetime] = None) -> List[Loan]:
+        cutoff = to_epoch(now or datetime.now())
+        with self._lock:
+            rows = [tuple(r) for r in self._loans.values() if r[5] is None and r[4] < cutoff]
+        rows.sort(key=lambda r: (r[4], r[0]))
+        return [self._row_to_loan(r) for r in rows]
+
+    def return_loan(self, loan_id: int, ready_until: datetime) -> Tuple[Optional[Loan], Optional[Hold]]:
+        with self._lock:
+            row = self._loans.get(loan_id)
+            if row is None or row[5] is not None:
+                return None, None
+            row[5] = int(time.time())
+            self._copy_loans.pop(row[7], None)
+            return self._row_to_loan(tuple(row)), self._release_copy(row[1], row[7], COPY_ON_LOAN, ready_until)
+
+    def get_loan(self, loan_id: int) -> Optional[Loan]:
+        with self._lock:
+            row = self._loans.get(loan_id)
+            if row is None:
+                return None
+            return self._row_to_loan(tuple(row))
+
+    def renew_loan(self, loan_id: int, due_at: datetime, expected_renewals: int) -> bool:
+        with self._lock:
+            row = self._loans.get(loan_id)
+            if row is None or row[5] is not None or row[6] != expected_renewals:
+                return False
+            row[4] = to_epoch(due_at)
+            row[6] += 1
+            return True
+
+    # --- Per-member queries ---
+    def _member_rows(self, member_id: int) -> List[List[Any]]:
+        return [self._loans[i] for i in self._member_loans.get(member_id, []) if i in self._loans]
+
+    def member_loan_stats(self, member_id: int, now: datetime) -> Tuple[int, int]:
+        cutoff = to_epoch(now)
+        with self._lock:
+            open_rows = [r for r in self._member_rows(member_id) if r[5] is None]
+            return len(open_rows), sum(1 for r in open_rows if r[4] < cutoff)
+
+    def member_open_loans(self, member_id: int) -> List[Loan]:
+        with self._lock:
+            rows = sorted((r for r in self._member_rows(member_id) if r[5] is None), key=lambda r: (r[4], r[0]))
+            return [self._row_to_loan(tuple(r)) for r in rows]
+
+    def member_loan_history(self, member_id: int, limit: int = 50,
+                            cursor: Optional[HistoryCursor] = None) -> LoanPage:
+        with self._lock:
+            rows = [tuple(r) for r in self._member_rows(member_id) if r[5] is not None]
+        keyed = sorted(((r[5], r[4], r[0]), r) for r in rows)
+        keyed.reverse()
+        if cursor is not None:
+            keyed = [kr for kr in keyed if kr[0] < tuple(cursor)]
+        page = keyed[:limit]
+        return LoanPage([self._row_to_loan(r) for _, r in page],
+                        page[-1][0] if len(keyed) > limit else None)
+
+    # --- Holds ---
+    def _release_copy(self, book_id: int, copy_id: Optional[int], status: str,
+                      ready_until: datetime) -> Optional[Hold]:
+        queue = self._queues.get(book_id, [])
+        for i, (_, _, hold_id) in enumerate(queue):
+            h = self._holds[hold_id]
+            if h[2] in self._members:  # skip members deleted while waiting
+                del queue[i]
+                h[5], h[6], h[7] = HOLD_READY, to_epoch(ready_until), copy_id
+                insort(self._shelf, (h[6], hold_id))
+                self._move_copy(copy_id, status, COPY_ON_HOLD_SHELF)
+                return self._row_to_hold(h)
+        if copy_id is None:
+            self._adjust_counts(book_id, 0, 1)
+        else:
+            self._move_copy(copy_id, status, COPY_AVAILABLE)
+        return None
+
+    def _close_hold(self, h: List[Any], status: str) -> None:
+        if h[5] == HOLD_WAITING:
+            self._index_remove(self._queues[h[1]], (h[3], h[4], h[0]))
+        else:
+            self._index_remove(self._shelf, (h[6], h[0]))
+        del self._open_holds[(h[2], h[1])]
+        h[5], h[6] = status, None
+
+    def place_hold(self, book_id: int, member_id: int, priority: int = 0) -> int:
+        with self._lock:
+            if (book_id not in self._books and book_id not in self._deleted_books) or \
+                    (member_id not in self._members and member_id not in self._deleted_members):
+                raise sqlite3.IntegrityError("FOREIGN KEY constraint failed")
+            if (member_id, book_id) in self._open_holds:
+                raise sqlite3.IntegrityError("UNIQUE constraint failed: holds.member_id, holds.book_id")
+            hold_id = self._next_id("holds")
+            created = int(time.time())
+            self._holds[hold_id] = [hold_id, book_id, member_id, priority, created, HOLD_WAITING, None, None]
+            insort(self._queues.setdefault(book_id, []), (priority, created, hold_id))
+            self._open_holds[(member_id, book_id)] = hold_id
+            return hold_id
+
+    def get_hold(self, hold_id: int) -> Optional[Hold]:
+        with self._lock:
+            h = self._holds.get(hold_id)
+            return self._row_to_hold(h) if h else None
+
+    def find_open_hold(self, book_id: int, member_id: int) -> Optional[Hold]:
+        with self._lock:
+            hold_id = self._open_holds.get((member_id, book_id))
+            return self._row_to_hold(self._holds[hold_id]) if hold_id else None
+
+    def list_holds(self, book_id: Optional[int] = None, member_id: Optional[int] = None) -> List[Hold]:
+        with self._lock:
+            rows = [self._holds[i] for (m, b), i in self._open_holds.items()
+                    if (book_id is None or b == book_id) and (member_id is None or m == member_id)]
+            rows.sort(key=lambda h: (h[5] == HOLD_WAITING, h[3], h[4], h[0]))
+            return [self._row_to_hold(h) for h in rows]
+
+    def has_waiting_hold(self, book_id: int) -> bool:
+        with self._lock:
+            return bool(self._queues.get(book_id))
+
+    def fulfil_hold(self, hold_id: int) -> bool:
+        with self._lock:
+            h = self._holds.get(hold_id)
+            if h is None or h[5] != HOLD_READY:
+                return False
+            self._close_hold(h, HOLD_FULFILLED)
+            return True
+
+    def cancel_hold(self, hold_id: int, ready_until: datetime) -> Optional[Hold]:
+        with self._lock:
+            h = self._holds.get(hold_id)
+            if h is None or h[5] not in (HOLD_WAITING, HOLD_READY):
+                return None
+            was_ready = h[5] == HOLD_READY
+            self._close_hold(h, HOLD_CANCELLED)
+            return self._release_copy(h[1], h[7], COPY_ON_HOLD_SHELF, ready_until) if was_ready else None
+
+    def expire_holds(self, now: datetime, ready_until: datetime, limit: int = 100) -> List[Tuple[Hold, Optional[Hold]]]:
+        cutoff = to_epoch(now)
+        with self._lock:
+            due = [hold_id for expires, hold_id in self._shelf[:limit] if expires < cutoff]
+            result = []
+            for hold_id in due:
+                h = self._holds[hold_id]
+                self._close_hold(h, HOLD_EXPIRED)
+                result.append((self._row_to_hold(h), self._release_copy(h[1], h[7], COPY_ON_HOLD_SHELF, ready_until)))
+            return result
+
+    @staticmethod
+    def _row_to_hold(h: List[Any]) -> Hold:
+        return Hold(h[0], h[1], h[2], h[3], from_epoch(h[4]), h[5],
+                    from_epoch(h[6]) if h[6] is not None else None, h[7])
+
+    @staticmethod
+    def _row_to_loan(r: LoanRow) -> Loan:
+        id_, book_id, member_id, loaned_at, due_at, returned_at, renewals, copy_id = r
+        return Loan(id_, book_id, member_id, from_epoch(loaned_at), from_epoch(due_at),
+                    from_epoch(returned_at) if returned_at is not None else None, renewals, copy_id)
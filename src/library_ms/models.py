@@ -11,7 +11,8 @@ License: MIT License (see LICENSE file for details)
 =================================================================== 
 
 Description: 
-Dataclasses for domain entities: Book, Member, Loan.
+Dataclasses for domain entities: Book, Copy, Member, Loan, Hold (plus
+LoanRecord, a lazily decoded loan row for bulk listings).
 
 Usage: 
 from library_ms.models import Book, Member, Loan
@@ -25,7 +26,20 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional, Tuple
+
+# Raw loan row as stored: (id, book_id, member_id, loaned_at, due_at, returned_at,
+# renewals, copy_id) with timestamps in integer Unix epoch seconds.
+LoanRow = Tuple[int, int, int, int, int, Optional[int], int, Optional[int]]
+
+
+def to_epoch(dt: datetime) -> int:
+    """Naive datetimes are taken as local time, matching ``datetime.now()``."""
+    return int(dt.timestamp())
+
+
+def from_epoch(ts: int) -> datetime:
+    return datetime.fromtimestamp(ts)
 
 
 @dataclass(slots=True)
@@ -37,6 +51,31 @@ class Book:
     year: Optional[int] = None
     total_copies: int = 1
     available_copies: int = 1
+    version: int = 1  # bumped on every edit; see VersionConflictError
+
+
+# Physical item status. A book's total_copies counts every copy that is not
+# withdrawn and available_copies the ones on the open shelf.
+COPY_AVAILABLE = "available"
+COPY_ON_LOAN = "on_loan"
+COPY_ON_HOLD_SHELF = "on_hold_shelf"
+COPY_MISSING = "missing"
+COPY_WITHDRAWN = "withdrawn"
+COPY_STATUSES = (COPY_AVAILABLE, COPY_ON_LOAN, COPY_ON_HOLD_SHELF, COPY_MISSING, COPY_WITHDRAWN)
+
+
+@dataclass(slots=True)
+class Copy:
+    id: Optional[int]
+    book_id: int
+    barcode: str
+    status: str = COPY_AVAILABLE
+    location: Optional[str] = None
+
+
+def auto_barcode(book_id: int, n: int) -> str:
+    """Barcode given to the ``n``-th copy of a book when none is scanned in."""
+    return f"B{book_id:06d}-{n:03d}"
 
 
 @dataclass(slots=True)
@@ -45,6 +84,7 @@ class Member:
     name: str
     email: Optional[str] = None
     phone: Optional[str] = None
+    version: int = 1
 
 
 @dataclass(slots=True)
@@ -55,3 +95,74 @@ class Loan:
     loaned_at: datetime
     due_at: datetime
     returned_at: Optional[datetime] = None
+    renewals: int = 0
+    copy_id: Optional[int] = None  # the item lent; None for loans made before copies were tracked
+
+
+# Keyset cursor for member history pages: (returned_at, due_at, id) of the last row.
+HistoryCursor = Tuple[int, int, int]
+
+
+@dataclass(slots=True)
+class LoanPage:
+    loans: List[Loan]
+    cursor: Optional[HistoryCursor] = None  # pass back for the next page; None at the end
+
+
+# Hold lifecycle: waiting -> ready (copy on the hold shelf) -> fulfilled,
+# or cancelled/expired. Only waiting and ready holds are "open".
+HOLD_WAITING = "waiting"
+HOLD_READY = "ready"
+HOLD_FULFILLED = "fulfilled"
+HOLD_CANCELLED = "cancelled"
+HOLD_EXPIRED = "expired"
+
+
+@dataclass(slots=True)
+class Hold:
+    id: Optional[int]
+    book_id: int
+    member_id: int
+    priority: int
+    created_at: datetime
+    status: str = HOLD_WAITING
+    expires_at: Optional[datetime] = None  # pickup deadline once ready
+    copy_id: Optional[int] = None  # the item on the hold shelf once ready
+
+
+class LoanRecord:
+    """Loan row whose timestamps are only turned into datetimes when read.
+
+    Listing thousands of loans mostly touches ids and a column or two; this
+    keeps the integer epochs and decodes ``loaned_at``/``due_at``/``returned_at``
+    on access.
+    """
+
+    __slots__ = ("id", "book_id", "member_id", "loaned_ts", "due_ts", "returned_ts", "renewals", "copy_id")
+
+    def __init__(self, id: int, book_id: int, member_id: int, loaned_ts: int, due_ts: int,
+                 returned_ts: Optional[int] = None, renewals: int = 0, copy_id: Optional[int] = None) -> None:
+        self.id = id
+        self.book_id = book_id
+        self.member_id = member_id
+        self.loaned_ts = loaned_ts
+        self.due_ts = due_ts
+        self.returned_ts = returned_ts
+        self.renewals = renewals
+        self.copy_id = copy_id
+
+    @property
+    def loaned_at(self) -> datetime:
+        return from_epoch(self.loaned_ts)
+
+    @property
+    def due_at(self) -> datetime:
+        return from_epoch(self.due_ts)
+
+    @property
+    def returned_at(self) -> Optional[datetime]:
+        return from_epoch(self.returned_ts) if self.returned_ts is not None else None
+
+    def to_loan(self) -> Loan:
+        return Loan(self.id, self.book_id, self.member_id, self.loaned_at, self.due_at, self.returned_at,
+                    self.renewals, self.copy_id)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: outbox.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Consumer API for the change-data-capture outbox. Triggers installed by
+``db.migrate`` append one compact record per insert/update/delete on the
+replicated tables; sync jobs stream records after a sequence number, apply
+them elsewhere, acknowledge, and prune what every consumer has seen.
+
+Usage: 
+from library_ms.outbox import iter_changes, ack, prune
+for batch in iter_changes(since_seq=last_acked("central")):
+    push(batch); ack("central", batch[-1].seq)
+prune()
+
+Notes: 
+- Records carry ids and changed column names only; read current values
+  from the source tables when applying them.
+- Sequence numbers are monotonic and never reused (AUTOINCREMENT).
+
+===================================================================
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+from .db import get_connection
+
+DEFAULT_BATCH_SIZE = 500
+
+
+@dataclass(slots=True)
+class ChangeRecord:
+    seq: int
+    table: str
+    op: str  # 'I', 'U' or 'D'
+    row_id: int
+    changed: Optional[Tuple[str, ...]] = None  # UPDATEs only
+    created_at: Optional[str] = None
+
+
+def _row_to_change(r: tuple) -> ChangeRecord:
+    seq, table, op, row_id, changed, created_at = r
+    return ChangeRecord(seq, table, op, row_id, tuple(changed.split(",")) if changed else None, created_at)
+
+
+def iter_changes(
+    since_seq: int = 0,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    db_path: Optional[str] = None,
+) -> Iterator[List[ChangeRecord]]:
+    """Yield batches of changes with ``seq > since_seq`` in sequence order.
+
+    Each batch is read with its own short connection, so a slow consumer
+    never holds a read transaction open against the live database.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be >= 1")
+    last = since_seq
+    while True:
+        with get_connection(db_path) as conn:
+            rows = conn.execute(
+                """
+                SELECT seq, table_name, op, row_id, changed, created_at
+                FROM change_outbox WHERE seq > ? ORDER BY seq LIMIT ?
+                """,
+                (last, batch_size),
+            ).fetchall()
+        if not rows:
+            return
+        batch = [_row_to_change(r) for r in rows]
+        yield batch
+        last = batch[-1].seq
+        if len(rows) < batch_size:
+            return
+
+
+def ack(consumer: str, seq: int, db_path: Optional[str] = None) -> None:
+    """Record that ``consumer`` has applied every change up to ``seq``.
+
+    Acknowledgements never move backwards.
+    """
+    with get_connection(db_path) as conn:
+        conn.execute(
+            """
+            INSERT INTO outbox_consumers(name, acked_seq) VALUES(?, ?)
+            ON CONFLICT(name) DO UPDATE SET acked_seq = max(acked_seq, excluded.acked_seq)
+            """,
+            (consumer, seq),
+        )
+
+
+def last_acked(consumer: str, db_path: Optional[str] = None) -> int:
+    with get_connection(db_path) as conn:
+        row = conn.execute("SELECT acked_seq FROM outbox_consumers WHERE name=?", (consumer,)).fetchone()
+    return row[0] if row else 0
+
+
+def prune(db_path: Optional[str] = None, chunk_size: int = 5000) -> int:
+    """Delete changes acknowledged by every registered consumer.
+
+    Nothing is pruned until at least one consumer has acknowledged.
+
+    Returns:
+        Number of records deleted.
+    """
+    deleted = 0
+    with get_connection(db_path) as conn:
+        upto = conn.execute("SELECT min(acked_seq) FROM outbox_consumers").fetchone()[0]
+        if not upto:
+            return 0
+        while True:
+            cur = conn.execute(
+                "DELETE FROM change_outbox WHERE seq IN (SELECT seq FROM change_outbox WHERE seq <= ? ORDER BY seq LIMIT ?)",
+                (upto, chunk_size),
+            )
+            conn.commit()
+            deleted += cur.rowcount
+            if cur.rowcount < chunk_size:
+                return deleted
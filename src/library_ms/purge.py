@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: purge.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Purge job for soft-deleted books and members. Loans of each tombstoned row
+are moved out in small, separately committed chunks (returned loans go to
+``loan_history``, unreturned ones are dropped). A member's dropped loans and
+ready holds give their copies back to circulation in the same transaction,
+as a return would. The final DELETE then only cascades to the row's copies
+(books) and closed or waiting holds.
+
+Usage: 
+python -m library_ms.purge --days 30
+python -c "from library_ms.purge import purge_deleted; purge_deleted(30)"
+
+Notes: 
+- Deleting in the app only sets ``deleted_at``; nothing is lost until this runs.
+- Archived loans keep their book/member ids although those rows are gone.
+
+===================================================================
+"""
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from .db import get_connection
+from .models import COPY_ON_HOLD_SHELF, COPY_ON_LOAN, HOLD_CANCELLED, HOLD_READY
+from .queries import LOAN_COLUMNS
+from .repository import LibraryRepository
+from .services import HOLD_SHELF_DAYS
+
+DEFAULT_CHUNK_SIZE = 500
+
+# table -> loans column referencing it
+_TABLES = (("members", "member_id"), ("books", "book_id"))
+
+
+@dataclass(slots=True)
+class PurgeResult:
+    books: int = 0
+    members: int = 0
+    loans_archived: int = 0
+    loans_dropped: int = 0  # never returned
+    copies_released: int = 0  # from a purged member's dropped loans and ready holds
+
+
+def _drain_loans(conn: sqlite3.Connection, column: str, row_id: int, chunk_size: int,
+                 pause: float, result: PurgeResult, ready_until: datetime) -> None:
+    while True:
+        rows = conn.execute(
+            f"SELECT id, book_id, copy_id, returned_at FROM loans WHERE {column}=? LIMIT ?", (row_id, chunk_size)
+        ).fetchall()
+        if not rows:
+            return
+        ids: List[int] = [r[0] for r in rows]
+        if column == "member_id":  # a purged book's copies go with it
+            for _, book_id, copy_id, returned_at in rows:
+                if returned_at is None:
+                    LibraryRepository.release_copy(conn, book_id, copy_id, COPY_ON_LOAN, ready_until)
+                    result.copies_released += 1
+        marks = ", ".join("?" * len(ids))
+        archived = conn.execute(
+            f"INSERT OR REPLACE INTO loan_history({LOAN_COLUMNS}) "
+            f"SELECT {LOAN_COLUMNS} FROM loans WHERE id IN ({marks}) AND returned_at IS NOT NULL",
+            ids,
+        ).rowcount
+        conn.execute(f"DELETE FROM loans WHERE id IN ({marks})", ids)
+        conn.commit()
+        result.loans_archived += archived
+        result.loans_dropped += len(ids) - archived
+        if len(ids) < chunk_size:
+            return
+        if pause:
+            time.sleep(pause)
+
+
+def _release_holds(conn: sqlite3.Connection, member_id: int, result: PurgeResult, ready_until: datetime) -> None:
+    """Cancel a purged member's open holds; shelved copies move on to the next hold or the open shelf."""
+    rows = conn.execute(
+        "SELECT id, book_id, status, copy_id FROM holds WHERE member_id=? AND status IN ('waiting', 'ready')",
+        (member_id,),
+    ).fetchall()
+    for hold_id, book_id, status, copy_id in rows:
+        conn.execute("UPDATE holds SET status=?, expires_at=NULL WHERE id=?", (HOLD_CANCELLED, hold_id))
+        if status == HOLD_READY:
+            LibraryRepository.release_copy(conn, book_id, copy_id, COPY_ON_HOLD_SHELF, ready_until)
+            result.copies_released += 1
+    conn.commit()
+
+
+def purge_deleted(
+    older_than_days: int = 0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    db_path: Optional[str] = None,
+    pause: float = 0.0,
+) -> PurgeResult:
+    """Permanently remove books and members deleted more than ``older_than_days`` ago.
+
+    Args:
+        older_than_days: Grace period; younger tombstones are left alone.
+        chunk_size: Maximum loans moved per transaction.
+        db_path: Optional database path.
+        pause: Seconds to sleep between chunks.
+    """
+    if older_than_days < 0:
+        raise ValueError("older_than_days must be >= 0")
+    if not 1 <= chunk_size <= 900:
+        raise ValueError("chunk_size must be between 1 and 900")
+
+    cutoff = int(time.time()) - int(older_than_days) * 86400
+    result = PurgeResult()
+    ready_until = datetime.now() + timedelta(days=HOLD_SHELF_DAYS)
+    with get_connection(db_path) as conn:
+        for table, column in _TABLES:
+            ids = [
+                r[0]
+                for r in conn.execute(
+                    f"SELECT id FROM {table} WHERE deleted_at IS NOT NULL AND deleted_at <= ? ORDER BY deleted_at",
+                    (cutoff,),
+                )
+            ]
+            for row_id in ids:
+                _drain_loans(conn, column, row_id, chunk_size, pause, result, ready_until)
+                if table == "members":
+                    _release_holds(conn, row_id, result, ready_until)
+                # A desk may have lent to the row since it was read; the
+                # cascade then only has those few loans to remove.
+                n = conn.execute(f"DELETE FROM {table} WHERE id=? AND deleted_at IS NOT NULL", (row_id,)).rowcount
+                conn.commit()
+                setattr(result, table, getattr(result, table) + n)
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="library_ms.purge", description="Purge deleted books and members")
+    parser.add_argument("--db", default=None, help="database path (default: ./library.db)")
+    parser.add_argument("--days", type=int, default=0, help="only purge rows deleted more than N days ago")
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK_SIZE, help="loans per transaction")
+    parser.add_argument("--pause", type=float, default=0.0, help="pause between chunks (s)")
+    args = parser.parse_args(argv)
+    r = purge_deleted(args.days, chunk_size=args.chunk, db_path=args.db, pause=args.pause)
+    print(f"purged {r.books} books and {r.members} members; "
+          f"archived {r.loans_archived} loans, dropped {r.loans_dropped} unreturned loans, "
+          f"released {r.copies_released} copies")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: queries.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Query catalogue: every SQL statement LibraryRepository, the audit log and
+the circulation analytics issue, registered by name. Statements marked hot must be answered from an
+index; the plan checker runs EXPLAIN QUERY PLAN against a migrated schema
+and flags full table scans and temp B-tree sorts (tests/test_query_plans.py
+enforces it).
+
+Usage: 
+python -m library_ms.queries            # plan report for a fresh schema
+python -m library_ms.queries --db library.db --hot-only
+
+Notes: 
+- Add new repository SQL here, never inline; a test greps repository.py.
+- ``{set}`` in UPDATE statements is the column list filled in at runtime.
+
+===================================================================
+"""
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from itertools import combinations
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .db import EPOCH_NOW_SQL, get_connection, migrate
+
+BOOK_COLUMNS = "id, isbn, title, author, year, total_copies, available_copies, version"
+MEMBER_COLUMNS = "id, name, email, phone, version"
+LOAN_COLUMNS = "id, book_id, member_id, loaned_at, due_at, returned_at, renewals, copy_id"
+HOLD_COLUMNS = "id, book_id, member_id, priority, created_at, status, expires_at, copy_id"
+COPY_COLUMNS = "id, book_id, barcode, status, location"
+OPEN_HOLD = "status IN ('waiting', 'ready')"  # must match ux_holds_open's WHERE to use it
+
+# (sort, descending, filters used) -> windowed list statement; see _windows.
+WindowKey = Tuple[str, bool, Tuple[str, ...]]
+
+# Stand-in for the runtime column list when explaining UPDATE templates.
+_EXAMPLE_SET = "version=version"
+
+
+@dataclass(frozen=True, slots=True)
+class Query:
+    name: str
+    sql: str
+    hot: bool = False  # on a desk's interactive path: must not scan or sort
+
+    def example(self) -> str:
+        return self.sql.replace("{set}", _EXAMPLE_SET)
+
+
+CATALOGUE: Dict[str, Query] = {}
+
+
+def register(name: str, sql: str, hot: bool = False) -> str:
+    """Add a statement to the catalogue and return its (whitespace-normalised) SQL."""
+    if name in CATALOGUE:
+        raise ValueError(f"duplicate query name: {name}")
+    query = Query(name, " ".join(sql.split()), hot)
+    CATALOGUE[name] = query
+    return query.sql
+
+
+def _windows(name: str, table: str, columns: str, where: str, order: Dict[str, str],
+             filters: Dict[str, str], cold: Tuple[Tuple[str, str], ...] = ()) -> Dict[WindowKey, str]:
+    """One statement per sort key, direction and subset of ``filters``, each ending in LIMIT ? OFFSET ?.
+
+    Keyed by (sort, descending, names of the filters used, in ``filters`` order).
+    A (filter, sort) pair in ``cold`` is answered from the filter's index range
+    and sorted afterwards, so those statements are registered cold.
+    """
+    statements = {}
+    for sort, key in order.items():
+        for desc in (False, True):
+            direction = " DESC" if desc else ""
+            for used in _subsets(tuple(filters)):
+                statements[sort, desc, used] = register(
+                    f"{name}_by_{sort}{'_desc' if desc else ''}" + "".join(f"_{f}" for f in used),
+                    f"SELECT {columns} FROM {table} WHERE " + " AND ".join([where, *(filters[f] for f in used)])
+                    + f" ORDER BY {key}{direction}, id{direction} LIMIT ? OFFSET ?",
+                    hot=not any((f, sort) in cold for f in used),
+                )
+    return statements
+
+
+def _subsets(names: Tuple[str, ...]) -> Iterator[Tuple[str, ...]]:
+    for n in range(len(names) + 1):
+        yield from combinations(names, n)
+
+
+# --- Books / members ---
+UPDATE_ROW = {
+    (table, versioned): register(
+        f"update_{entity}{'_versioned' if versioned else ''}",
+        f"UPDATE {table} SET {{set}}, updated_at=datetime('now') WHERE id=? AND deleted_at IS NULL"
+        + (" AND version=?" if versioned else ""),
+        hot=True,
+    )
+    for table, entity in (("books", "book"), ("members", "member"))
+    for versioned in (False, True)
+}
+CURRENT_VERSION = {
+    table: register(f"current_version_{entity}", f"SELECT version FROM {table} WHERE id=? AND deleted_at IS NULL", hot=True)
+    for table, entity in (("books", "book"), ("members", "member"))
+}
+
+INSERT_BOOK = register(
+    "insert_book",
+    "INSERT INTO books(isbn, title, author, year, total_copies, available_copies) VALUES (?, ?, ?, ?, ?, ?)",
+    hot=True,
+)
+DELETE_BOOK = register(
+    "delete_book", f"UPDATE books SET deleted_at={EPOCH_NOW_SQL} WHERE id=? AND deleted_at IS NULL", hot=True
+)
+GET_BOOK = register("get_book", f"SELECT {BOOK_COLUMNS} FROM books WHERE id=? AND deleted_at IS NULL", hot=True)
+# Sortable, filterable list windows. Only these keys and filters reach the
+# SQL; each sort key is backed by an index over the live rows (see db.py).
+BOOK_ORDER = {
+    "title": "title COLLATE NOCASE",
+    "author": "author COLLATE NOCASE",
+    "year": "year",
+    "isbn": "isbn",
+    "available": "available_copies",
+}
+BOOK_FILTERS = {
+    "search": "(title LIKE ? OR author LIKE ? OR isbn LIKE ?)",
+    "in_stock": "available_copies > 0",
+    "years": "year BETWEEN ? AND ?",
+}
+BOOK_WINDOWS = _windows(
+    "list_books", "books", BOOK_COLUMNS, "deleted_at IS NULL", BOOK_ORDER, BOOK_FILTERS,
+    # A year range sorted by something else: idx_books_live_year's range is
+    # smaller than walking another index, and it is sorted afterwards.
+    cold=tuple(("years", sort) for sort in BOOK_ORDER if sort != "year"),
+)
+
+INSERT_MEMBER = register("insert_member", "INSERT INTO members(name, email, phone) VALUES(?, ?, ?)", hot=True)
+DELETE_MEMBER = register(
+    "delete_member", f"UPDATE members SET deleted_at={EPOCH_NOW_SQL} WHERE id=? AND deleted_at IS NULL", hot=True
+)
+GET_MEMBER = register(
+    "get_member", f"SELECT {MEMBER_COLUMNS} FROM members WHERE id=? AND deleted_at IS NULL", hot=True
+)
+MEMBER_ORDER = {"name": "name COLLATE NOCASE", "email": "email"}
+MEMBER_FILTERS = {"search": "(name LIKE ? OR email LIKE ? OR phone LIKE ?)"}
+MEMBER_WINDOWS = _windows("list_members", "members", MEMBER_COLUMNS, "deleted_at IS NULL", MEMBER_ORDER, MEMBER_FILTERS)
+
+# --- Loans ---
+INSERT_LOAN = register(
+    "insert_loan", "INSERT INTO loans(book_id, member_id, due_at, copy_id) VALUES(?, ?, ?, ?)", hot=True
+)
+MARK_RETURNED = register(
+    "mark_returned", f"UPDATE loans SET returned_at={EPOCH_NOW_SQL} WHERE id=? AND returned_at IS NULL", hot=True
+)
+GET_ACTIVE_LOAN = register(
+    "get_active_loan",
+    f"SELECT {LOAN_COLUMNS} FROM loans WHERE id=? AND returned_at IS NULL",
+    hot=True,
+)
+GET_LOAN = register("get_loan", f"SELECT {LOAN_COLUMNS} FROM loans WHERE id=?", hot=True)
+RENEW_LOAN = register(
+    "renew_loan",
+    "UPDATE loans SET due_at=?, renewals=renewals+1 WHERE id=? AND returned_at IS NULL AND renewals=?",
+    hot=True,
+)
+# A renewed loan is reminded again about its new due date (reminders.py).
+CLEAR_LOAN_REMINDERS = register("clear_loan_reminders", "DELETE FROM reminder_log WHERE loan_id=?", hot=True)
+LIST_ACTIVE_LOANS = register(
+    "list_active_loans",
+    f"SELECT {LOAN_COLUMNS} FROM loans WHERE returned_at IS NULL ORDER BY loaned_at DESC, id DESC",
+    hot=True,
+)
+# Active loans for the Loans tab (idx_loans_active, idx_loans_due).
+ACTIVE_LOAN_ORDER = {"loaned": "loaned_at", "due": "due_at"}
+ACTIVE_LOAN_FILTERS = {"overdue": "due_at < ?"}
+ACTIVE_LOAN_WINDOWS = _windows(
+    "list_active_loans", "loans", LOAN_COLUMNS, "returned_at IS NULL", ACTIVE_LOAN_ORDER, ACTIVE_LOAN_FILTERS
+)
+# Full listings are reports over every loan; a scan is expected.
+LIST_LOANS = register("list_loans", f"SELECT {LOAN_COLUMNS} FROM loans ORDER BY loaned_at DESC, id DESC")
+LIST_LOANS_WITH_HISTORY = register(
+    "list_loans_with_history",
+    f"""
+    SELECT {LOAN_COLUMNS} FROM loans UNION ALL SELECT {LOAN_COLUMNS} FROM loan_history
+    ORDER BY loaned_at DESC, id DESC
+    """,
+)
+LIST_OVERDUE = register(
+    "list_overdue",
+    f"SELECT {LOAN_COLUMNS} FROM loans WHERE returned_at IS NULL AND due_at < ? ORDER BY due_at, id",
+    hot=True,
+)
+
+MEMBER_LOAN_STATS = register(
+    "member_loan_stats",
+    """
+    SELECT count(*), count(CASE WHEN due_at < ? THEN 1 END)
+    FROM loans WHERE member_id=? AND returned_at IS NULL
+    """,
+    hot=True,
+)
+MEMBER_OPEN_LOANS = register(
+    "member_open_loans",
+    f"""
+    SELECT {LOAN_COLUMNS} FROM loans
+    WHERE member_id=? AND returned_at IS NULL ORDER BY due_at, id
+    """,
+    hot=True,
+)
+MEMBER_HISTORY = {
+    (table, paged): register(
+        f"member_history_{table}{'_after' if paged else ''}",
+        f"SELECT {LOAN_COLUMNS} FROM {table} WHERE member_id=? AND returned_at IS NOT NULL"
+        + (" AND (returned_at, due_at, id) < (?, ?, ?)" if paged else "")
+        + " ORDER BY returned_at DESC, due_at DESC, id DESC LIMIT ?",
+        hot=True,
+    )
+    for table in ("loans", "loan_history")
+    for paged in (False, True)
+}
+
+# --- Holds ---
+NEXT_HOLD = register(
+    "next_hold",
+    f"""
+    SELECT {HOLD_COLUMNS} FROM holds h
+    WHERE h.book_id = ? AND h.status = 'waiting'
+      AND EXISTS (SELECT 1 FROM members m WHERE m.id = h.member_id AND m.deleted_at IS NULL)
+    ORDER BY h.priority, h.created_at, h.id
+    LIMIT 1
+    """,
+    hot=True,
+)
+SET_HOLD_READY = register(
+    "set_hold_ready", "UPDATE holds SET status='ready', expires_at=?, copy_id=? WHERE id=?", hot=True
+)
+INSERT_HOLD = register("insert_hold", "INSERT INTO holds(book_id, member_id, priority) VALUES(?, ?, ?)", hot=True)
+GET_HOLD = register("get_hold", f"SELECT {HOLD_COLUMNS} FROM holds WHERE id=?", hot=True)
+FIND_OPEN_HOLD = register(
+    "find_open_hold", f"SELECT {HOLD_COLUMNS} FROM holds WHERE member_id=? AND book_id=? AND {OPEN_HOLD}", hot=True
+)
+# Queue listings: ready holds first, then queue order. Bounded by one book or
+# member, so the sort is cheap; not hot.
+LIST_HOLDS = {
+    (by_book, by_member): register(
+        "list_holds" + ("_by_book" if by_book else "") + ("_by_member" if by_member else ""),
+        f"SELECT {HOLD_COLUMNS} FROM holds WHERE {OPEN_HOLD}"
+        + (" AND book_id=?" if by_book else "")
+        + (" AND member_id=?" if by_member else "")
+        + " ORDER BY status='waiting', priority, created_at, id",
+    )
+    for by_book in (False, True)
+    for by_member in (False, True)
+}
+HAS_WAITING_HOLD = register(
+    "has_waiting_hold", "SELECT EXISTS (SELECT 1 FROM holds WHERE book_id=? AND status='waiting')", hot=True
+)
+CLOSE_HOLD = register("close_hold", "UPDATE holds SET status=?, expires_at=NULL WHERE id=?", hot=True)
+FULFIL_HOLD = register("fulfil_hold", "UPDATE holds SET status=?, expires_at=NULL WHERE id=? AND status=?", hot=True)
+GET_OPEN_HOLD_STATE = register(
+    "get_open_hold_state", f"SELECT book_id, status, copy_id FROM holds WHERE id=? AND {OPEN_HOLD}", hot=True
+)
+EXPIRED_HOLDS = register(
+    "expired_holds",
+    f"SELECT {HOLD_COLUMNS} FROM holds WHERE status='ready' AND expires_at < ? ORDER BY expires_at LIMIT ?",
+    hot=True,
+)
+
+
+# --- Copies ---
+INSERT_COPY = register(
+    "insert_copy", "INSERT INTO copies(book_id, barcode, status, location) VALUES(?, ?, ?, ?)", hot=True
+)
+GET_COPY = register("get_copy", f"SELECT {COPY_COLUMNS} FROM copies WHERE id=?", hot=True)
+GET_COPY_BY_BARCODE = register(
+    "get_copy_by_barcode", f"SELECT {COPY_COLUMNS} FROM copies WHERE barcode=?", hot=True
+)
+# One book's items; a handful of rows, so the sort is cheap.
+LIST_COPIES = register("list_copies", f"SELECT {COPY_COLUMNS} FROM copies WHERE book_id=? ORDER BY id")
+COUNT_COPIES = register("count_copies", "SELECT count(*) FROM copies WHERE book_id=?", hot=True)
+FIND_AVAILABLE_COPY = register(
+    "find_available_copy",
+    f"SELECT {COPY_COLUMNS} FROM copies WHERE book_id=? AND status='available' ORDER BY id LIMIT 1",
+    hot=True,
+)
+SET_COPY_STATUS = register("set_copy_status", "UPDATE copies SET status=? WHERE id=? AND status=?", hot=True)
+# Keeps books' cached counters in step with copy status changes.
+ADJUST_COPY_COUNTS = register(
+    "adjust_copy_counts",
+    "UPDATE books SET total_copies = total_copies + ?, available_copies = available_copies + ? WHERE id=?",
+    hot=True,
+)
+ACTIVE_LOAN_BY_BARCODE = register(
+    "active_loan_by_barcode",
+    f"""
+    SELECT {", ".join("l." + c for c in LOAN_COLUMNS.split(", "))}
+    FROM copies c JOIN loans l ON l.copy_id = c.id AND l.returned_at IS NULL
+    WHERE c.barcode=?
+    """,
+    hot=True,
+)
+
+
+# --- Audit log (audit.py) ---
+AUDIT_COLUMNS = "id, at, actor, action, entity, entity_id, changes"
+INSERT_AUDIT = register(
+    "insert_audit",
+    "INSERT INTO audit_log(at, actor, action, entity, entity_id, changes) VALUES(?, ?, ?, ?, ?, ?)",
+    hot=True,
+)
+AUDIT_FOR_ENTITY = register(
+    "audit_for_entity",
+    f"SELECT {AUDIT_COLUMNS} FROM audit_log WHERE entity=? AND entity_id=? ORDER BY id DESC LIMIT ?",
+    hot=True,
+)
+
+
+# --- Circulation analytics (analytics.py) ---
+# Daily series for the local days first_day..last_day; ``s`` and ``e`` are
+# the epochs of first_day's midnight and of the midnight after last_day.
+# Every branch is an index range on one timestamp, so the cost follows the
+# period asked for, not the size of the loan tables. A loan counts as
+# overdue from its due date until it is returned; outstanding and overdue
+# start from the counts at ``s`` (``base``) and are carried forward with
+# running sums. Cold: a report whose GROUP BYs sort one row per day.
+_DAY = "date({}, 'unixepoch', 'localtime')"
+_SERIES_EVENTS = " UNION ALL ".join(
+    part
+    for table in ("loans", "loan_history")
+    for part in (
+        f"SELECT {_DAY.format('loaned_at')}, count(*), 0, 0, 0 FROM bounds, {table} "
+        "WHERE loaned_at >= s AND loaned_at < e GROUP BY 1",
+        f"SELECT {_DAY.format('returned_at')}, 0, count(*), 0, count(CASE WHEN returned_at > due_at THEN 1 END) "
+        f"FROM bounds, {table} WHERE returned_at >= s AND returned_at < e GROUP BY 1",
+        # Returned late: due in the period, so returned after s.
+        f"SELECT {_DAY.format('due_at')}, 0, 0, count(*), 0 FROM bounds, {table} "
+        "WHERE returned_at >= s AND returned_at > due_at AND due_at >= s AND due_at < e GROUP BY 1",
+    )
+) + (
+    f" UNION ALL SELECT {_DAY.format('due_at')}, 0, 0, count(*), 0 FROM bounds, loans "
+    "WHERE returned_at IS NULL AND due_at >= s AND due_at < e GROUP BY 1"
+)
+
+
+def _open_at_s(column: str) -> str:
+    """Loans with ``column`` before s that were still out at s."""
+    return " + ".join(
+        f"(SELECT count(*) FROM bounds, {table} WHERE {where} AND {column} < s)"
+        for table, where in (("loans", "returned_at IS NULL"), ("loans", "returned_at >= s"),
+                             ("loan_history", "returned_at >= s"))
+    )
+
+
+CIRCULATION_SERIES = register(
+    "circulation_series",
+    f"""
+    WITH RECURSIVE
+    bounds(s, e, first_day, last_day) AS (SELECT ?, ?, ?, ?),
+    days(day) AS (
+        SELECT first_day FROM bounds
+        UNION ALL SELECT date(day, '+1 day') FROM days, bounds WHERE day < last_day
+    ),
+    base(outstanding, overdue) AS (
+        SELECT {_open_at_s("loaned_at")}, {_open_at_s("due_at")}
+    ),
+    events(day, loans, returns, late, cleared) AS ({_SERIES_EVENTS}),
+    daily(day, loans, returns, late, cleared) AS (
+        SELECT day, sum(loans), sum(returns), sum(late), sum(cleared)
+        FROM (SELECT day, 0 AS loans, 0 AS returns, 0 AS late, 0 AS cleared FROM days
+              UNION ALL SELECT * FROM events)
+        GROUP BY day
+    )
+    SELECT d.day, d.loans, d.returns, d.late, d.cleared,
+           avg(d.loans) OVER (ORDER BY d.day ROWS 6 PRECEDING),
+           avg(d.loans) OVER (ORDER BY d.day ROWS 29 PRECEDING),
+           b.outstanding + sum(d.loans - d.returns) OVER running,
+           b.overdue + sum(d.late - d.cleared) OVER running
+    FROM daily d, base b
+    WINDOW running AS (ORDER BY d.day ROWS UNBOUNDED PRECEDING)
+    ORDER BY d.day
+    """,
+)
+
+
+# --- Plan checking ---
+def explain(conn: sqlite3.Connection, query: Query) -> List[str]:
+    """EXPLAIN QUERY PLAN detail lines, with NULL bound to every parameter."""
+    sql = query.example()
+    return [r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + sql, (None,) * sql.count("?"))]
+
+
+def plan_problems(plan: List[str]) -> List[str]:
+    """Plan steps that read a whole table or sort in a temp B-tree."""
+    problems = []
+    for step in plan:
+        if step.startswith("SCAN ") and " USING " not in step and step != "SCAN CONSTANT ROW":
+            problems.append(step)  # full table scan (index scans say "USING [COVERING] INDEX")
+        elif "USE TEMP B-TREE" in step:
+            problems.append(step)
+    return problems
+
+
+def plan_report(db_path: Optional[str] = None, hot_only: bool = False) -> str:
+    """Plan of every catalogued statement; uses a freshly migrated schema unless ``db_path`` is given."""
+    with tempfile.TemporaryDirectory(prefix="library-plans-") as tmp:
+        path = db_path or str(Path(tmp) / "plans.db")
+        if db_path is None:
+            migrate(path)
+        lines = []
+        with get_connection(path) as conn:
+            for query in CATALOGUE.values():
+                if hot_only and not query.hot:
+                    continue
+                plan = explain(conn, query)
+                problems = plan_problems(plan)
+                flag = ("FAIL" if problems else "ok") if query.hot else "cold"
+                lines.append(f"[{flag:>4}] {query.name}")
+                lines += [f"         {step}" for step in plan] or ["         (no table access)"]
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="library_ms.queries", description="Query plan report")
+    parser.add_argument("--db", default=None, help="explain against this database (default: fresh schema)")
+    parser.add_argument("--hot-only", action="store_true", help="only statements marked hot")
+    args = parser.parse_args(argv)
+    print(plan_report(args.db, args.hot_only))
+
+
+if __name__ == "__main__":
+    main()
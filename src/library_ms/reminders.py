@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: reminders.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Due-soon and overdue reminder scheduler. Each run range-scans only the
+loans whose due date falls in the reminder window (partial index on
+due_at), groups them per member, hands notifications to a pluggable sink
+in batches and records what was sent so re-runs are idempotent.
+
+Usage: 
+python -m library_ms.reminders --spool mail_spool
+python -m library_ms.reminders --file reminders.txt --interval 3600
+
+Notes: 
+- A loan gets at most one "due_soon" and one "overdue" notice.
+- Overdue scans resume from the previous run's watermark.
+
+===================================================================
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from itertools import groupby
+from pathlib import Path
+from typing import List, Optional, Protocol, Sequence
+
+from .db import get_connection
+from .models import from_epoch, to_epoch
+
+DUE_SOON = "due_soon"
+OVERDUE = "overdue"
+DEFAULT_LEAD_DAYS = 2
+DEFAULT_BATCH_SIZE = 100
+SENDER = "library@localhost"
+
+
+@dataclass(slots=True)
+class ReminderItem:
+    loan_id: int
+    book_title: str
+    due_at: datetime
+
+
+@dataclass(slots=True)
+class Notification:
+    kind: str
+    member_id: int
+    member_name: str
+    email: Optional[str]
+    items: List[ReminderItem] = field(default_factory=list)
+
+    @property
+    def subject(self) -> str:
+        n = len(self.items)
+        if self.kind == OVERDUE:
+            return f"{n} overdue item{'s' if n != 1 else ''}"
+        return f"{n} item{'s' if n != 1 else ''} due soon"
+
+    def render(self) -> str:
+        intro = "The following items are overdue:" if self.kind == OVERDUE else "The following items are due soon:"
+        lines = [f"Dear {self.member_name},", "", intro]
+        lines += [f"  - {i.book_title} (due {i.due_at:%Y-%m-%d})" for i in self.items]
+        lines += ["", "Thank you."]
+        return "\n".join(lines)
+
+
+class NotificationSink(Protocol):
+    def send(self, batch: Sequence[Notification]) -> None:
+        """Deliver a batch; raise to leave it unrecorded for the next run."""
+
+
+class FileSink:
+    """Append rendered notifications to a single text file."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+
+    def send(self, batch: Sequence[Notification]) -> None:
+        with self.path.open("a", encoding="utf-8") as fh:
+            for n in batch:
+                fh.write(f"To: {n.email or '-'} (member {n.member_id})\nSubject: {n.subject}\n\n{n.render()}\n\n")
+
+
+class MailSpoolSink:
+    """Write one RFC 5322 message per notification into a spool directory."""
+
+    def __init__(self, directory: str | Path, sender: str = SENDER) -> None:
+        self.directory = Path(directory)
+        self.sender = sender
+
+    def send(self, batch: Sequence[Notification]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d%H%M%S%f")
+        for n in batch:
+            if not n.email:
+                continue  # nobody to mail; still recorded as handled
+            msg = EmailMessage()
+            msg["From"] = self.sender
+            msg["To"] = n.email
+            msg["Subject"] = n.subject
+            msg["X-Library-Member"] = str(n.member_id)
+            msg.set_content(n.render())
+            tmp = self.directory / f".{stamp}-{n.kind}-{n.member_id}.tmp"
+            tmp.write_bytes(bytes(msg))
+            tmp.rename(tmp.with_name(tmp.name[1:-4] + ".eml"))
+
+
+@dataclass(slots=True)
+class ReminderRun:
+    due_soon: int = 0  # loans notified
+    overdue: int = 0
+    notifications: int = 0
+    batches: int = 0
+
+
+_SELECT = """
+    SELECT l.member_id, m.name, m.email, l.id, b.title, l.due_at
+    FROM loans l
+    JOIN members m ON m.id = l.member_id
+    JOIN books b ON b.id = l.book_id
+    WHERE l.returned_at IS NULL AND l.due_at >= ? AND l.due_at < ? AND m.deleted_at IS NULL
+      AND NOT EXISTS (SELECT 1 FROM reminder_log r WHERE r.loan_id = l.id AND r.kind = ?)
+    ORDER BY l.member_id, l.due_at
+"""
+
+
+class ReminderScheduler:
+    """Find loans needing a reminder and push them through ``sink``."""
+
+    def __init__(
+        self,
+        sink: NotificationSink,
+        db_path: Optional[str] = None,
+        lead_days: int = DEFAULT_LEAD_DAYS,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1")
+        self.sink = sink
+        self.db_path = db_path
+        self.lead = timedelta(days=lead_days)
+        self.batch_size = batch_size
+
+    def _collect(self, kind: str, start: int, end: int) -> List[Notification]:
+        with get_connection(self.db_path) as conn:
+            rows = conn.execute(_SELECT, (start, end, kind)).fetchall()
+        notes = []
+        for (member_id, name, email), group in groupby(rows, key=lambda r: r[:3]):
+            items = [ReminderItem(loan_id, title, from_epoch(due)) for *_, loan_id, title, due in group]
+            notes.append(Notification(kind, member_id, name, email, items))
+        return notes
+
+    def _deliver(self, notes: List[Notification], now: int, run: ReminderRun) -> None:
+        for i in range(0, len(notes), self.batch_size):
+            batch = notes[i:i + self.batch_size]
+            self.sink.send(batch)
+            with get_connection(self.db_path) as conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO reminder_log(loan_id, kind, sent_at) VALUES(?, ?, ?)",
+                    [(item.loan_id, n.kind, now) for n in batch for item in n.items],
+                )
+            run.batches += 1
+            run.notifications += len(batch)
+
+    def _watermark(self, kind: str) -> int:
+        with get_connection(self.db_path) as conn:
+            row = conn.execute("SELECT upto FROM reminder_watermarks WHERE kind=?", (kind,)).fetchone()
+        return row[0] if row else 0
+
+    def run_once(self, now: Optional[datetime] = None) -> ReminderRun:
+        now = now or datetime.now()
+        ts = to_epoch(now)
+        run = ReminderRun()
+
+        soon = self._collect(DUE_SOON, ts, to_epoch(now + self.lead))
+        self._deliver(soon, ts, run)
+        run.due_soon = sum(len(n.items) for n in soon)
+
+        overdue = self._collect(OVERDUE, self._watermark(OVERDUE), ts)
+        self._deliver(overdue, ts, run)
+        run.overdue = sum(len(n.items) for n in overdue)
+        with get_connection(self.db_path) as conn:
+            conn.execute(
+                """
+                INSERT INTO reminder_watermarks(kind, upto) VALUES(?, ?)
+                ON CONFLICT(kind) DO UPDATE SET upto = max(upto, excluded.upto)
+                """,
+                (OVERDUE, ts),
+            )
+        return run
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="library_ms.reminders", description="Send due-date reminders")
+    parser.add_argument("--db", default=None, help="database path (default: ./library.db)")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--file", help="append notifications to this text file")
+    target.add_argument("--spool", help="write .eml files into this directory")
+    parser.add_argument("--lead-days", type=int, default=DEFAULT_LEAD_DAYS)
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--interval", type=float, default=0, help="repeat every N seconds (0 = once)")
+    args = parser.parse_args(argv)
+
+    sink: NotificationSink = FileSink(args.file) if args.file else MailSpoolSink(args.spool)
+    scheduler = ReminderScheduler(sink, db_path=args.db, lead_days=args.lead_days, batch_size=args.batch)
+    while True:
+        r = scheduler.run_once()
+        print(f"due soon: {r.due_soon} loans, overdue: {r.overdue} loans, "
+              f"{r.notifications} notifications in {r.batches} batches", flush=True)
+        if args.interval <= 0:
+            return
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: report.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Annual circulation report: loans by month, by author, by member cohort (year
+joined) and turnover per title. ``loans`` and ``loan_history`` are split into
+id ranges; each range is counted by a ProcessPoolExecutor worker on its own
+read-only connection and the partial counts are merged in the parent.
+
+Usage: 
+python -m library_ms.report 2025 --out reports/2025
+python -m library_ms.report 2025 --db library.db --workers 8 --format json
+
+Notes: 
+- Shards read the primary-key range only, so no extra index is needed.
+- Run it outside archiving: a loan moved mid-report may be counted twice.
+
+===================================================================
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .db import PROFILES, get_db_path
+from .models import to_epoch
+
+LOAN_TABLES = ("loans", "loan_history")
+SHARDS_PER_WORKER = 4
+UNKNOWN = "(purged)"  # book or member removed by purge.py
+FORMATS = ("csv", "json")
+
+# (table, first id, last id), inclusive
+Shard = Tuple[str, int, int]
+
+
+@dataclass(slots=True)
+class ShardCounts:
+    """Partial aggregate of one shard; ``merge`` is associative."""
+
+    loans: int = 0
+    months: List[int] = field(default_factory=lambda: [0] * 12)
+    books: Counter = field(default_factory=Counter)
+    members: Counter = field(default_factory=Counter)
+
+    def merge(self, other: "ShardCounts") -> "ShardCounts":
+        self.loans += other.loans
+        self.months = [a + b for a, b in zip(self.months, other.months)]
+        self.books.update(other.books)
+        self.members.update(other.members)
+        return self
+
+
+@dataclass(slots=True)
+class TitleTurnover:
+    book_id: int
+    title: str
+    author: str
+    copies: int
+    loans: int
+    turnover: float  # loans per copy in the year
+
+
+@dataclass(slots=True)
+class CohortRow:
+    cohort: str  # year the member joined
+    borrowers: int
+    loans: int
+
+
+@dataclass(slots=True)
+class AnnualReport:
+    year: int
+    loans: int
+    by_month: List[int]  # January first
+    by_author: List[Tuple[str, int]]  # most loans first
+    by_cohort: List[CohortRow]
+    turnover: List[TitleTurnover]  # highest turnover first
+
+
+def _connect_readonly(db_path: Optional[str]) -> sqlite3.Connection:
+    conn = sqlite3.connect(get_db_path(db_path).as_uri() + "?mode=ro", uri=True)
+    for pragma in PROFILES["reporting"].pragmas():
+        conn.execute(pragma)
+    return conn
+
+
+def shard_ranges(db_path: Optional[str] = None, shards: int = 8) -> List[Shard]:
+    """Split every loan table into at most ``shards`` id ranges of equal width."""
+    if shards < 1:
+        raise ValueError("shards must be >= 1")
+    result: List[Shard] = []
+    conn = _connect_readonly(db_path)
+    try:
+        for table in LOAN_TABLES:
+            lo, hi = conn.execute(f"SELECT min(id), max(id) FROM {table}").fetchone()
+            if lo is None:
+                continue
+            step = max(1, -(-(hi - lo + 1) // shards))  # ceil
+            result += [(table, start, min(hi, start + step - 1)) for start in range(lo, hi + 1, step)]
+    finally:
+        conn.close()
+    return result
+
+
+def count_shard(db_path: Optional[str], shard: Shard, month_starts: Sequence[int]) -> ShardCounts:
+    """Count one id range's loans made between ``month_starts[0]`` and ``month_starts[12]``.
+
+    Runs in a worker process, so it opens its own connection.
+    """
+    table, lo, hi = shard
+    counts = ShardCounts()
+    books, members, months = counts.books, counts.members, counts.months
+    conn = _connect_readonly(db_path)
+    try:
+        # One pass over the id range; faster here than three GROUP BY queries.
+        rows = conn.execute(
+            f"SELECT book_id, member_id, loaned_at FROM {table} WHERE id BETWEEN ? AND ? "
+            "AND loaned_at >= ? AND loaned_at < ?",
+            (lo, hi, month_starts[0], month_starts[-1]),
+        )
+        for book_id, member_id, loaned_at in rows:
+            books[book_id] += 1
+            members[member_id] += 1
+            months[bisect_right(month_starts, loaned_at) - 1] += 1
+    finally:
+        conn.close()
+    counts.loans = sum(months)
+    return counts
+
+
+def _month_starts(year: int) -> List[int]:
+    return [to_epoch(datetime(year + m // 12, m % 12 + 1, 1)) for m in range(13)]
+
+
+def _finish(year: int, totals: ShardCounts, db_path: Optional[str]) -> AnnualReport:
+    conn = _connect_readonly(db_path)
+    try:
+        # Tombstoned rows included: their loans still count.
+        books = {r[0]: r[1:] for r in conn.execute("SELECT id, title, author, total_copies FROM books")}
+        cohorts = dict(conn.execute("SELECT id, substr(created_at, 1, 4) FROM members"))
+    finally:
+        conn.close()
+
+    authors: Counter = Counter()
+    turnover = []
+    for book_id, n in totals.books.items():
+        title, author, copies = books.get(book_id, (UNKNOWN, UNKNOWN, 0))
+        authors[author] += n
+        turnover.append(TitleTurnover(book_id, title, author, copies, n, n / copies if copies else float(n)))
+    turnover.sort(key=lambda t: (-t.turnover, -t.loans, t.title, t.book_id))
+
+    by_cohort: Dict[str, CohortRow] = {}
+    for member_id, n in totals.members.items():
+        cohort = cohorts.get(member_id, UNKNOWN)
+        row = by_cohort.setdefault(cohort, CohortRow(cohort, 0, 0))
+        row.borrowers += 1
+        row.loans += n
+
+    return AnnualReport(
+        year=year,
+        loans=totals.loans,
+        by_month=totals.months,
+        by_author=sorted(authors.items(), key=lambda kv: (-kv[1], kv[0])),
+        by_cohort=sorted(by_cohort.values(), key=lambda c: c.cohort),
+        turnover=turnover,
+    )
+
+
+def build_annual_report(year: int, db_path: Optional[str] = None, workers: Optional[int] = None,
+                        shards: Optional[int] = None) -> AnnualReport:
+    """Aggregate all loans made in ``year`` (local time), archived ones included.
+
+    Args:
+        workers: Worker processes (default: CPU count); 1 counts in-process.
+        shards: Id ranges per loan table (default: ``SHARDS_PER_WORKER`` per
+            worker, so a slow range doesn't idle the other cores).
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be >= 1")
+    if not get_db_path(db_path).exists():
+        raise ValueError(f"database not found: {get_db_path(db_path)}")
+    ranges = shard_ranges(db_path, shards or workers * SHARDS_PER_WORKER)
+    starts = _month_starts(year)
+
+    totals = ShardCounts()
+    if workers == 1 or len(ranges) <= 1:
+        for shard in ranges:
+            totals.merge(count_shard(db_path, shard, starts))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+            n = len(ranges)
+            for part in pool.map(count_shard, [db_path] * n, ranges, [starts] * n):
+                totals.merge(part)
+    return _finish(year, totals, db_path)
+
+
+def write_report(report: AnnualReport, out_dir: str | Path, formats: Sequence[str] = FORMATS) -> List[Path]:
+    """Write ``report`` as CSV tables and/or one JSON document; returns the files written."""
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        raise ValueError(f"unknown format: {', '.join(sorted(unknown))}")
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    written: List[Path] = []
+    if "csv" in formats:
+        tables = {
+            "months": (("month", "loans"), [(m + 1, n) for m, n in enumerate(report.by_month)]),
+            "authors": (("author", "loans"), report.by_author),
+            "cohorts": (("cohort", "borrowers", "loans"),
+                        [(c.cohort, c.borrowers, c.loans) for c in report.by_cohort]),
+            "turnover": (("book_id", "title", "author", "copies", "loans", "turnover"),
+                         [(t.book_id, t.title, t.author, t.copies, t.loans, f"{t.turnover:.2f}")
+                          for t in report.turnover]),
+        }
+        for name, (header, rows) in tables.items():
+            path = out / f"{report.year}-{name}.csv"
+            with path.open("w", newline="", encoding="utf-8") as fh:
+                writer = csv.writer(fh)
+                writer.writerow(header)
+                writer.writerows(rows)
+            written.append(path)
+    if "json" in formats:
+        path = out / f"{report.year}-report.json"
+        path.write_text(json.dumps(asdict(report), indent=2, ensure_ascii=False), encoding="utf-8")
+        written.append(path)
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="library_ms.report", description="Annual circulation report")
+    parser.add_argument("year", type=int)
+    parser.add_argument("--db", default=None, help="database path (default: ./library.db)")
+    parser.add_argument("--out", default="reports", help="output directory")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--shards", type=int, default=None, help="id ranges per loan table")
+    parser.add_argument("--format", action="append", choices=FORMATS, dest="formats",
+                        help="output format (repeatable; default: both)")
+    args = parser.parse_args(argv)
+    report = build_annual_report(args.year, args.db, args.workers, args.shards)
+    for path in write_report(report, args.out, args.formats or FORMATS):
+        print(path)
+    print(f"{report.loans} loans in {args.year}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,163 +11,704 @@ License: MIT License (see LICENSE file for details)
 =================================================================== 
 
 Description: 
-Repository layer encapsulating CRUD operations for books, members, and loans.
+Repository layer encapsulating CRUD operations for books, copies, members,
+loans and holds.
+``Repository`` is the interface LibraryService depends on; LibraryRepository
+is the SQLite implementation (see memory_repository.py for the in-memory one).
 
 Usage: 
 from library_ms.repository import LibraryRepository
 
 Notes: 
 - Uses parameterized queries to prevent SQL injection.
+- All SQL lives in queries.py, where its query plans are checked.
 
 ===================================================================
 """
 from __future__ import annotations
 
+import sqlite3
 from datetime import datetime
-from typing import Any, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Tuple
 
-from .db import get_connection
-from .models import Book, Member, Loan
+from . import queries as Q
+from .db import get_connection, retrying
+from .models import (
+    COPY_AVAILABLE, COPY_ON_HOLD_SHELF, COPY_ON_LOAN, COPY_WITHDRAWN,
+    HOLD_CANCELLED, HOLD_EXPIRED, HOLD_FULFILLED, HOLD_READY,
+    Book, Copy, HistoryCursor, Hold, Member, Loan, LoanPage, LoanRecord, LoanRow, auto_barcode, from_epoch, to_epoch,
+)
+
+# Circulation moves these on every borrow/return. They are not edits, so they
+# leave the row version alone and never invalidate an open edit dialog.
+UNVERSIONED_BOOK_FIELDS = frozenset({"available_copies"})
+
+# Sort keys the list windows accept; anything else never reaches the SQL.
+BOOK_SORTS = tuple(Q.BOOK_ORDER)
+MEMBER_SORTS = tuple(Q.MEMBER_ORDER)
+ACTIVE_LOAN_SORTS = tuple(Q.ACTIVE_LOAN_ORDER)
+_NO_LIMIT = -1  # SQLite's LIMIT for "all rows"
+_YEAR_BOUNDS = (-(2**63), 2**63 - 1)  # an open end of a year range
+
+
+def check_window(entity: str, sort: str, sorts: Tuple[str, ...], limit: Optional[int], offset: int) -> None:
+    """Reject a sort key that is not whitelisted, or a malformed window."""
+    if sort not in sorts:
+        raise ValueError(f"cannot sort {entity} by {sort!r} (choose from {', '.join(sorts)})")
+    if (limit is not None and limit < 1) or offset < 0:
+        raise ValueError("limit must be >= 1 and offset >= 0")
+
+
+def copy_count_delta(old: str, new: str) -> Tuple[int, int]:
+    """Change of a book's (total_copies, available_copies) when one copy goes from ``old`` to ``new``."""
+    return (
+        (new != COPY_WITHDRAWN) - (old != COPY_WITHDRAWN),
+        (new == COPY_AVAILABLE) - (old == COPY_AVAILABLE),
+    )
+
+
+class VersionConflictError(ValueError):
+    """An edit was based on a version of the row that is no longer current.
+
+    Attributes:
+        entity: "book" or "member".
+        entity_id: Row id.
+        expected: Version the caller read.
+        current: Version now stored, or None if the row was deleted meanwhile.
+    """
+
+    def __init__(self, entity: str, entity_id: int, expected: int, current: Optional[int]) -> None:
+        if current is None:
+            msg = f"{entity} {entity_id} was deleted by someone else"
+        else:
+            msg = f"{entity} {entity_id} was changed by someone else (version {expected} -> {current})"
+        super().__init__(msg)
+        self.entity = entity
+        self.entity_id = entity_id
+        self.expected = expected
+        self.current = current
+
+
+class Repository(Protocol):
+    """Storage interface used by LibraryService.
+
+    Implementations must agree on ordering (books by title, members by name,
+    case-insensitive for ASCII, ties by id; loans newest first), substring
+    search semantics, row versioning and loan bookkeeping.
+
+    ``list_books``, ``list_members`` and ``list_active_loans`` also sort by
+    any key in BOOK_SORTS / MEMBER_SORTS / ACTIVE_LOAN_SORTS, either way,
+    with ties by id in the same direction and missing values (NULL) lowest.
+    Filters combine with AND. ``limit``/``offset`` select a window of the
+    result. An unknown sort key raises ValueError.
+
+    Deletes are soft: deleted books/members disappear from get/list/update
+    and free their ISBN/email, but their loans are kept until purged.
+
+    Every physical item is a copy row with a unique barcode. ``add_book``
+    creates ``total_copies`` of them; afterwards a book's ``total_copies``
+    (copies not withdrawn) and ``available_copies`` (copies on the open
+    shelf) are a cache that every copy status change adjusts in the same
+    transaction. ``checkout_copy`` lends one specific copy.
+
+    A copy freed by ``return_loan``, ``cancel_hold`` or ``expire_holds`` goes
+    to the first waiting hold of a live member (lowest priority, then oldest)
+    and is put on the hold shelf until ``ready_until``; only when nobody is
+    waiting does it go back on the open shelf. Each of these is one transaction.
+
+    ``update_book``/``update_member`` bump the row version (except for
+    circulation-only book updates) and, given ``expected_version``, raise
+    VersionConflictError instead of overwriting a newer row.
+    """
+
+    def add_book(self, book: Book) -> int: ...
+    def update_book(self, book_id: int, expected_version: Optional[int] = None,
+                    ready_until: Optional[datetime] = None, **fields: Any) -> List[Hold]: ...
+    def delete_book(self, book_id: int) -> None: ...
+    def get_book(self, book_id: int) -> Optional[Book]: ...
+    def list_books(self, q: Optional[str] = None, *, sort: str = "title", descending: bool = False,
+                   available_only: bool = False, year_from: Optional[int] = None, year_to: Optional[int] = None,
+                   limit: Optional[int] = None, offset: int = 0) -> List[Book]: ...
+
+    def add_member(self, member: Member) -> int: ...
+    def update_member(self, member_id: int, expected_version: Optional[int] = None, **fields: Any) -> None: ...
+    def delete_member(self, member_id: int) -> None: ...
+    def get_member(self, member_id: int) -> Optional[Member]: ...
+    def list_members(self, q: Optional[str] = None, *, sort: str = "name", descending: bool = False,
+                     limit: Optional[int] = None, offset: int = 0) -> List[Member]: ...
+
+    def add_copy(self, book_id: int, barcode: Optional[str] = None, location: Optional[str] = None, *,
+                 ready_until: datetime) -> Tuple[int, Optional[Hold]]: ...
+    def get_copy(self, copy_id: int) -> Optional[Copy]: ...
+    def get_copy_by_barcode(self, barcode: str) -> Optional[Copy]: ...
+    def list_copies(self, book_id: int) -> List[Copy]: ...
+    def find_available_copy(self, book_id: int) -> Optional[Copy]: ...
+    def set_copy_status(self, copy_id: int, status: str, expected_status: str,
+                        ready_until: datetime) -> Tuple[bool, Optional[Hold]]: ...
+
+    def checkout_copy(self, copy_id: int, member_id: int, due_at: datetime,
+                      hold_id: Optional[int] = None) -> Optional[int]: ...
+    def find_active_loan_by_barcode(self, barcode: str) -> Optional[Loan]: ...
+    def mark_returned(self, loan_id: int) -> None: ...
+    def list_loan_rows(self, active_only: bool = False, include_history: bool = False) -> List[LoanRow]: ...
+    def list_loan_records(self, active_only: bool = False, include_history: bool = False) -> List[LoanRecord]: ...
+    def list_active_loans(self, *, sort: str = "loaned", descending: bool = True,
+                          overdue_before: Optional[datetime] = None,
+                          limit: Optional[int] = None, offset: int = 0) -> List[Loan]: ...
+    def list_loans(self, include_history: bool = False) -> List[Loan]: ...
+    def list_overdue_loans(self, now: Optional[datetime] = None) -> List[Loan]: ...
+    def return_loan(self, loan_id: int, ready_until: datetime) -> Tuple[Optional[Loan], Optional[Hold]]: ...
+    def get_loan(self, loan_id: int) -> Optional[Loan]: ...
+    def renew_loan(self, loan_id: int, due_at: datetime, expected_renewals: int) -> bool: ...
+
+    def member_loan_stats(self, member_id: int, now: datetime) -> Tuple[int, int]: ...
+    def member_open_loans(self, member_id: int) -> List[Loan]: ...
+    def member_loan_history(self, member_id: int, limit: int = 50,
+                            cursor: Optional[HistoryCursor] = None) -> LoanPage: ...
+
+    def place_hold(self, book_id: int, member_id: int, priority: int = 0) -> int: ...
+    def get_hold(self, hold_id: int) -> Optional[Hold]: ...
+    def find_open_hold(self, book_id: int, member_id: int) -> Optional[Hold]: ...
+    def list_holds(self, book_id: Optional[int] = None, member_id: Optional[int] = None) -> List[Hold]: ...
+    def has_waiting_hold(self, book_id: int) -> bool: ...
+    def fulfil_hold(self, hold_id: int) -> bool: ...
+    def cancel_hold(self, hold_id: int, ready_until: datetime) -> Optional[Hold]: ...
+    def expire_holds(self, now: datetime, ready_until: datetime, limit: int = 100) -> List[Tuple[Hold, Optional[Hold]]]: ...
 
 
 class LibraryRepository:
     """Thin CRUD wrapper around sqlite.
 
     Keep it simple so higher layers (services) can be unit-tested via this API.
+    Write methods are retried with backoff when another desk holds the lock.
     """
 
+    def __init__(self, db_path: Optional[str] = None) -> None:
+        self.db_path = db_path
+
+    def _update(self, table: str, entity: str, row_id: int, expected_version: Optional[int],
+                bump: bool, fields: Dict[str, Any]) -> None:
+        if not fields:
+            return
+        with get_connection(self.db_path) as conn:
+            self._write(conn, table, entity, row_id, expected_version, bump, fields)
+
+    @staticmethod
+    def _write(conn: sqlite3.Connection, table: str, entity: str, row_id: int, expected_version: Optional[int],
+               bump: bool, fields: Dict[str, Any]) -> bool:
+        """Update a live row in the caller's transaction; False if there is none and no version was expected."""
+        cols = [f"{k}=?" for k in fields]
+        if bump:
+            cols.append("version=version+1")
+        values = list(fields.values())
+        values.append(row_id)
+        if expected_version is not None:
+            values.append(expected_version)
+        sql = Q.UPDATE_ROW[table, expected_version is not None].format(set=", ".join(cols))
+        if conn.execute(sql, values).rowcount:
+            return True
+        if expected_version is None:
+            return False
+        row = conn.execute(Q.CURRENT_VERSION[table], (row_id,)).fetchone()
+        raise VersionConflictError(entity, row_id, expected_version, row[0] if row else None)
+
     # --- Books ---
+    @retrying
     def add_book(self, book: Book) -> int:
-        with get_connection() as conn:
+        """Insert a book with ``total_copies`` available copies (auto barcodes).
+
+        ``book.available_copies`` is ignored: a new book's copies are all on the shelf.
+        """
+        copies = max(book.total_copies, 0)
+        with get_connection(self.db_path) as conn:
             cur = conn.cursor()
             cur.execute(
-                """
-                INSERT INTO books(isbn, title, author, year, total_copies, available_copies)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (book.isbn, book.title, book.author, book.year, book.total_copies, book.available_copies),
+                Q.INSERT_BOOK,
+                (book.isbn, book.title, book.author, book.year, copies, copies),
             )
-            return int(cur.lastrowid)
+            book_id = int(cur.lastrowid)
+            cur.executemany(
+                Q.INSERT_COPY,
+                [(book_id, auto_barcode(book_id, n), COPY_AVAILABLE, None) for n in range(1, copies + 1)],
+            )
+            return book_id
 
-    def update_book(self, book_id: int, **fields: Any) -> None:
-        if not fields:
-            return
-        cols = ", ".join(f"{k}=?" for k in fields)
-        values = list(fields.values())
-        values.append(book_id)
-        with get_connection() as conn:
-            conn.execute(f"UPDATE books SET {cols}, updated_at=datetime('now') WHERE id=?", values)
+    @retrying
+    def update_book(self, book_id: int, expected_version: Optional[int] = None,
+                    ready_until: Optional[datetime] = None, **fields: Any) -> List[Hold]:
+        """Update columns of a book.
+
+        A new ``total_copies`` is reached through the copies in the same
+        transaction: copies with automatic barcodes are added and released
+        like returned ones (waiting holds first, until ``ready_until``), or
+        copies on the open shelf are withdrawn, newest first.
+
+        Returns:
+            Holds that a new copy is now waiting for on the hold shelf.
 
+        Args:
+            expected_version: Version the edit was based on. When given, the
+                update only applies if the row still has it; otherwise
+                VersionConflictError is raised and nothing is written.
+
+        Raises:
+            ValueError: fewer copies are on the shelf than must be withdrawn,
+                or copies are to be added without ``ready_until``.
+        """
+        copies = fields.pop("total_copies", None)
+        if copies is None:
+            bump = not fields.keys() <= UNVERSIONED_BOOK_FIELDS
+            self._update("books", "book", book_id, expected_version, bump, fields)
+            return []
+        with get_connection(self.db_path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if not self._write(conn, "books", "book", book_id, expected_version, True, fields):
+                return []
+            return self._resize(conn, book_id, copies, ready_until)
+
+    @retrying
     def delete_book(self, book_id: int) -> None:
-        with get_connection() as conn:
-            conn.execute("DELETE FROM books WHERE id=?", (book_id,))
+        """Tombstone the book; it and its loans are removed later by purge.py."""
+        with get_connection(self.db_path) as conn:
+            conn.execute(Q.DELETE_BOOK, (book_id,))
 
     def get_book(self, book_id: int) -> Optional[Book]:
-        with get_connection() as conn:
-            cur = conn.execute(
-                "SELECT id, isbn, title, author, year, total_copies, available_copies FROM books WHERE id=?",
-                (book_id,),
-            )
+        with get_connection(self.db_path) as conn:
+            cur = conn.execute(Q.GET_BOOK, (book_id,))
             row = cur.fetchone()
         return Book(*row) if row else None
 
-    def list_books(self, q: Optional[str] = None) -> List[Book]:
-        sql = "SELECT id, isbn, title, author, year, total_copies, available_copies FROM books"
-        params: Tuple[Any, ...] = ()
+    def list_books(self, q: Optional[str] = None, *, sort: str = "title", descending: bool = False,
+                   available_only: bool = False, year_from: Optional[int] = None, year_to: Optional[int] = None,
+                   limit: Optional[int] = None, offset: int = 0) -> List[Book]:
+        """Live books, ``limit`` rows from ``offset`` in ``sort`` order (see Q.BOOK_WINDOWS).
+
+        Args:
+            q: Substring of the title, author or ISBN.
+            available_only: Only books with a copy on the open shelf.
+            year_from, year_to: Inclusive year range; either end may be open.
+                Books without a year are left out once a range is given.
+        """
+        check_window("books", sort, BOOK_SORTS, limit, offset)
+        used: List[str] = []
+        params: List[Any] = []
         if q:
-            sql += " WHERE title LIKE ? OR author LIKE ? OR isbn LIKE ?"
-            params = (f"%{q}%", f"%{q}%", f"%{q}%")
-        sql += " ORDER BY title COLLATE NOCASE"
-        with get_connection() as conn:
-            rows = conn.execute(sql, params).fetchall()
+            used.append("search")
+            params += [f"%{q}%"] * 3
+        if available_only:
+            used.append("in_stock")
+        if year_from is not None or year_to is not None:
+            used.append("years")
+            params += [_YEAR_BOUNDS[0] if year_from is None else year_from,
+                       _YEAR_BOUNDS[1] if year_to is None else year_to]
+        params += [_NO_LIMIT if limit is None else limit, offset]
+        with get_connection(self.db_path) as conn:
+            rows = conn.execute(Q.BOOK_WINDOWS[sort, descending, tuple(used)], params).fetchall()
         return [Book(*r) for r in rows]
 
+    # --- Copies ---
+    @staticmethod
+    def _move_copy(conn: sqlite3.Connection, book_id: int, copy_id: int, old: str, new: str) -> bool:
+        """Set a copy's status if it is still ``old`` and adjust the book's counters (caller's transaction)."""
+        if not conn.execute(Q.SET_COPY_STATUS, (new, copy_id, old)).rowcount:
+            return False
+        total, available = copy_count_delta(old, new)
+        if total or available:
+            conn.execute(Q.ADJUST_COPY_COUNTS, (total, available, book_id))
+        return True
+
+    @classmethod
+    def _resize(cls, conn: sqlite3.Connection, book_id: int, copies: int,
+                ready_until: Optional[datetime]) -> List[Hold]:
+        """Add or withdraw copies until the book has ``copies`` (caller's transaction)."""
+        total = Book(*conn.execute(Q.GET_BOOK, (book_id,)).fetchone()).total_copies
+        if copies > total:
+            if ready_until is None:
+                raise ValueError("ready_until is required to add copies")
+            n = conn.execute(Q.COUNT_COPIES, (book_id,)).fetchone()[0]
+            added = [cls._insert_copy(conn, book_id, auto_barcode(book_id, n + i), None)
+                     for i in range(1, copies - total + 1)]
+            holds = [cls.release_copy(conn, book_id, copy_id, COPY_AVAILABLE, ready_until) for copy_id in added]
+            return [h for h in holds if h is not None]
+        rows = conn.execute(Q.LIST_COPIES, (book_id,)).fetchall()
+        shelf = [c for c in (Copy(*r) for r in rows) if c.status == COPY_AVAILABLE]
+        if len(shelf) < total - copies:
+            raise ValueError(f"only {len(shelf)} copies are on the shelf to withdraw")
+        for c in shelf[len(shelf) - (total - copies):]:  # newest first out
+            if not cls._move_copy(conn, book_id, c.id, COPY_AVAILABLE, COPY_WITHDRAWN):
+                raise ValueError(f"copy {c.barcode} left the shelf during the edit")
+        return []
+
+    @staticmethod
+    def _insert_copy(conn: sqlite3.Connection, book_id: int, barcode: str, location: Optional[str]) -> int:
+        """Insert an available copy and count it (caller's transaction)."""
+        cur = conn.execute(Q.INSERT_COPY, (book_id, barcode, COPY_AVAILABLE, location))
+        conn.execute(Q.ADJUST_COPY_COUNTS, (1, 1, book_id))
+        return int(cur.lastrowid)
+
+    @retrying
+    def add_copy(self, book_id: int, barcode: Optional[str] = None, location: Optional[str] = None, *,
+                 ready_until: datetime) -> Tuple[int, Optional[Hold]]:
+        """Add a copy; without ``barcode`` the book's next ``auto_barcode`` is used.
+
+        The copy is released like a returned one: the next waiting hold gets
+        it until ``ready_until``, otherwise it goes on the open shelf.
+
+        Returns:
+            (copy id, the hold now waiting for it or None)
+
+        Raises:
+            sqlite3.IntegrityError: the barcode is already in use.
+        """
+        with get_connection(self.db_path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if barcode is None:
+                barcode = auto_barcode(book_id, conn.execute(Q.COUNT_COPIES, (book_id,)).fetchone()[0] + 1)
+            copy_id = self._insert_copy(conn, book_id, barcode, location)
+            return copy_id, self.release_copy(conn, book_id, copy_id, COPY_AVAILABLE, ready_until)
+
+    def get_copy(self, copy_id: int) -> Optional[Copy]:
+        with get_connection(self.db_path) as conn:
+            row = conn.execute(Q.GET_COPY, (copy_id,)).fetchone()
+        return Copy(*row) if row else None
+
+    def get_copy_by_barcode(self, barcode: str) -> Optional[Copy]:
+        """One probe of ux_copies_barcode."""
+        with get_connection(self.db_path) as conn:
+            row = conn.execute(Q.GET_COPY_BY_BARCODE, (barcode,)).fetchone()
+        return Copy(*row) if row else None
+
+    def list_copies(self, book_id: int) -> List[Copy]:
+        """All copies of a book, withdrawn ones included, oldest first."""
+        with get_connection(self.db_path) as conn:
+            rows = conn.execute(Q.LIST_COPIES, (book_id,)).fetchall()
+        return [Copy(*r) for r in rows]
+
+    def find_available_copy(self, book_id: int) -> Optional[Copy]:
+        """The oldest copy on the open shelf, if any."""
+        with get_connection(self.db_path) as conn:
+            row = conn.execute(Q.FIND_AVAILABLE_COPY, (book_id,)).fetchone()
+        return Copy(*row) if row else None
+
+    @retrying
+    def set_copy_status(self, copy_id: int, status: str, expected_status: str,
+                        ready_until: datetime) -> Tuple[bool, Optional[Hold]]:
+        """Change a copy's status and its book's counters.
+
+        A copy made available is released like a returned one: the next
+        waiting hold gets it until ``ready_until``.
+
+        Returns:
+            (False if the copy was no longer ``expected_status``, the hold now waiting for it or None)
+        """
+        with get_connection(self.db_path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(Q.GET_COPY, (copy_id,)).fetchone()
+            if row is None or Copy(*row).status != expected_status:
+                return False, None
+            if status == COPY_AVAILABLE:
+                return True, self.release_copy(conn, row[1], copy_id, expected_status, ready_until)
+            return self._move_copy(conn, row[1], copy_id, expected_status, status), None
+
     # --- Members ---
+    @retrying
     def add_member(self, member: Member) -> int:
-        with get_connection() as conn:
+        with get_connection(self.db_path) as conn:
             cur = conn.cursor()
             cur.execute(
-                "INSERT INTO members(name, email, phone) VALUES(?, ?, ?)",
+                Q.INSERT_MEMBER,
                 (member.name, member.email, member.phone),
             )
             return int(cur.lastrowid)
 
-    def update_member(self, member_id: int, **fields: Any) -> None:
-        if not fields:
-            return
-        cols = ", ".join(f"{k}=?" for k in fields)
-        values = list(fields.values())
-        values.append(member_id)
-        with get_connection() as conn:
-            conn.execute(f"UPDATE members SET {cols}, updated_at=datetime('now') WHERE id=?", values)
+    @retrying
+    def update_member(self, member_id: int, expected_version: Optional[int] = None, **fields: Any) -> None:
+        """Update columns of a member; ``expected_version`` as in ``update_book``."""
+        self._update("members", "member", member_id, expected_version, True, fields)
 
+    @retrying
     def delete_member(self, member_id: int) -> None:
-        with get_connection() as conn:
-            conn.execute("DELETE FROM members WHERE id=?", (member_id,))
+        """Tombstone the member; see ``delete_book``."""
+        with get_connection(self.db_path) as conn:
+            conn.execute(Q.DELETE_MEMBER, (member_id,))
 
     def get_member(self, member_id: int) -> Optional[Member]:
-        with get_connection() as conn:
-            row = conn.execute(
-                "SELECT id, name, email, phone FROM members WHERE id=?",
-                (member_id,),
-            ).fetchone()
+        with get_connection(self.db_path) as conn:
+            row = conn.execute(Q.GET_MEMBER, (member_id,)).fetchone()
         return Member(*row) if row else None
 
-    def list_members(self, q: Optional[str] = None) -> List[Member]:
-        sql = "SELECT id, name, email, phone FROM members"
-        params: Tuple[Any, ...] = ()
-        if q:
-            sql += " WHERE name LIKE ? OR email LIKE ? OR phone LIKE ?"
-            params = (f"%{q}%", f"%{q}%", f"%{q}%")
-        sql += " ORDER BY name COLLATE NOCASE"
-        with get_connection() as conn:
-            rows = conn.execute(sql, params).fetchall()
+    def list_members(self, q: Optional[str] = None, *, sort: str = "name", descending: bool = False,
+                     limit: Optional[int] = None, offset: int = 0) -> List[Member]:
+        """Live members, ``limit`` rows from ``offset`` in ``sort`` order; ``q`` searches name, email and phone."""
+        check_window("members", sort, MEMBER_SORTS, limit, offset)
+        used, params = ((), []) if not q else (("search",), [f"%{q}%"] * 3)
+        params += [_NO_LIMIT if limit is None else limit, offset]
+        with get_connection(self.db_path) as conn:
+            rows = conn.execute(Q.MEMBER_WINDOWS[sort, descending, used], params).fetchall()
         return [Member(*r) for r in rows]
 
     # --- Loans ---
-    def create_loan(self, book_id: int, member_id: int, due_at: datetime) -> int:
-        with get_connection() as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "INSERT INTO loans(book_id, member_id, due_at) VALUES(?, ?, ?)",
-                (book_id, member_id, due_at.isoformat(timespec="seconds")),
-            )
+    @retrying
+    def checkout_copy(self, copy_id: int, member_id: int, due_at: datetime,
+                      hold_id: Optional[int] = None) -> Optional[int]:
+        """Lend one copy, atomically; returns the loan id, or None if the copy was taken meanwhile.
+
+        Without ``hold_id`` the copy must be on the open shelf. With it, the
+        copy must be on the hold shelf and the ready hold is fulfilled in
+        the same transaction.
+        """
+        expected = COPY_AVAILABLE if hold_id is None else COPY_ON_HOLD_SHELF
+        with get_connection(self.db_path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(Q.GET_COPY, (copy_id,)).fetchone()
+            if row is None or row[3] != expected:
+                return None
+            if hold_id is not None and not conn.execute(Q.FULFIL_HOLD, (HOLD_FULFILLED, hold_id, HOLD_READY)).rowcount:
+                return None
+            cur = conn.execute(Q.INSERT_LOAN, (row[1], member_id, to_epoch(due_at), copy_id))
+            self._move_copy(conn, row[1], copy_id, expected, COPY_ON_LOAN)
             return int(cur.lastrowid)
 
+    def find_active_loan_by_barcode(self, barcode: str) -> Optional[Loan]:
+        """The unreturned loan of the copy with ``barcode`` (ux_copies_barcode, then idx_loans_copy)."""
+        with get_connection(self.db_path) as conn:
+            row = conn.execute(Q.ACTIVE_LOAN_BY_BARCODE, (barcode,)).fetchone()
+        return self._row_to_loan(row) if row else None
+
+    @retrying
     def mark_returned(self, loan_id: int) -> None:
-        with get_connection() as conn:
-            conn.execute(
-                "UPDATE loans SET returned_at=datetime('now') WHERE id=? AND returned_at IS NULL",
-                (loan_id,),
-            )
+        with get_connection(self.db_path) as conn:
+            conn.execute(Q.MARK_RETURNED, (loan_id,))
+
+    def list_loan_rows(self, active_only: bool = False, include_history: bool = False) -> List[LoanRow]:
+        """Raw loan tuples (integer epoch timestamps), newest first.
+
+        This is the cheapest way to read many loans; ``list_loans`` and
+        ``list_loan_records`` are built on it.
+
+        Args:
+            active_only: Only loans that have not been returned.
+            include_history: Also include loans moved to ``loan_history`` by the archiver.
+        """
+        if active_only:
+            sql = Q.LIST_ACTIVE_LOANS
+        elif include_history:
+            sql = Q.LIST_LOANS_WITH_HISTORY
+        else:
+            sql = Q.LIST_LOANS
+        with get_connection(self.db_path) as conn:
+            return conn.execute(sql).fetchall()
+
+    def list_loan_records(self, active_only: bool = False, include_history: bool = False) -> List[LoanRecord]:
+        """Like ``list_loans`` but timestamps are decoded only when accessed."""
+        return [LoanRecord(*r) for r in self.list_loan_rows(active_only, include_history)]
+
+    def list_active_loans(self, *, sort: str = "loaned", descending: bool = True,
+                          overdue_before: Optional[datetime] = None,
+                          limit: Optional[int] = None, offset: int = 0) -> List[Loan]:
+        """Unreturned loans, newest first by default; ``overdue_before`` keeps those due before it."""
+        check_window("loans", sort, ACTIVE_LOAN_SORTS, limit, offset)
+        used, params = ((), []) if overdue_before is None else (("overdue",), [to_epoch(overdue_before)])
+        params += [_NO_LIMIT if limit is None else limit, offset]
+        with get_connection(self.db_path) as conn:
+            rows = conn.execute(Q.ACTIVE_LOAN_WINDOWS[sort, descending, used], params).fetchall()
+        return [self._row_to_loan(r) for r in rows]
+
+    def list_loans(self, include_history: bool = False) -> List[Loan]:
+        """List loans, newest first.
 
-    def list_active_loans(self) -> List[Loan]:
-        with get_connection() as conn:
-            rows = conn.execute(
-                """
-                SELECT id, book_id, member_id, loaned_at, due_at, returned_at
-                FROM loans
-                WHERE returned_at IS NULL
-                ORDER BY loaned_at DESC
-                """
-            ).fetchall()
+        Args:
+            include_history: Also include loans moved to ``loan_history`` by the archiver.
+        """
+        return [self._row_to_loan(r) for r in self.list_loan_rows(include_history=include_history)]
+
+    def list_overdue_loans(self, now: Optional[datetime] = None) -> List[Loan]:
+        """Unreturned loans due before ``now``, most overdue first (range scan on idx_loans_due)."""
+        cutoff = to_epoch(now or datetime.now())
+        with get_connection(self.db_path) as conn:
+            rows = conn.execute(Q.LIST_OVERDUE, (cutoff,)).fetchall()
         return [self._row_to_loan(r) for r in rows]
 
-    def list_loans(self) -> List[Loan]:
-        with get_connection() as conn:
-            rows = conn.execute(
-                "SELECT id, book_id, member_id, loaned_at, due_at, returned_at FROM loans ORDER BY loaned_at DESC"
-            ).fetchall()
+    @retrying
+    def return_loan(self, loan_id: int, ready_until: datetime) -> Tuple[Optional[Loan], Optional[Hold]]:
+        """Return a loan and hand the copy to the holds queue, atomically.
+
+        Returns:
+            (the returned loan, or None if it was not active; the hold now
+            ready for pickup, or None if the copy went back on the shelf)
+        """
+        with get_connection(self.db_path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(Q.GET_ACTIVE_LOAN, (loan_id,)).fetchone()
+            if not row:
+                return None, None
+            conn.execute(Q.MARK_RETURNED, (loan_id,))
+            loan = self._row_to_loan(row)
+            loan.returned_at = datetime.now()
+            return loan, self.release_copy(conn, loan.book_id, loan.copy_id, COPY_ON_LOAN, ready_until)
+
+    def get_loan(self, loan_id: int) -> Optional[Loan]:
+        with get_connection(self.db_path) as conn:
+            row = conn.execute(Q.GET_LOAN, (loan_id,)).fetchone()
+        return self._row_to_loan(row) if row else None
+
+    @retrying
+    def renew_loan(self, loan_id: int, due_at: datetime, expected_renewals: int) -> bool:
+        """Move an active loan's due date; False if it was returned or renewed meanwhile.
+
+        Reminders already sent for the old due date are forgotten, so the
+        new one gets its own.
+        """
+        with get_connection(self.db_path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            cur = conn.execute(
+                Q.RENEW_LOAN,
+                (to_epoch(due_at), loan_id, expected_renewals),
+            )
+            if cur.rowcount != 1:
+                return False
+            conn.execute(Q.CLEAR_LOAN_REMINDERS, (loan_id,))
+            return True
+
+    # --- Per-member queries (idx_loans_member: member_id, returned_at, due_at) ---
+    def member_loan_stats(self, member_id: int, now: datetime) -> Tuple[int, int]:
+        """(open loans, of which overdue) for one member, from the covering index."""
+        with get_connection(self.db_path) as conn:
+            row = conn.execute(Q.MEMBER_LOAN_STATS, (to_epoch(now), member_id)).fetchone()
+        return row[0], row[1]
+
+    def member_open_loans(self, member_id: int) -> List[Loan]:
+        """A member's unreturned loans, soonest due first."""
+        with get_connection(self.db_path) as conn:
+            rows = conn.execute(Q.MEMBER_OPEN_LOANS, (member_id,)).fetchall()
         return [self._row_to_loan(r) for r in rows]
 
+    def member_loan_history(self, member_id: int, limit: int = 50,
+                            cursor: Optional[HistoryCursor] = None) -> LoanPage:
+        """One page of a member's returned loans (archived ones included), latest return first.
+
+        Keyset pagination: each table is read as an index range starting after
+        ``cursor``, so deep pages cost the same as the first.
+        """
+        params: List[Any] = [member_id]
+        if cursor is not None:
+            params += list(cursor)
+        params.append(limit + 1)
+        with get_connection(self.db_path) as conn:
+            rows = [
+                r for table in ("loans", "loan_history")
+                for r in conn.execute(Q.MEMBER_HISTORY[table, cursor is not None], params)
+            ]
+        rows.sort(key=lambda r: (r[5], r[4], r[0]), reverse=True)
+        more = len(rows) > limit
+        rows = rows[:limit]
+        return LoanPage([self._row_to_loan(r) for r in rows],
+                        (rows[-1][5], rows[-1][4], rows[-1][0]) if more else None)
+
+    # --- Holds ---
+    @staticmethod
+    def release_copy(conn: sqlite3.Connection, book_id: int, copy_id: Optional[int], status: str,
+                      ready_until: datetime) -> Optional[Hold]:
+        """Give a freed copy (now ``status``) of ``book_id`` to the next eligible hold (caller's transaction).
+
+        ``copy_id`` is None for loans made before copies were tracked; only
+        the counter moves then.
+        """
+        row = conn.execute(Q.NEXT_HOLD, (book_id,)).fetchone()
+        if row is None:
+            if copy_id is None:
+                conn.execute(Q.ADJUST_COPY_COUNTS, (0, 1, book_id))
+            else:
+                LibraryRepository._move_copy(conn, book_id, copy_id, status, COPY_AVAILABLE)
+            return None
+        expires = to_epoch(ready_until)
+        conn.execute(Q.SET_HOLD_READY, (expires, copy_id, row[0]))
+        if copy_id is not None:
+            LibraryRepository._move_copy(conn, book_id, copy_id, status, COPY_ON_HOLD_SHELF)
+        return LibraryRepository._row_to_hold(row[:5] + (HOLD_READY, expires, copy_id))
+
+    @retrying
+    def place_hold(self, book_id: int, member_id: int, priority: int = 0) -> int:
+        with get_connection(self.db_path) as conn:
+            cur = conn.execute(Q.INSERT_HOLD, (book_id, member_id, priority))
+            return int(cur.lastrowid)
+
+    def get_hold(self, hold_id: int) -> Optional[Hold]:
+        with get_connection(self.db_path) as conn:
+            row = conn.execute(Q.GET_HOLD, (hold_id,)).fetchone()
+        return self._row_to_hold(row) if row else None
+
+    def find_open_hold(self, book_id: int, member_id: int) -> Optional[Hold]:
+        with get_connection(self.db_path) as conn:
+            row = conn.execute(Q.FIND_OPEN_HOLD, (member_id, book_id)).fetchone()
+        return self._row_to_hold(row) if row else None
+
+    def list_holds(self, book_id: Optional[int] = None, member_id: Optional[int] = None) -> List[Hold]:
+        """Open holds, ready ones first, then in queue order."""
+        params = [v for v in (book_id, member_id) if v is not None]
+        sql = Q.LIST_HOLDS[book_id is not None, member_id is not None]
+        with get_connection(self.db_path) as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [self._row_to_hold(r) for r in rows]
+
+    def has_waiting_hold(self, book_id: int) -> bool:
+        with get_connection(self.db_path) as conn:
+            return conn.execute(Q.HAS_WAITING_HOLD, (book_id,)).fetchone()[0] == 1
+
+    @retrying
+    def fulfil_hold(self, hold_id: int) -> bool:
+        """Mark a ready hold as picked up; False if it was no longer ready."""
+        with get_connection(self.db_path) as conn:
+            cur = conn.execute(Q.FULFIL_HOLD, (HOLD_FULFILLED, hold_id, HOLD_READY))
+            return cur.rowcount == 1
+
+    @retrying
+    def cancel_hold(self, hold_id: int, ready_until: datetime) -> Optional[Hold]:
+        """Cancel an open hold. A shelved copy moves on to the next hold, which is returned."""
+        with get_connection(self.db_path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(Q.GET_OPEN_HOLD_STATE, (hold_id,)).fetchone()
+            if not row:
+                return None
+            conn.execute(Q.CLOSE_HOLD, (HOLD_CANCELLED, hold_id))
+            if row[1] != HOLD_READY:
+                return None
+            return self.release_copy(conn, row[0], row[2], COPY_ON_HOLD_SHELF, ready_until)
+
+    @retrying
+    def expire_holds(self, now: datetime, ready_until: datetime, limit: int = 100) -> List[Tuple[Hold, Optional[Hold]]]:
+        """Expire up to ``limit`` shelved holds not picked up by ``now``.
+
+        Returns:
+            (expired hold, hold that received its copy or None) pairs.
+        """
+        with get_connection(self.db_path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(Q.EXPIRED_HOLDS, (to_epoch(now), limit)).fetchall()
+            result = []
+            for r in rows:
+                conn.execute(Q.CLOSE_HOLD, (HOLD_EXPIRED, r[0]))
+                expired = self._row_to_hold(r[:5] + (HOLD_EXPIRED, None, r[7]))
+                nxt = self.release_copy(conn, expired.book_id, expired.copy_id, COPY_ON_HOLD_SHELF, ready_until)
+                result.append((expired, nxt))
+            return result
+
+    @staticmethod
+    def _row_to_hold(r: Iterable) -> Hold:
+        id_, book_id, member_id, priority, created_at, status, expires_at, copy_id = r
+        return Hold(id_, book_id, member_id, priority, from_epoch(created_at), status,
+                    from_epoch(expires_at) if expires_at is not None else None, copy_id)
+
     @staticmethod
     def _row_to_loan(r: Iterable) -> Loan:
-        id_, book_id, member_id, loaned_at, due_at, returned_at = r
+        id_, book_id, member_id, loaned_at, due_at, returned_at, renewals, copy_id = r
         return Loan(
             id=id_,
             book_id=book_id,
             member_id=member_id,
-            loaned_at=datetime.fromisoformat(loaned_at),
-            due_at=datetime.fromisoformat(due_at),
-            returned_at=datetime.fromisoformat(returned_at) if returned_at else None,
+            loaned_at=from_epoch(loaned_at),
+            due_at=from_epoch(due_at),
+            returned_at=from_epoch(returned_at) if returned_at is not None else None,
+            renewals=renewals,
+            copy_id=copy_id,
         )
@@ -19,23 +19,88 @@ from library_ms.services import LibraryService
 
 Notes: 
 - Raise ValueError for user-correctable issues (e.g., unavailable book).
+- Successful writes are announced to subscribers as ServiceEvents.
 
 ===================================================================
 """
 from __future__ import annotations
 
+import logging
+import sqlite3
+from dataclasses import dataclass, field, fields as dataclass_fields
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from .models import Book, Member, Loan
-from .repository import LibraryRepository
+from .models import (
+    COPY_AVAILABLE, COPY_MISSING, COPY_ON_HOLD_SHELF, COPY_ON_LOAN, COPY_WITHDRAWN, HOLD_READY, HOLD_WAITING,
+    Book, Copy, HistoryCursor, Hold, Member, Loan, LoanPage,
+)
+from .repository import LibraryRepository, Repository
 
 DEFAULT_LOAN_DAYS = 14
+HOLD_SHELF_DAYS = 7  # how long a returned copy waits on the hold shelf
+BORROW_ATTEMPTS = 3  # another desk may lend the copy we picked; try the next one
+
+
+@dataclass(frozen=True, slots=True)
+class LoanPolicy:
+    """Circulation rules checked on borrow and renew."""
+
+    max_open_loans: int = 10
+    block_on_overdue: bool = True  # no new loans while anything is overdue
+    max_renewals: int = 2
+
+
+DEFAULT_POLICY = LoanPolicy()
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class ServiceEvent:
+    action: str  # "add", "update", "delete", "borrow", "return", "renew", "ready", "cancel", "expire"
+    entity: str  # "book", "copy", "member", "loan", "hold"
+    entity_id: int
+    fields: Dict[str, Any] = field(default_factory=dict)
+    # Prior values of the edited fields (update) or of the whole row (delete).
+    # Only read when someone is subscribed, so it may predate a racing edit.
+    before: Dict[str, Any] = field(default_factory=dict)
+    actor: Optional[str] = None  # LibraryService.actor at the time of the write
+
+
+ServiceListener = Callable[[ServiceEvent], None]
 
 
 class LibraryService:
-    def __init__(self, repo: Optional[LibraryRepository] = None) -> None:
-        self.repo = repo or LibraryRepository()
+    def __init__(self, repo: Optional[Repository] = None, hold_shelf_days: int = HOLD_SHELF_DAYS,
+                 policy: LoanPolicy = DEFAULT_POLICY, actor: Optional[str] = None) -> None:
+        self.repo: Repository = repo or LibraryRepository()
+        self.hold_shelf_days = hold_shelf_days
+        self.policy = policy
+        self.actor = actor  # who is at the desk; stamped on every event
+        self._listeners: List[ServiceListener] = []
+
+    # --- Events ---
+    def subscribe(self, listener: ServiceListener) -> Callable[[], None]:
+        """Call ``listener`` after every successful write; returns an unsubscribe function."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def _emit(self, action: str, entity: str, entity_id: int, before: Optional[Dict[str, Any]] = None,
+              **fields: Any) -> None:
+        event = ServiceEvent(action, entity, entity_id, fields, before or {}, self.actor)
+        for listener in list(self._listeners):
+            try:
+                listener(event)
+            except Exception:  # the write already happened; don't fail it
+                log.exception("service listener failed for %s %s %s", action, entity, entity_id)
+
+    def _before(self, row: Any, keys: Optional[Any] = None) -> Dict[str, Any]:
+        """Current values of ``keys`` (default: every field) of ``row`` for the event's ``before``."""
+        if row is None:
+            return {}
+        keys = keys if keys is not None else [f.name for f in dataclass_fields(row) if f.name not in ("id", "version")]
+        return {k: getattr(row, k) for k in keys if hasattr(row, k)}
 
     # --- Books ---
     def add_book(self, isbn: str, title: str, author: str, year: Optional[int] = None, copies: int = 1) -> int:
@@ -43,62 +108,322 @@ class LibraryService:
             raise ValueError("copies must be >= 1")
         book = Book(id=None, isbn=isbn.strip(), title=title.strip(), author=author.strip(), year=year,
                     total_copies=copies, available_copies=copies)
-        return self.repo.add_book(book)
+        book_id = self.repo.add_book(book)
+        self._emit("add", "book", book_id, isbn=book.isbn, title=book.title, author=book.author,
+                   year=book.year, total_copies=copies, available_copies=copies)
+        return book_id
+
+    def update_book(self, book_id: int, expected_version: Optional[int] = None, **fields) -> None:
+        """Edit a book; pass the ``version`` it was read at to detect concurrent edits.
 
-    def update_book(self, book_id: int, **fields) -> None:
-        if "total_copies" in fields and fields["total_copies"] < 0:
+        A new ``total_copies`` adds copies with automatic barcodes, or
+        withdraws copies from the open shelf, in the same transaction as the
+        version check; it counts as an edit. ``available_copies`` follows the
+        copies and cannot be set.
+
+        Raises:
+            VersionConflictError: another desk changed or deleted the book first.
+        """
+        if "available_copies" in fields:
+            raise ValueError("available copies are counted from the items; check them in or out instead")
+        if fields.get("total_copies") is not None and fields["total_copies"] < 0:
             raise ValueError("total_copies must be >= 0")
-        self.repo.update_book(book_id, **fields)
+        old = self.repo.get_book(book_id) if self._listeners else None
+        holds = self.repo.update_book(book_id, expected_version=expected_version,
+                                      ready_until=self._shelf_deadline(), **fields)
+        self._emit("update", "book", book_id, self._before(old, fields), **fields)
+        for hold in holds:
+            self._emit_ready(hold)
 
     def delete_book(self, book_id: int) -> None:
+        old = self.repo.get_book(book_id) if self._listeners else None
         self.repo.delete_book(book_id)
+        self._emit("delete", "book", book_id, self._before(old))
+
+    def get_book(self, book_id: int) -> Optional[Book]:
+        return self.repo.get_book(book_id)
 
-    def list_books(self, q: Optional[str] = None) -> List[Book]:
-        return self.repo.list_books(q)
+    def list_books(self, q: Optional[str] = None, *, sort: str = "title", descending: bool = False,
+                   available_only: bool = False, year_from: Optional[int] = None, year_to: Optional[int] = None,
+                   limit: Optional[int] = None, offset: int = 0) -> List[Book]:
+        """Books matching ``q`` and the filters, one window in ``sort`` order (see Repository)."""
+        if year_from is not None and year_to is not None and year_from > year_to:
+            raise ValueError("year range is empty: 'from' is after 'to'")
+        return self.repo.list_books(q, sort=sort, descending=descending, available_only=available_only,
+                                    year_from=year_from, year_to=year_to, limit=limit, offset=offset)
+
+    # --- Copies ---
+    def add_copy(self, book_id: int, barcode: Optional[str] = None, location: Optional[str] = None) -> int:
+        """Register a physical item; without ``barcode`` one is generated (see ``auto_barcode``).
+
+        The new item goes to the next waiting hold, if any, before the open shelf.
+        """
+        if not self.repo.get_book(book_id):
+            raise ValueError("book not found")
+        try:
+            copy_id, hold = self.repo.add_copy(book_id, (barcode or "").strip() or None, location or None,
+                                               ready_until=self._shelf_deadline())
+        except sqlite3.IntegrityError:
+            raise ValueError("barcode already in use") from None
+        copy = self.repo.get_copy(copy_id)
+        self._emit("add", "copy", copy_id, book_id=book_id, barcode=copy.barcode, location=copy.location)
+        self._emit_ready(hold)
+        return copy_id
+
+    def set_copy_status(self, copy_id: int, status: str) -> None:
+        """Mark an item missing or withdrawn, or available again once found.
+
+        An item made available goes to the next waiting hold, if any, before
+        the open shelf. Items on loan or on the hold shelf only move through
+        circulation.
+        """
+        if status not in (COPY_AVAILABLE, COPY_MISSING, COPY_WITHDRAWN):
+            raise ValueError(f"status must be one of {COPY_AVAILABLE}, {COPY_MISSING}, {COPY_WITHDRAWN}")
+        copy = self.repo.get_copy(copy_id)
+        if copy is None:
+            raise ValueError("copy not found")
+        if copy.status in (COPY_ON_LOAN, COPY_ON_HOLD_SHELF):
+            raise ValueError(f"copy is {copy.status.replace('_', ' ')}; return or release it first")
+        if copy.status == status:
+            return
+        moved, hold = self.repo.set_copy_status(copy_id, status, copy.status, self._shelf_deadline())
+        if not moved:
+            raise ValueError("copy changed meanwhile; try again")
+        if hold is not None:
+            status = COPY_ON_HOLD_SHELF
+        self._emit("update", "copy", copy_id, {"status": copy.status}, book_id=copy.book_id, status=status)
+        self._emit_ready(hold)
+
+    def get_copy_by_barcode(self, barcode: str) -> Optional[Copy]:
+        return self.repo.get_copy_by_barcode(barcode.strip())
+
+    def list_copies(self, book_id: int) -> List[Copy]:
+        return self.repo.list_copies(book_id)
 
     # --- Members ---
     def add_member(self, name: str, email: Optional[str] = None, phone: Optional[str] = None) -> int:
         if not name.strip():
             raise ValueError("name is required")
         member = Member(id=None, name=name.strip(), email=(email or None), phone=(phone or None))
-        return self.repo.add_member(member)
+        member_id = self.repo.add_member(member)
+        self._emit("add", "member", member_id, name=member.name, email=member.email, phone=member.phone)
+        return member_id
 
-    def update_member(self, member_id: int, **fields) -> None:
-        self.repo.update_member(member_id, **fields)
+    def update_member(self, member_id: int, expected_version: Optional[int] = None, **fields) -> None:
+        """Edit a member; ``expected_version`` as in ``update_book``."""
+        old = self.repo.get_member(member_id) if self._listeners else None
+        self.repo.update_member(member_id, expected_version=expected_version, **fields)
+        self._emit("update", "member", member_id, self._before(old, fields), **fields)
 
     def delete_member(self, member_id: int) -> None:
+        old = self.repo.get_member(member_id) if self._listeners else None
         self.repo.delete_member(member_id)
+        self._emit("delete", "member", member_id, self._before(old))
 
-    def list_members(self, q: Optional[str] = None) -> List[Member]:
-        return self.repo.list_members(q)
+    def get_member(self, member_id: int) -> Optional[Member]:
+        return self.repo.get_member(member_id)
+
+    def list_members(self, q: Optional[str] = None, *, sort: str = "name", descending: bool = False,
+                     limit: Optional[int] = None, offset: int = 0) -> List[Member]:
+        return self.repo.list_members(q, sort=sort, descending=descending, limit=limit, offset=offset)
 
     # --- Loans ---
     def borrow_book(self, book_id: int, member_id: int, days: int = DEFAULT_LOAN_DAYS) -> int:
-        books = {b.id: b for b in self.repo.list_books()}
-        book = books.get(book_id)
+        """Lend any copy on the shelf; a member collecting their ready hold takes the shelved copy."""
+        book = self.repo.get_book(book_id)
         if not book:
             raise ValueError("book not found")
-        if book.available_copies <= 0:
+        hold = self._ready_hold(book_id, member_id)
+        if hold is None and book.available_copies <= 0:
             raise ValueError("book not available")
+        self._check_borrower(member_id)
 
         due = datetime.now() + timedelta(days=days)
-        loan_id = self.repo.create_loan(book_id, member_id, due)
-        # decrement availability
-        self.repo.update_book(book_id, available_copies=book.available_copies - 1)
+        if hold is not None:
+            return self._checkout(hold.copy_id, book_id, member_id, due, hold)
+        for _ in range(BORROW_ATTEMPTS):
+            copy = self.repo.find_available_copy(book_id)
+            if copy is None:
+                break
+            try:
+                return self._checkout(copy.id, book_id, member_id, due)
+            except ValueError:
+                continue  # lent by another desk since we looked
+        raise ValueError("book not available")
+
+    def checkout_barcode(self, barcode: str, member_id: int, days: int = DEFAULT_LOAN_DAYS) -> int:
+        """Lend the scanned item (the member's own ready hold included)."""
+        copy = self.repo.get_copy_by_barcode(barcode.strip())
+        if copy is None:
+            raise ValueError("unknown barcode")
+        if not self.repo.get_book(copy.book_id):
+            raise ValueError("book not found")
+        hold = None
+        if copy.status == COPY_ON_HOLD_SHELF:
+            hold = self._ready_hold(copy.book_id, member_id)
+            if hold is None or hold.copy_id != copy.id:
+                raise ValueError("copy is on the hold shelf for another member")
+        elif copy.status != COPY_AVAILABLE:
+            raise ValueError(f"copy is {copy.status.replace('_', ' ')}")
+        self._check_borrower(member_id)
+        return self._checkout(copy.id, copy.book_id, member_id, datetime.now() + timedelta(days=days), hold)
+
+    def _ready_hold(self, book_id: int, member_id: int) -> Optional[Hold]:
+        hold = self.repo.find_open_hold(book_id, member_id)
+        return hold if hold is not None and hold.status == HOLD_READY else None
+
+    def _check_borrower(self, member_id: int) -> None:
+        if not self.repo.get_member(member_id):
+            raise ValueError("member not found")
+        self._check_policy(member_id)
+
+    def _checkout(self, copy_id: Optional[int], book_id: int, member_id: int, due: datetime,
+                  hold: Optional[Hold] = None) -> int:
+        loan_id = None
+        if copy_id is not None:
+            loan_id = self.repo.checkout_copy(copy_id, member_id, due, hold.id if hold else None)
+        if loan_id is None:
+            raise ValueError("copy is no longer available")
+        self._emit("borrow", "loan", loan_id, book_id=book_id, member_id=member_id, due_at=due, copy_id=copy_id)
         return loan_id
 
-    def return_book(self, loan_id: int) -> None:
-        loans = {l.id: l for l in self.repo.list_active_loans()}
-        loan = loans.get(loan_id)
-        if not loan:
-            # Either already returned or invalid id—treat as no-op for UX
-            return
-        self.repo.mark_returned(loan_id)
-        # increment availability
-        books = {b.id: b for b in self.repo.list_books()}
-        book = books.get(loan.book_id)
-        if book:
-            self.repo.update_book(book.id, available_copies=book.available_copies + 1)
-
-    def list_loans(self, active_only: bool = False) -> List[Loan]:
-        return self.repo.list_active_loans() if active_only else self.repo.list_loans()
+    def _check_policy(self, member_id: int) -> None:
+        open_loans, overdue = self.repo.member_loan_stats(member_id, datetime.now())
+        if self.policy.block_on_overdue and overdue:
+            raise ValueError(f"member has {overdue} overdue item{'s' if overdue != 1 else ''}")
+        if open_loans >= self.policy.max_open_loans:
+            raise ValueError(f"member already has {open_loans} items out (limit {self.policy.max_open_loans})")
+
+    def renew_loan(self, loan_id: int, days: int = DEFAULT_LOAN_DAYS) -> datetime:
+        """Extend an active loan to ``days`` from now (never shortening it).
+
+        Returns:
+            The new due date.
+        """
+        loan = self.repo.get_loan(loan_id)
+        if loan is None or loan.returned_at is not None:
+            raise ValueError("loan is not active")
+        if loan.renewals >= self.policy.max_renewals:
+            raise ValueError(f"renewal limit reached ({self.policy.max_renewals})")
+        if self.repo.has_waiting_hold(loan.book_id):
+            raise ValueError("another member is waiting for this book")
+        due = max(loan.due_at, datetime.now() + timedelta(days=days))
+        if not self.repo.renew_loan(loan_id, due, loan.renewals):
+            raise ValueError("loan changed meanwhile; try again")
+        self._emit("renew", "loan", loan_id, {"due_at": loan.due_at},
+                   book_id=loan.book_id, member_id=loan.member_id, due_at=due)
+        return due
+
+    def return_book(self, loan_id: int) -> Optional[Hold]:
+        """Return a loan; the copy goes to the next hold, if any.
+
+        Returns:
+            The hold now waiting on the hold shelf, or None. Unknown or
+            already-returned loans are a no-op.
+        """
+        loan, hold = self.repo.return_loan(loan_id, self._shelf_deadline())
+        if loan is None:
+            return None
+        self._emit("return", "loan", loan_id, book_id=loan.book_id, member_id=loan.member_id, copy_id=loan.copy_id)
+        self._emit_ready(hold)
+        return hold
+
+    def return_barcode(self, barcode: str) -> Optional[Hold]:
+        """Check in the scanned item; see ``return_book``.
+
+        Raises:
+            ValueError: the barcode is unknown or the item is not on loan.
+        """
+        loan = self.repo.find_active_loan_by_barcode(barcode.strip())
+        if loan is None:
+            if self.repo.get_copy_by_barcode(barcode.strip()) is None:
+                raise ValueError("unknown barcode")
+            raise ValueError("copy is not on loan")
+        return self.return_book(loan.id)
+
+    def list_loans(self, active_only: bool = False, include_history: bool = False) -> List[Loan]:
+        if active_only:
+            return self.repo.list_active_loans()
+        return self.repo.list_loans(include_history=include_history)
+
+    def list_active_loans(self, *, sort: str = "loaned", descending: bool = True, overdue_only: bool = False,
+                          limit: Optional[int] = None, offset: int = 0) -> List[Loan]:
+        """Unreturned loans in ``sort`` order; ``overdue_only`` keeps those past due now."""
+        return self.repo.list_active_loans(sort=sort, descending=descending,
+                                           overdue_before=datetime.now() if overdue_only else None,
+                                           limit=limit, offset=offset)
+
+    def list_overdue(self, now: Optional[datetime] = None) -> List[Loan]:
+        return self.repo.list_overdue_loans(now)
+
+    # --- Member account ---
+    def member_loan_stats(self, member_id: int) -> Tuple[int, int]:
+        """(items out, of which overdue)."""
+        return self.repo.member_loan_stats(member_id, datetime.now())
+
+    def member_open_loans(self, member_id: int) -> List[Loan]:
+        return self.repo.member_open_loans(member_id)
+
+    def member_loan_history(self, member_id: int, limit: int = 50,
+                            cursor: Optional[HistoryCursor] = None) -> LoanPage:
+        """Returned loans, latest first; pass ``page.cursor`` back for the next page."""
+        if limit < 1:
+            raise ValueError("limit must be >= 1")
+        return self.repo.member_loan_history(member_id, limit, cursor)
+
+    # --- Holds ---
+    def _shelf_deadline(self) -> datetime:
+        return datetime.now() + timedelta(days=self.hold_shelf_days)
+
+    def _emit_ready(self, hold: Optional[Hold]) -> None:
+        if hold is not None:
+            self._emit("ready", "hold", hold.id, book_id=hold.book_id, member_id=hold.member_id,
+                       expires_at=hold.expires_at, copy_id=hold.copy_id)
+
+    def place_hold(self, book_id: int, member_id: int, priority: int = 0) -> int:
+        """Queue ``member_id`` for the next free copy; lower ``priority`` is served first."""
+        book = self.repo.get_book(book_id)
+        if not book:
+            raise ValueError("book not found")
+        if not self.repo.get_member(member_id):
+            raise ValueError("member not found")
+        if book.available_copies > 0:
+            raise ValueError("book is available; borrow it instead")
+        try:
+            hold_id = self.repo.place_hold(book_id, member_id, priority)
+        except sqlite3.IntegrityError:
+            raise ValueError("member already has a hold on this book") from None
+        self._emit("add", "hold", hold_id, book_id=book_id, member_id=member_id, priority=priority)
+        return hold_id
+
+    def cancel_hold(self, hold_id: int) -> Optional[Hold]:
+        """Cancel an open hold; returns the hold that inherited its shelved copy, if any."""
+        hold = self.repo.get_hold(hold_id)
+        if hold is None or hold.status not in (HOLD_WAITING, HOLD_READY):
+            return None
+        nxt = self.repo.cancel_hold(hold_id, self._shelf_deadline())
+        self._emit("cancel", "hold", hold_id, book_id=hold.book_id, member_id=hold.member_id)
+        self._emit_ready(nxt)
+        return nxt
+
+    def list_holds(self, book_id: Optional[int] = None, member_id: Optional[int] = None) -> List[Hold]:
+        return self.repo.list_holds(book_id, member_id)
+
+    def expire_holds(self, now: Optional[datetime] = None, batch_size: int = 100) -> int:
+        """Expire shelved holds past their pickup date, passing each copy on.
+
+        Works in batches of ``batch_size`` (one transaction each).
+
+        Returns:
+            Number of holds expired.
+        """
+        now = now or datetime.now()
+        expired = 0
+        while True:
+            pairs = self.repo.expire_holds(now, now + timedelta(days=self.hold_shelf_days), batch_size)
+            for hold, nxt in pairs:
+                self._emit("expire", "hold", hold.id, book_id=hold.book_id, member_id=hold.member_id)
+                self._emit_ready(nxt)
+            expired += len(pairs)
+            if len(pairs) < batch_size:
+                return expired
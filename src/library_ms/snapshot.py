@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: snapshot.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Read-only, column-oriented catalog snapshot for offline kiosk search. The
+exporter writes the books table as integer arrays, offset-indexed UTF-8
+string heaps and a sorted token -> row posting index; the reader mmaps the
+file and searches it without materialising per-row objects.
+
+Usage: 
+python -m library_ms.snapshot export catalog.lmsc
+python -m library_ms.snapshot search catalog.lmsc "tolkien ring"
+
+Notes: 
+- Rows are stored in title order, so search hits come back title-sorted.
+- Files use native byte order; the reader refuses files from the other kind.
+
+===================================================================
+"""
+from __future__ import annotations
+
+import argparse
+import mmap
+import re
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .db import get_connection
+from .models import Book
+
+MAGIC = b"LMSCAT01"
+FORMAT_VERSION = 1
+
+# Section order is part of the file format; append only.
+_SECTIONS = (
+    "ids", "year", "total", "avail", "version",
+    "isbn_off", "isbn_heap", "title_off", "title_heap", "author_off", "author_heap",
+    "tok_off", "tok_heap", "post_off", "postings",
+)
+_TYPECODES = {
+    "ids": "q", "year": "i", "total": "i", "avail": "i", "version": "i",
+    "isbn_off": "I", "title_off": "I", "author_off": "I",
+    "tok_off": "I", "post_off": "I", "postings": "I",
+}
+# magic, version, byteorder flag, row count, token count
+_HEADER = struct.Struct("<8sIIII")
+_SECTION = struct.Struct("<QQ")
+_LITTLE = 1 if sys.byteorder == "little" else 0
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _heap(values: Iterable[str]) -> Tuple[array, bytes]:
+    offsets = array("I", [0])
+    buf = bytearray()
+    for v in values:
+        buf += v.encode("utf-8")
+        offsets.append(len(buf))
+    return offsets, bytes(buf)
+
+
+def _build_sections(rows: Sequence[tuple]) -> Tuple[Dict[str, bytes], int]:
+    cols = list(zip(*rows)) if rows else [()] * 8
+    ids, isbns, titles, authors, years, totals, avails, versions = cols
+
+    postings_by_token: Dict[bytes, Set[int]] = {}
+    for i, (isbn, title, author) in enumerate(zip(isbns, titles, authors)):
+        for tok in tokenize(f"{title} {author} {isbn.replace('-', '')}"):
+            postings_by_token.setdefault(tok.encode("utf-8"), set()).add(i)
+    tokens = sorted(postings_by_token)
+
+    tok_off = array("I", [0])
+    tok_heap = bytearray()
+    post_off = array("I", [0])
+    postings = array("I")
+    for tok in tokens:
+        tok_heap += tok
+        tok_off.append(len(tok_heap))
+        postings.extend(sorted(postings_by_token[tok]))
+        post_off.append(len(postings))
+
+    isbn_off, isbn_heap = _heap(isbns)
+    title_off, title_heap = _heap(titles)
+    author_off, author_heap = _heap(authors)
+    sections = {
+        "ids": array("q", ids).tobytes(),
+        "year": array("i", (y or 0 for y in years)).tobytes(),
+        "total": array("i", totals).tobytes(),
+        "avail": array("i", avails).tobytes(),
+        "version": array("i", versions).tobytes(),
+        "isbn_off": isbn_off.tobytes(), "isbn_heap": isbn_heap,
+        "title_off": title_off.tobytes(), "title_heap": title_heap,
+        "author_off": author_off.tobytes(), "author_heap": author_heap,
+        "tok_off": tok_off.tobytes(), "tok_heap": bytes(tok_heap),
+        "post_off": post_off.tobytes(), "postings": postings.tobytes(),
+    }
+    return sections, len(tokens)
+
+
+def export_snapshot(out_path: str | Path, db_path: Optional[str] = None) -> int:
+    """Write the books table to a columnar snapshot file.
+
+    Returns:
+        Number of books written.
+    """
+    with get_connection(db_path) as conn:
+        rows = conn.execute(
+            """
+            SELECT id, isbn, title, author, year, total_copies, available_copies, version
+            FROM books WHERE deleted_at IS NULL ORDER BY title COLLATE NOCASE, id
+            """
+        ).fetchall()
+    sections, n_tokens = _build_sections(rows)
+
+    out_path = Path(out_path)
+    tmp = out_path.with_name(out_path.name + ".part")
+    table_at = _HEADER.size
+    offset = table_at + _SECTION.size * len(_SECTIONS)
+    layout = []
+    for name in _SECTIONS:
+        offset += -offset % 8  # keep integer columns aligned
+        layout.append((offset, len(sections[name])))
+        offset += len(sections[name])
+
+    with tmp.open("wb") as fh:
+        fh.write(_HEADER.pack(MAGIC, FORMAT_VERSION, _LITTLE, len(rows), n_tokens))
+        for off, length in layout:
+            fh.write(_SECTION.pack(off, length))
+        for name, (off, _) in zip(_SECTIONS, layout):
+            fh.write(b"\0" * (off - fh.tell()))
+            fh.write(sections[name])
+    tmp.replace(out_path)
+    return len(rows)
+
+
+class CatalogSnapshot:
+    """mmap-backed reader for files written by :func:`export_snapshot`.
+
+    Column access is by row index (0..len-1); strings are decoded on demand.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self._fh = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._fh.close()
+            raise ValueError(f"not a catalog snapshot: {path}")
+        if len(self._mm) < _HEADER.size:
+            self.close()
+            raise ValueError(f"not a catalog snapshot: {path}")
+        magic, version, little, self.row_count, self.token_count = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"not a catalog snapshot: {path}")
+        if little != _LITTLE:
+            self.close()
+            raise ValueError("snapshot was written on a machine with a different byte order")
+
+        buf = memoryview(self._mm)
+        self._views: Dict[str, memoryview] = {}
+        for i, name in enumerate(_SECTIONS):
+            off, length = _SECTION.unpack_from(self._mm, _HEADER.size + i * _SECTION.size)
+            view = buf[off:off + length]
+            code = _TYPECODES.get(name)
+            self._views[name] = view.cast(code) if code else view
+        buf.release()
+        v = self._views
+        self._ids, self._year, self._total, self._avail = v["ids"], v["year"], v["total"], v["avail"]
+        self._version = v["version"]
+
+    # --- lifecycle ---
+    def close(self) -> None:
+        for view in getattr(self, "_views", {}).values():
+            view.release()
+        self._views = {}
+        if not self._mm.closed:
+            self._mm.close()
+        self._fh.close()
+
+    def __enter__(self) -> "CatalogSnapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    # --- columns ---
+    def _string(self, column: str, i: int) -> str:
+        off = self._views[f"{column}_off"]
+        return bytes(self._views[f"{column}_heap"][off[i]:off[i + 1]]).decode("utf-8")
+
+    def book_id(self, i: int) -> int:
+        return self._ids[i]
+
+    def isbn(self, i: int) -> str:
+        return self._string("isbn", i)
+
+    def title(self, i: int) -> str:
+        return self._string("title", i)
+
+    def author(self, i: int) -> str:
+        return self._string("author", i)
+
+    def year(self, i: int) -> Optional[int]:
+        return self._year[i] or None
+
+    def available(self, i: int) -> int:
+        return self._avail[i]
+
+    def version(self, i: int) -> int:
+        return self._version[i]
+
+    def row(self, i: int) -> tuple:
+        """Return a row in ``Book`` field order."""
+        return (self._ids[i], self.isbn(i), self.title(i), self.author(i),
+                self.year(i), self._total[i], self._avail[i], self._version[i])
+
+    def book(self, i: int) -> Book:
+        return Book(*self.row(i))
+
+    # --- search ---
+    def _token(self, t: int) -> bytes:
+        off = self._views["tok_off"]
+        return bytes(self._views["tok_heap"][off[t]:off[t + 1]])
+
+    def _tokens_with_prefix(self, prefix: bytes) -> range:
+        lo = bisect_left(range(self.token_count), prefix, key=self._token)
+        hi = lo
+        while hi < self.token_count and self._token(hi).startswith(prefix):
+            hi += 1
+        return range(lo, hi)
+
+    def _postings(self, t: int) -> memoryview:
+        off = self._views["post_off"]
+        return self._views["postings"][off[t]:off[t + 1]]
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[int]:
+        """Return row indices matching every query token as a prefix.
+
+        Results are in title order. An empty query matches nothing.
+        """
+        result: Optional[Set[int]] = None
+        for tok in tokenize(query):
+            hits: Set[int] = set()
+            for t in self._tokens_with_prefix(tok.encode("utf-8")):
+                hits.update(self._postings(t))
+            result = hits if result is None else result & hits
+            if not result:
+                return []
+        rows = sorted(result or ())
+        return rows[:limit] if limit is not None else rows
+
+    def search_ids(self, query: str, limit: Optional[int] = None) -> List[int]:
+        return [self._ids[i] for i in self.search(query, limit)]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="library_ms.snapshot", description="Kiosk catalog snapshots")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_exp = sub.add_parser("export", help="write a snapshot of the books table")
+    p_exp.add_argument("out")
+    p_exp.add_argument("--db", default=None, help="database path (default: ./library.db)")
+    p_search = sub.add_parser("search", help="search a snapshot")
+    p_search.add_argument("snapshot")
+    p_search.add_argument("query")
+    p_search.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.cmd == "export":
+        print(f"wrote {export_snapshot(args.out, args.db)} books to {args.out}")
+        return
+    with CatalogSnapshot(args.snapshot) as snap:
+        for i in snap.search(args.query, args.limit):
+            print(f"{snap.isbn(i)}\t{snap.title(i)}\t{snap.author(i)}\tavailable={snap.available(i)}")
+
+
+if __name__ == "__main__":
+    main()
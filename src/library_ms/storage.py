@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: storage.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Storage profile tooling. ``tune`` copies the local database to a temp file
+and times a desk-like read/write workload under every profile in
+db.PROFILES, then recommends one; ``maintain`` runs PRAGMA optimize and a
+WAL checkpoint, once or on an interval.
+
+Usage: 
+python -m library_ms.storage show
+python -m library_ms.storage tune --db library.db --rounds 5
+python -m library_ms.storage maintain --checkpoint TRUNCATE --interval 3600
+
+Notes: 
+- Tuning never touches the live database; writes go to the copy.
+- Only durable profiles are recommended (bulk-import is for one-off loads).
+
+===================================================================
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sqlite3
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from .db import PROFILES, configure_connections, get_connection, get_db_path, storage_profile
+from .repository import LibraryRepository
+
+CHECKPOINT_MODES = ("PASSIVE", "FULL", "RESTART", "TRUNCATE")
+# Rows sampled per workload round (book/member ids, title words).
+SAMPLE_BOOKS = 50
+SAMPLE_MEMBERS = 20
+SAMPLE_WORDS = 5
+
+
+@dataclass(slots=True)
+class MaintenanceResult:
+    wal_pages: int
+    checkpointed: int
+    busy: bool  # a reader or writer kept the checkpoint from finishing
+    elapsed: float
+
+
+@dataclass(slots=True)
+class ProfileTiming:
+    profile: str
+    read_ms: float
+    write_ms: Optional[float]  # None for read-only profiles
+
+
+@dataclass(slots=True)
+class TuneReport:
+    timings: List[ProfileTiming]
+    recommended: str
+
+    def format(self) -> str:
+        lines = [f"{'profile':<16}{'reads ms':>10}{'writes ms':>11}"]
+        for t in self.timings:
+            writes = f"{t.write_ms:>11.1f}" if t.write_ms is not None else f"{'-':>11}"
+            mark = "  <- recommended" if t.profile == self.recommended else ""
+            lines.append(f"{t.profile:<16}{t.read_ms:>10.1f}{writes}{mark}")
+        return "\n".join(lines)
+
+
+def run_maintenance(db_path: Optional[str] = None, checkpoint: str = "PASSIVE") -> MaintenanceResult:
+    """Refresh planner statistics where stale and checkpoint the WAL.
+
+    Args:
+        checkpoint: wal_checkpoint mode. PASSIVE never waits; TRUNCATE also
+            shrinks the -wal file but waits for readers.
+    """
+    mode = checkpoint.upper()
+    if mode not in CHECKPOINT_MODES:
+        raise ValueError(f"checkpoint must be one of {', '.join(CHECKPOINT_MODES)}")
+    if storage_profile().query_only:
+        raise ValueError(f"storage profile {storage_profile().name} is read-only")
+    start = time.perf_counter()
+    with get_connection(db_path) as conn:
+        conn.execute("PRAGMA analysis_limit = 400;")  # bound ANALYZE on large tables
+        conn.execute("PRAGMA optimize;")
+        busy, wal_pages, checkpointed = conn.execute(f"PRAGMA wal_checkpoint({mode});").fetchone()
+    return MaintenanceResult(wal_pages, checkpointed, bool(busy), time.perf_counter() - start)
+
+
+def _copy_database(src: Path, dst: Path) -> None:
+    source = sqlite3.connect(src)
+    target = sqlite3.connect(dst)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def _time_workload(path: str, rounds: int, writes: bool, seed: int) -> ProfileTiming:
+    repo = LibraryRepository(path)
+    rng = random.Random(seed)
+    now = datetime.now()
+    books = repo.list_books()
+    members = repo.list_members()
+    book_ids = [b.id for b in rng.sample(books, min(SAMPLE_BOOKS, len(books)))]
+    member_ids = [m.id for m in rng.sample(members, min(SAMPLE_MEMBERS, len(members)))]
+    words = [b.title.split()[0] for b in rng.sample(books, min(SAMPLE_WORDS, len(books))) if b.title.split()]
+
+    best_read = best_write = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        repo.list_books()
+        for w in words:
+            repo.list_books(w)
+        repo.list_members()
+        repo.list_loan_rows(include_history=True)
+        repo.list_overdue_loans(now)
+        for book_id in book_ids:
+            repo.get_book(book_id)
+        for member_id in member_ids:
+            repo.member_loan_stats(member_id, now)
+            repo.member_loan_history(member_id, limit=20)
+        best_read = min(best_read, time.perf_counter() - start)
+
+        if writes:
+            start = time.perf_counter()
+            for book_id in book_ids:
+                book = repo.get_book(book_id)
+                repo.update_book(book_id, available_copies=book.available_copies)  # one commit each
+            best_write = min(best_write, time.perf_counter() - start)
+    return ProfileTiming("", best_read * 1000, best_write * 1000 if writes else None)
+
+
+def tune(db_path: Optional[str] = None, rounds: int = 3, profiles: Optional[Sequence[str]] = None,
+         readonly: bool = False, seed: int = 0) -> TuneReport:
+    """Time every profile on a copy of the database and pick the fastest suitable one.
+
+    Args:
+        rounds: Workload repetitions per profile; the best round counts.
+        profiles: Names to compare (default: all).
+        readonly: Recommend for a read-only terminal: read-only profiles
+            qualify and only read time counts.
+    """
+    if rounds < 1:
+        raise ValueError("rounds must be >= 1")
+    names = list(profiles or PROFILES)
+    unknown = [n for n in names if n not in PROFILES]
+    if unknown:
+        raise ValueError(f"unknown storage profile: {', '.join(unknown)}")
+    src = get_db_path(db_path)
+    if not src.exists():
+        raise ValueError(f"database not found: {src}")
+
+    previous = storage_profile()
+    timings: List[ProfileTiming] = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="library-tune-") as tmp:
+            for name in names:
+                # Fresh copy per profile so earlier runs don't warm or grow it.
+                copy = Path(tmp) / f"{name}.db"
+                _copy_database(src, copy)
+                profile = PROFILES[name]
+                configure_connections(profile=profile)
+                timing = _time_workload(str(copy), rounds, writes=not profile.query_only, seed=seed)
+                timing.profile = name
+                timings.append(timing)
+    finally:
+        configure_connections(profile=previous)
+
+    def score(t: ProfileTiming) -> float:
+        return t.read_ms if readonly else t.read_ms + (t.write_ms or 0.0)
+
+    candidates = [
+        t for t in timings
+        if PROFILES[t.profile].durable and (readonly or not PROFILES[t.profile].query_only)
+    ]
+    if not candidates:
+        raise ValueError("none of the compared profiles is suitable; include desk or reporting")
+    return TuneReport(timings, min(candidates, key=score).profile)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="library_ms.storage", description="Storage profiles and maintenance")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("show", help="list storage profiles")
+    p_tune = sub.add_parser("tune", help="benchmark profiles on a copy of the database")
+    p_tune.add_argument("--db", default=None, help="database path (default: ./library.db)")
+    p_tune.add_argument("--rounds", type=int, default=3)
+    p_tune.add_argument("--profile", action="append", dest="profiles", help="compare only these (repeatable)")
+    p_tune.add_argument("--readonly", action="store_true", help="recommend for a read-only kiosk")
+    p_maint = sub.add_parser("maintain", help="PRAGMA optimize and WAL checkpoint")
+    p_maint.add_argument("--db", default=None, help="database path (default: ./library.db)")
+    p_maint.add_argument("--checkpoint", default="PASSIVE", choices=CHECKPOINT_MODES)
+    p_maint.add_argument("--interval", type=float, default=0, help="repeat every N seconds (0 = once)")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "show":
+        current = storage_profile().name
+        for p in PROFILES.values():
+            print(f"{'*' if p.name == current else ' '} {p.name:<16}cache={p.cache_kib}KiB mmap={p.mmap_mib}MiB "
+                  f"temp_store={p.temp_store} wal_autocheckpoint={p.wal_autocheckpoint} "
+                  f"synchronous={p.synchronous}{' query_only' if p.query_only else ''}")
+        return
+    if args.cmd == "tune":
+        print(tune(args.db, args.rounds, args.profiles, args.readonly).format())
+        return
+    while True:
+        r = run_maintenance(args.db, args.checkpoint)
+        print(f"optimized; checkpointed {r.checkpointed}/{r.wal_pages} WAL pages"
+              f"{' (busy)' if r.busy else ''} in {r.elapsed * 1000:.0f} ms", flush=True)
+        if args.interval <= 0:
+            return
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: typeahead.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Typeahead indexes for the book and member pickers. Built once in a
+background thread, then kept fresh from LibraryService write events so
+suggestions never hit SQLite while staff type.
+
+Usage: 
+from library_ms.typeahead import CatalogTypeahead
+ta = CatalogTypeahead(service); ta.start()
+ta.suggest_members("ali")
+
+Notes: 
+- Until the first build completes, suggestions are simply empty.
+
+===================================================================
+"""
+from __future__ import annotations
+
+import threading
+from typing import List, Optional, Tuple
+
+from .models import Book, Member
+from .services import LibraryService, ServiceEvent
+from .utils.prefix_index import PrefixIndex, terms_for
+
+
+def book_entry(b: Book) -> Tuple[int, str, List[str]]:
+    return b.id, f"{b.title} ({b.isbn})", terms_for(b.title, b.author, b.isbn.replace("-", ""))
+
+
+def member_entry(m: Member) -> Tuple[int, str, List[str]]:
+    label = f"{m.name} <{m.email}>" if m.email else m.name
+    return m.id, label, terms_for(m.name, m.email)
+
+
+class CatalogTypeahead:
+    """Book and member prefix indexes tied to a service."""
+
+    def __init__(self, service: LibraryService) -> None:
+        self.service = service
+        self.books = PrefixIndex()
+        self.members = PrefixIndex()
+        self.ready = threading.Event()
+        self._lock = threading.Lock()
+        self._pending: Optional[List[ServiceEvent]] = None
+        self._unsubscribe = service.subscribe(self._on_event)
+
+    # --- building ---
+    def start(self) -> threading.Thread:
+        """Build both indexes in a daemon thread."""
+        t = threading.Thread(target=self.rebuild, name="typeahead-build", daemon=True)
+        t.start()
+        return t
+
+    def rebuild(self) -> None:
+        with self._lock:
+            self._pending = []  # queue events that race with the bulk load
+        books = PrefixIndex.build(book_entry(b) for b in self.service.list_books())
+        members = PrefixIndex.build(member_entry(m) for m in self.service.list_members())
+        with self._lock:
+            self.books, self.members = books, members
+            pending, self._pending = self._pending or [], None
+        for event in pending:
+            self._apply(event)
+        self.ready.set()
+
+    def close(self) -> None:
+        self._unsubscribe()
+
+    # --- freshness ---
+    def _on_event(self, event: ServiceEvent) -> None:
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(event)
+                return
+        self._apply(event)
+
+    def _apply(self, event: ServiceEvent) -> None:
+        # Loans only move availability counters, which the pickers don't show.
+        if event.entity == "book":
+            if event.action == "delete":
+                self.books.remove(event.entity_id)
+            elif {"isbn", "title", "author"} & event.fields.keys():
+                book = self.service.repo.get_book(event.entity_id)
+                if book:
+                    self.books.put(*book_entry(book))
+        elif event.entity == "member":
+            if event.action == "delete":
+                self.members.remove(event.entity_id)
+            elif {"name", "email"} & event.fields.keys():
+                member = self.service.repo.get_member(event.entity_id)
+                if member:
+                    self.members.put(*member_entry(member))
+
+    # --- queries ---
+    def suggest_books(self, text: str, limit: int = 10) -> List[Tuple[int, str]]:
+        return self.books.search(text, limit)
+
+    def suggest_members(self, text: str, limit: int = 10) -> List[Tuple[int, str]]:
+        return self.members.search(text, limit)
@@ -26,9 +26,22 @@ from __future__ import annotations
 import tkinter as tk
 from tkinter import ttk
 
+from ..repository import VersionConflictError
 from ..services import LibraryService
 from ..utils.validators import is_valid_isbn
-from .widgets import LabeledEntry, ask_confirm, alert_error
+from .widgets import LabeledEntry, SortedWindow, ask_confirm, ask_overwrite, alert_error
+
+# Heading -> repository sort key; the Total column is not sortable.
+SORTABLE = {"isbn": "isbn", "title": "title", "author": "author", "year": "year", "avail": "available"}
+
+
+def _year(text: str) -> int | None:
+    text = text.strip()
+    if not text:
+        return None
+    if not text.lstrip("-").isdigit():
+        raise ValueError(f"year must be a number: {text!r}")
+    return int(text)
 
 
 class BooksView(ttk.Frame):
@@ -36,7 +49,6 @@ class BooksView(ttk.Frame):
         super().__init__(master)
         self.service = service
         self._build_ui()
-        self.refresh()
 
     def _build_ui(self) -> None:
         # Search bar
@@ -45,11 +57,28 @@ class BooksView(ttk.Frame):
         search_entry = ttk.Entry(top, textvariable=self.search_var)
         btn_search = ttk.Button(top, text="Search", command=self.refresh)
         btn_add = ttk.Button(top, text="Add", command=self._open_add)
+        search_entry.bind("<Return>", lambda _e: self.refresh())
         search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 8))
         btn_search.pack(side=tk.LEFT, padx=(0, 8))
         btn_add.pack(side=tk.LEFT)
         top.pack(fill=tk.X, pady=(0, 8))
 
+        # Filters (applied by the database, like the sort)
+        filters = ttk.Frame(self)
+        self.available_var = tk.BooleanVar(value=False)
+        self.year_from_var = tk.StringVar()
+        self.year_to_var = tk.StringVar()
+        ttk.Checkbutton(filters, text="Available only", variable=self.available_var,
+                        command=self.refresh).pack(side=tk.LEFT, padx=(0, 16))
+        ttk.Label(filters, text="Year from").pack(side=tk.LEFT, padx=(0, 4))
+        for var, label in ((self.year_from_var, "to"), (self.year_to_var, None)):
+            entry = ttk.Entry(filters, textvariable=var, width=6)
+            entry.bind("<Return>", lambda _e: self.refresh())
+            entry.pack(side=tk.LEFT, padx=(0, 4))
+            if label:
+                ttk.Label(filters, text=label).pack(side=tk.LEFT, padx=(0, 4))
+        filters.pack(fill=tk.X, pady=(0, 8))
+
         # Table
         self.tree = ttk.Treeview(self, columns=("isbn", "title", "author", "year", "copies", "avail"), show="headings")
         for col, text in (
@@ -66,17 +95,26 @@ class BooksView(ttk.Frame):
 
         # Actions
         btns = ttk.Frame(self)
+        btn_more = ttk.Button(btns, text="More", state=tk.DISABLED)
+        btn_more.pack(side=tk.LEFT, padx=(0, 24))
         ttk.Button(btns, text="Edit", command=self._open_edit).pack(side=tk.LEFT, padx=(0, 8))
         ttk.Button(btns, text="Delete", command=self._delete_selected).pack(side=tk.LEFT)
         btns.pack(anchor="e", pady=(8, 0))
+        self.window = SortedWindow(self.tree, SORTABLE, "title", False, self._fetch, self._insert, btn_more)
 
     def refresh(self) -> None:
-        q = self.search_var.get().strip() or None
-        books = self.service.list_books(q)
-        for i in self.tree.get_children():
-            self.tree.delete(i)
-        for b in books:
-            self.tree.insert("", tk.END, iid=str(b.id), values=(b.isbn, b.title, b.author, b.year or "", b.total_copies, b.available_copies))
+        self.window.reload()
+
+    def _fetch(self, sort: str, descending: bool, limit: int, offset: int):
+        return self.service.list_books(
+            self.search_var.get().strip() or None, sort=sort, descending=descending,
+            available_only=self.available_var.get(),
+            year_from=_year(self.year_from_var.get()), year_to=_year(self.year_to_var.get()),
+            limit=limit, offset=offset,
+        )
+
+    def _insert(self, b) -> None:
+        self.tree.insert("", tk.END, iid=str(b.id), values=(b.isbn, b.title, b.author, b.year or "", b.total_copies, b.available_copies))
 
     # --- Dialogs ---
     def _open_add(self) -> None:
@@ -104,6 +142,7 @@ class BookDialog(tk.Toplevel):
         super().__init__(master)
         self.service = service
         self.book_id = book_id
+        self.version: int | None = None  # version the form was loaded from
         self.on_saved = on_saved
         self.title("Add Book" if not book_id else "Edit Book")
         self.resizable(False, False)
@@ -122,14 +161,18 @@ class BookDialog(tk.Toplevel):
         btns.grid(row=10, column=0, sticky="e", padx=12, pady=8)
 
         if book_id is not None:
-            # Pre-fill from repo
-            book = next((b for b in self.service.list_books() if b.id == book_id), None)
-            if book:
-                self.e_isbn.set(book.isbn)
-                self.e_title.set(book.title)
-                self.e_author.set(book.author)
-                self.e_year.set(str(book.year or ""))
-                self.e_copies.set(str(book.total_copies))
+            self._load()
+
+    def _load(self) -> None:
+        """Pre-fill from repo and remember the version being edited."""
+        book = self.service.get_book(self.book_id)
+        if book:
+            self.version = book.version
+            self.e_isbn.set(book.isbn)
+            self.e_title.set(book.title)
+            self.e_author.set(book.author)
+            self.e_year.set(str(book.year or ""))
+            self.e_copies.set(str(book.total_copies))
 
     def _save(self) -> None:
         isbn = self.e_isbn.get().strip()
@@ -147,9 +190,24 @@ class BookDialog(tk.Toplevel):
             if self.book_id is None:
                 self.service.add_book(isbn=isbn, title=title, author=author, year=y, copies=c)
             else:
-                self.service.update_book(self.book_id, isbn=isbn, title=title, author=author, year=y, total_copies=c)
+                self.service.update_book(self.book_id, expected_version=self.version,
+                                         isbn=isbn, title=title, author=author, year=y, total_copies=c)
             if callable(self.on_saved):
                 self.on_saved()
             self.destroy()
+        except VersionConflictError as ex:
+            self._resolve_conflict(ex)
         except ValueError as ex:
             alert_error(str(ex))
+
+    def _resolve_conflict(self, ex: VersionConflictError) -> None:
+        if ex.current is None:
+            alert_error(str(ex))
+            if callable(self.on_saved):
+                self.on_saved()
+            self.destroy()
+        elif ask_overwrite("book", str(ex)):
+            self.version = ex.current
+            self._save()
+        else:
+            self._load()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: views_branches.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Cross-branch catalog search with a branch filter.
+
+Usage: 
+Added to the main Notebook when LIBRARY_MS_BRANCHES is configured.
+
+Notes: 
+- Read-only; lending still happens in the local Books/Loans tabs.
+
+===================================================================
+"""
+from __future__ import annotations
+
+import tkinter as tk
+from tkinter import ttk
+
+from ..federation import FederatedRepository
+from .widgets import alert_error
+
+ALL_BRANCHES = "All branches"
+
+
+class BranchesView(ttk.Frame):
+    def __init__(self, master: tk.Widget, federation: FederatedRepository) -> None:
+        super().__init__(master)
+        self.federation = federation
+        self._build_ui()
+
+    def _build_ui(self) -> None:
+        top = ttk.Frame(self)
+        self.search_var = tk.StringVar()
+        self.branch_var = tk.StringVar(value=ALL_BRANCHES)
+        search_entry = ttk.Entry(top, textvariable=self.search_var)
+        branch_box = ttk.Combobox(
+            top, textvariable=self.branch_var, state="readonly",
+            values=[ALL_BRANCHES, *self.federation.names], width=18,
+        )
+        branch_box.bind("<<ComboboxSelected>>", lambda _e: self.refresh())
+        search_entry.bind("<Return>", lambda _e: self.refresh())
+        btn_search = ttk.Button(top, text="Search", command=self.refresh)
+        search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 8))
+        branch_box.pack(side=tk.LEFT, padx=(0, 8))
+        btn_search.pack(side=tk.LEFT)
+        top.pack(fill=tk.X, pady=(0, 8))
+
+        self.tree = ttk.Treeview(self, columns=("branch", "isbn", "title", "author", "year", "avail"), show="headings")
+        for col, text in (
+            ("branch", "Branch"),
+            ("isbn", "ISBN"),
+            ("title", "Title"),
+            ("author", "Author"),
+            ("year", "Year"),
+            ("avail", "Available"),
+        ):
+            self.tree.heading(col, text=text)
+            self.tree.column(col, width=100, anchor=tk.W)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+
+    def refresh(self) -> None:
+        q = self.search_var.get().strip() or None
+        branch = self.branch_var.get()
+        branches = None if branch == ALL_BRANCHES else [branch]
+        try:
+            results = self.federation.search_books(q, branches=branches)
+        except Exception as ex:  # a branch file may be missing or locked
+            alert_error(str(ex))
+            return
+        for i in self.tree.get_children():
+            self.tree.delete(i)
+        for r in results:
+            b = r.book
+            self.tree.insert("", tk.END, iid=f"{r.branch}:{b.id}",
+                             values=(r.branch, b.isbn, b.title, b.author, b.year or "", b.available_copies))
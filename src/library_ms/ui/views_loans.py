@@ -11,7 +11,9 @@ License: MIT License (see LICENSE file for details)
 =================================================================== 
 
 Description: 
-Loans management view: list active loans, borrow and return.
+Loans management view: list active loans, borrow and return, by book or by
+scanning an item barcode. Book and member pickers autocomplete from the
+in-memory typeahead index.
 
 Usage: 
 Used inside the main Tkinter Notebook.
@@ -26,23 +28,28 @@ from __future__ import annotations
 import tkinter as tk
 from datetime import datetime
 from tkinter import ttk
+from typing import Optional
 
+from ..models import Hold
 from ..services import LibraryService, DEFAULT_LOAN_DAYS
-from .widgets import LabeledEntry, alert_error
+from ..typeahead import CatalogTypeahead
+from .widgets import AutocompleteEntry, LabeledEntry, SortedWindow, alert_error, alert_info, ask_confirm
 
 
 class LoansView(ttk.Frame):
-    def __init__(self, master: tk.Widget, service: LibraryService) -> None:
+    def __init__(self, master: tk.Widget, service: LibraryService,
+                 typeahead: Optional[CatalogTypeahead] = None) -> None:
         super().__init__(master)
         self.service = service
+        self.typeahead = typeahead
         self._build_ui()
-        self.refresh()
 
     def _build_ui(self) -> None:
         # Borrow form
         form = ttk.LabelFrame(self, text="Borrow Book")
-        self.e_book_id = LabeledEntry(form, "Book ID:", width=12)
-        self.e_member_id = LabeledEntry(form, "Member ID:", width=12)
+        ta = self.typeahead
+        self.e_book_id = AutocompleteEntry(form, "Book:", ta.suggest_books if ta else (lambda _t: []), width=28)
+        self.e_member_id = AutocompleteEntry(form, "Member:", ta.suggest_members if ta else (lambda _t: []), width=28)
         self.e_days = LabeledEntry(form, "Days:", width=6)
         self.e_days.set(str(DEFAULT_LOAN_DAYS))
         self.e_book_id.grid(row=0, column=0, padx=8, pady=4, sticky="ew")
@@ -51,6 +58,16 @@ class LoansView(ttk.Frame):
         ttk.Button(form, text="Borrow", command=self._borrow).grid(row=0, column=3, padx=8)
         form.pack(fill=tk.X, pady=(0, 8))
 
+        # Barcode desk: a scanner types the code and presses Enter (check in);
+        # Check Out lends the item to the member picked above.
+        scan = ttk.LabelFrame(self, text="Scan Item")
+        self.e_barcode = LabeledEntry(scan, "Barcode:", width=24)
+        self.e_barcode.grid(row=0, column=0, padx=8, pady=4, sticky="ew")
+        self.e_barcode.entry.bind("<Return>", lambda _e: self._checkin_barcode())
+        ttk.Button(scan, text="Check Out", command=self._checkout_barcode).grid(row=0, column=1, padx=8)
+        ttk.Button(scan, text="Check In", command=self._checkin_barcode).grid(row=0, column=2, padx=8)
+        scan.pack(fill=tk.X, pady=(0, 8))
+
         # Active loans table
         self.tree = ttk.Treeview(self, columns=("loan_id", "book_id", "member_id", "loaned_at", "due_at"), show="headings")
         for col, text in (
@@ -64,29 +81,80 @@ class LoansView(ttk.Frame):
             self.tree.column(col, width=100, anchor=tk.W)
         self.tree.pack(fill=tk.BOTH, expand=True)
 
-        ttk.Button(self, text="Return Selected", command=self._return_selected).pack(anchor="e", pady=(8, 0))
+        btns = ttk.Frame(self)
+        self.overdue_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(btns, text="Overdue only", variable=self.overdue_var,
+                        command=self.refresh).pack(side=tk.LEFT, padx=(0, 16))
+        btn_more = ttk.Button(btns, text="More", state=tk.DISABLED)
+        btn_more.pack(side=tk.LEFT, padx=(0, 24))
+        ttk.Button(btns, text="Return Selected", command=self._return_selected).pack(side=tk.LEFT)
+        btns.pack(anchor="e", pady=(8, 0))
+        self.window = SortedWindow(self.tree, {"loaned_at": "loaned", "due_at": "due"}, "loaned", True,
+                                   self._fetch, self._insert, btn_more)
 
     def refresh(self) -> None:
-        loans = self.service.list_loans(active_only=True)
-        for i in self.tree.get_children():
-            self.tree.delete(i)
-        for l in loans:
-            self.tree.insert("", tk.END, iid=str(l.id), values=(l.id, l.book_id, l.member_id, l.loaned_at.strftime("%Y-%m-%d %H:%M"), l.due_at.strftime("%Y-%m-%d")))
+        self.window.reload()
+
+    def _fetch(self, sort: str, descending: bool, limit: int, offset: int):
+        return self.service.list_active_loans(sort=sort, descending=descending, overdue_only=self.overdue_var.get(),
+                                              limit=limit, offset=offset)
+
+    def _insert(self, l) -> None:
+        self.tree.insert("", tk.END, iid=str(l.id), values=(l.id, l.book_id, l.member_id, l.loaned_at.strftime("%Y-%m-%d %H:%M"), l.due_at.strftime("%Y-%m-%d")))
 
     def _borrow(self) -> None:
         try:
-            book_id = int(self.e_book_id.get())
-            member_id = int(self.e_member_id.get())
+            book_id = self.e_book_id.get_id()
+            member_id = self.e_member_id.get_id()
             days = int(self.e_days.get())
             self.service.borrow_book(book_id, member_id, days)
             self.refresh()
+        except ValueError as ex:
+            if str(ex) == "book not available" and ask_confirm(
+                "Place Hold", "No copy is available. Place a hold for this member?"
+            ):
+                self._place_hold(book_id, member_id)
+            else:
+                alert_error(str(ex))
+
+    def _checkout_barcode(self) -> None:
+        try:
+            self.service.checkout_barcode(self.e_barcode.get(), self.e_member_id.get_id(), int(self.e_days.get()))
         except ValueError as ex:
             alert_error(str(ex))
+            return
+        self.e_barcode.set("")
+        self.refresh()
+
+    def _checkin_barcode(self) -> None:
+        try:
+            hold = self.service.return_barcode(self.e_barcode.get())
+        except ValueError as ex:
+            alert_error(str(ex))
+            return
+        self.e_barcode.set("")
+        self.refresh()
+        self._announce_hold(hold)
+
+    def _place_hold(self, book_id: int, member_id: int) -> None:
+        try:
+            self.service.place_hold(book_id, member_id)
+        except ValueError as ex:
+            alert_error(str(ex))
+            return
+        ahead = len(self.service.list_holds(book_id=book_id)) - 1
+        alert_info(f"Hold placed; {ahead} ahead in the queue.")
 
     def _return_selected(self) -> None:
         sel = self.tree.selection()
         if not sel:
             return
         loan_id = int(sel[0])
-        self.service.return_book(loan_id)
+        hold = self.service.return_book(loan_id)
         self.refresh()
+        self._announce_hold(hold)
+
+    def _announce_hold(self, hold: Optional[Hold]) -> None:
+        if hold is not None:
+            alert_info(f"Put this copy on the hold shelf for member {hold.member_id} "
+                       f"(until {hold.expires_at:%Y-%m-%d}).", title="Hold Ready")
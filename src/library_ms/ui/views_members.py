@@ -11,7 +11,8 @@ License: MIT License (see LICENSE file for details)
 =================================================================== 
 
 Description: 
-Members management view: list/search/add/edit/delete members.
+Members management view: list/search/add/edit/delete members, with a
+details pane showing the selected member's loans and paged history.
 
 Usage: 
 Used inside the main Tkinter Notebook.
@@ -24,10 +25,12 @@ Notes:
 from __future__ import annotations
 
 import tkinter as tk
+from datetime import datetime
 from tkinter import ttk
 
+from ..repository import VersionConflictError
 from ..services import LibraryService
-from .widgets import LabeledEntry, ask_confirm, alert_error
+from .widgets import LabeledEntry, SortedWindow, ask_confirm, ask_overwrite, alert_error
 
 
 class MembersView(ttk.Frame):
@@ -35,7 +38,6 @@ class MembersView(ttk.Frame):
         super().__init__(master)
         self.service = service
         self._build_ui()
-        self.refresh()
 
     def _build_ui(self) -> None:
         top = ttk.Frame(self)
@@ -54,18 +56,34 @@ class MembersView(ttk.Frame):
             self.tree.column(col, width=160, anchor=tk.W)
         self.tree.pack(fill=tk.BOTH, expand=True)
 
+        self.tree.bind("<<TreeviewSelect>>", lambda _e: self._show_details())
+
         btns = ttk.Frame(self)
+        btn_more = ttk.Button(btns, text="More", state=tk.DISABLED)
+        btn_more.pack(side=tk.LEFT, padx=(0, 24))
         ttk.Button(btns, text="Edit", command=self._open_edit).pack(side=tk.LEFT, padx=(0, 8))
         ttk.Button(btns, text="Delete", command=self._delete_selected).pack(side=tk.LEFT)
         btns.pack(anchor="e", pady=(8, 0))
+        self.window = SortedWindow(self.tree, {"name": "name", "email": "email"}, "name", False,
+                                   self._fetch, self._insert, btn_more)
+
+        self.details = MemberDetails(self, self.service)
+        self.details.pack(fill=tk.BOTH, expand=True, pady=(8, 0))
 
     def refresh(self) -> None:
+        self.window.reload()
+        self._show_details()
+
+    def _fetch(self, sort: str, descending: bool, limit: int, offset: int):
         q = self.search_var.get().strip() or None
-        members = self.service.list_members(q)
-        for i in self.tree.get_children():
-            self.tree.delete(i)
-        for m in members:
-            self.tree.insert("", tk.END, iid=str(m.id), values=(m.name, m.email or "", m.phone or ""))
+        return self.service.list_members(q, sort=sort, descending=descending, limit=limit, offset=offset)
+
+    def _insert(self, m) -> None:
+        self.tree.insert("", tk.END, iid=str(m.id), values=(m.name, m.email or "", m.phone or ""))
+
+    def _show_details(self) -> None:
+        sel = self.tree.selection()
+        self.details.show(int(sel[0]) if sel else None)
 
     def _open_add(self) -> None:
         MemberDialog(self, self.service, on_saved=self.refresh)
@@ -87,11 +105,95 @@ class MembersView(ttk.Frame):
             self.refresh()
 
 
+class MemberDetails(ttk.LabelFrame):
+    """Selected member's account: items out, renewals and paged loan history.
+
+    Everything shown is a per-member index range scan, and history is
+    fetched one page at a time ("Load more").
+    """
+
+    PAGE_SIZE = 25
+
+    def __init__(self, master: tk.Widget, service: LibraryService) -> None:
+        super().__init__(master, text="Member Details")
+        self.service = service
+        self.member_id: int | None = None
+        self._cursor = None
+        self._titles: dict[int, str] = {}
+
+        self.summary = ttk.Label(self, text="Select a member.")
+        self.summary.pack(anchor="w", padx=8, pady=(4, 4))
+
+        self.open_tree = ttk.Treeview(self, columns=("book", "due", "renewals"), show="headings", height=4)
+        for col, text, width in (("book", "Out", 260), ("due", "Due", 100), ("renewals", "Renewals", 80)):
+            self.open_tree.heading(col, text=text)
+            self.open_tree.column(col, width=width, anchor=tk.W)
+        self.open_tree.pack(fill=tk.X, padx=8)
+        self.open_tree.tag_configure("overdue", foreground="#b00020")
+        ttk.Button(self, text="Renew Selected", command=self._renew).pack(anchor="e", padx=8, pady=4)
+
+        self.history = ttk.Treeview(self, columns=("book", "loaned", "returned"), show="headings", height=6)
+        for col, text, width in (("book", "History", 260), ("loaned", "Loaned", 100), ("returned", "Returned", 100)):
+            self.history.heading(col, text=text)
+            self.history.column(col, width=width, anchor=tk.W)
+        self.history.pack(fill=tk.BOTH, expand=True, padx=8)
+        self.btn_more = ttk.Button(self, text="Load more", command=self._load_page, state=tk.DISABLED)
+        self.btn_more.pack(anchor="e", padx=8, pady=4)
+
+    def _title(self, book_id: int) -> str:
+        if book_id not in self._titles:
+            book = self.service.get_book(book_id)
+            self._titles[book_id] = book.title if book else f"(deleted book #{book_id})"
+        return self._titles[book_id]
+
+    def show(self, member_id: int | None) -> None:
+        self.member_id = member_id
+        self._cursor = None
+        for tree in (self.open_tree, self.history):
+            tree.delete(*tree.get_children())
+        if member_id is None:
+            self.summary.configure(text="Select a member.")
+            self.btn_more.configure(state=tk.DISABLED)
+            return
+        out, overdue = self.service.member_loan_stats(member_id)
+        policy = self.service.policy
+        text = f"{out} of {policy.max_open_loans} items out"
+        if overdue:
+            text += f", {overdue} overdue" + (" (borrowing blocked)" if policy.block_on_overdue else "")
+        self.summary.configure(text=text)
+        now = datetime.now()
+        for l in self.service.member_open_loans(member_id):
+            self.open_tree.insert("", tk.END, iid=str(l.id), tags=("overdue",) if l.due_at < now else (),
+                                  values=(self._title(l.book_id), f"{l.due_at:%Y-%m-%d}", l.renewals))
+        self._load_page()
+
+    def _load_page(self) -> None:
+        if self.member_id is None:
+            return
+        page = self.service.member_loan_history(self.member_id, self.PAGE_SIZE, self._cursor)
+        for l in page.loans:
+            self.history.insert("", tk.END, values=(self._title(l.book_id), f"{l.loaned_at:%Y-%m-%d}",
+                                                    f"{l.returned_at:%Y-%m-%d}"))
+        self._cursor = page.cursor
+        self.btn_more.configure(state=tk.NORMAL if page.cursor else tk.DISABLED)
+
+    def _renew(self) -> None:
+        sel = self.open_tree.selection()
+        if not sel:
+            return
+        try:
+            self.service.renew_loan(int(sel[0]))
+        except ValueError as ex:
+            alert_error(str(ex))
+        self.show(self.member_id)
+
+
 class MemberDialog(tk.Toplevel):
     def __init__(self, master: tk.Widget, service: LibraryService, member_id: int | None = None, on_saved=None) -> None:
         super().__init__(master)
         self.service = service
         self.member_id = member_id
+        self.version: int | None = None  # version the form was loaded from
         self.on_saved = on_saved
         self.title("Add Member" if not member_id else "Edit Member")
         self.resizable(False, False)
@@ -108,11 +210,15 @@ class MemberDialog(tk.Toplevel):
         btns.grid(row=10, column=0, sticky="e", padx=12, pady=8)
 
         if member_id is not None:
-            member = next((m for m in self.service.list_members() if m.id == member_id), None)
-            if member:
-                self.e_name.set(member.name)
-                self.e_email.set(member.email or "")
-                self.e_phone.set(member.phone or "")
+            self._load()
+
+    def _load(self) -> None:
+        member = self.service.get_member(self.member_id)
+        if member:
+            self.version = member.version
+            self.e_name.set(member.name)
+            self.e_email.set(member.email or "")
+            self.e_phone.set(member.phone or "")
 
     def _save(self) -> None:
         name = self.e_name.get().strip()
@@ -124,9 +230,24 @@ class MemberDialog(tk.Toplevel):
             if self.member_id is None:
                 self.service.add_member(name=name, email=email, phone=phone)
             else:
-                self.service.update_member(self.member_id, name=name, email=email, phone=phone)
+                self.service.update_member(self.member_id, expected_version=self.version,
+                                           name=name, email=email, phone=phone)
             if callable(self.on_saved):
                 self.on_saved()
             self.destroy()
+        except VersionConflictError as ex:
+            self._resolve_conflict(ex)
         except ValueError as ex:
             alert_error(str(ex))
+
+    def _resolve_conflict(self, ex: VersionConflictError) -> None:
+        if ex.current is None:
+            alert_error(str(ex))
+            if callable(self.on_saved):
+                self.on_saved()
+            self.destroy()
+        elif ask_overwrite("member", str(ex)):
+            self.version = ex.current
+            self._save()
+        else:
+            self._load()
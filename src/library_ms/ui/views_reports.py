@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: views_reports.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Circulation trends: daily loans with their 7- and 30-day means, the overdue
+rate, and the numbers behind both charts.
+
+Usage: 
+Added to the main Notebook as the "Reports" tab.
+
+Notes: 
+- Charts are drawn on plain Canvas widgets; no plotting dependency.
+- Refresh re-reads only today; earlier days come from the analytics cache.
+
+===================================================================
+"""
+from __future__ import annotations
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, List, Sequence, Tuple
+
+from ..analytics import CirculationAnalytics, DayStats
+from .widgets import alert_error
+
+PERIODS = {"Last 30 days": 30, "Last 90 days": 90, "Last 365 days": 365}
+PAD = 32  # room for axis labels
+BAR_COLOR = "#9db8d9"
+LINE_COLORS = ("#d9822b", "#2b6cb0")
+
+Value = Callable[[DayStats], float]
+
+
+class ReportsView(ttk.Frame):
+    def __init__(self, master: tk.Widget, analytics: CirculationAnalytics) -> None:
+        super().__init__(master)
+        self.analytics = analytics
+        self._series: List[DayStats] = []
+        self._build_ui()
+
+    def _build_ui(self) -> None:
+        top = ttk.Frame(self)
+        self.period_var = tk.StringVar(value=next(iter(PERIODS)))
+        period_box = ttk.Combobox(top, textvariable=self.period_var, state="readonly", values=list(PERIODS), width=16)
+        period_box.bind("<<ComboboxSelected>>", lambda _e: self.refresh())
+        btn_refresh = ttk.Button(top, text="Refresh", command=self.refresh)
+        self.summary_var = tk.StringVar()
+        period_box.pack(side=tk.LEFT, padx=(0, 8))
+        btn_refresh.pack(side=tk.LEFT)
+        ttk.Label(top, textvariable=self.summary_var).pack(side=tk.RIGHT)
+        top.pack(fill=tk.X, pady=(0, 8))
+
+        ttk.Label(self, text="Loans per day (bars), 7-day and 30-day means (lines)").pack(anchor=tk.W)
+        self.loans_chart = tk.Canvas(self, height=170, background="white", highlightthickness=0)
+        self.loans_chart.pack(fill=tk.X, pady=(0, 8))
+        ttk.Label(self, text="Overdue rate (overdue / outstanding at day end)").pack(anchor=tk.W)
+        self.rate_chart = tk.Canvas(self, height=110, background="white", highlightthickness=0)
+        self.rate_chart.pack(fill=tk.X, pady=(0, 8))
+        for canvas in (self.loans_chart, self.rate_chart):
+            canvas.bind("<Configure>", lambda _e: self._draw())
+
+        columns = ("day", "loans", "returns", "avg7", "avg30", "out", "overdue", "rate")
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", height=8)
+        for col, text in zip(columns, ("Day", "Loans", "Returns", "7-day mean", "30-day mean",
+                                       "Outstanding", "Overdue", "Overdue rate")):
+            self.tree.heading(col, text=text)
+            self.tree.column(col, width=90, anchor=tk.W if col == "day" else tk.E)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+
+    def refresh(self) -> None:
+        try:
+            self._series = self.analytics.series(PERIODS[self.period_var.get()])
+        except Exception as ex:  # e.g. the database is locked
+            alert_error(str(ex))
+            return
+        today = self._series[-1]
+        self.summary_var.set(
+            f"Today: {today.loans} loans, {today.returns} returns, {today.outstanding} out, "
+            f"{today.overdue} overdue ({today.overdue_rate:.0%})"
+        )
+        for i in self.tree.get_children():
+            self.tree.delete(i)
+        for d in reversed(self._series):  # newest first
+            self.tree.insert("", tk.END, values=(
+                f"{d.day:%Y-%m-%d}", d.loans, d.returns, f"{d.loans_7d:.1f}", f"{d.loans_30d:.1f}",
+                d.outstanding, d.overdue, f"{d.overdue_rate:.1%}",
+            ))
+        self._draw()
+
+    def _draw(self) -> None:
+        series = self._series
+        _plot(self.loans_chart, series, lambda d: d.loans,
+              [(lambda d: d.loans_7d, LINE_COLORS[0]), (lambda d: d.loans_30d, LINE_COLORS[1])])
+        _plot(self.rate_chart, series, None, [(lambda d: d.overdue_rate, LINE_COLORS[0])], percent=True)
+
+
+def _plot(canvas: tk.Canvas, series: Sequence[DayStats], bars: Value | None,
+          lines: Sequence[Tuple[Value, str]], percent: bool = False) -> None:
+    """Bars and/or lines over the days of ``series``, scaled to the largest value."""
+    canvas.delete("all")
+    width, height = canvas.winfo_width(), canvas.winfo_height()
+    if not series or width <= 2 * PAD:
+        return
+    values = [f(d) for f in ([bars] if bars else []) + [f for f, _ in lines] for d in series]
+    top = max(values) or 1.0
+    step = (width - 2 * PAD) / len(series)
+
+    def xy(i: int, v: float) -> Tuple[float, float]:
+        return PAD + (i + 0.5) * step, height - PAD / 2 - v / top * (height - PAD)
+
+    canvas.create_line(PAD, height - PAD / 2, width - PAD, height - PAD / 2, fill="#999999")
+    canvas.create_text(PAD - 4, PAD / 2, text=f"{top:.0%}" if percent else f"{top:g}", anchor=tk.NE)
+    canvas.create_text(PAD, height - 2, text=f"{series[0].day:%d %b}", anchor=tk.SW)
+    canvas.create_text(width - PAD, height - 2, text=f"{series[-1].day:%d %b}", anchor=tk.SE)
+    if bars:
+        for i, d in enumerate(series):
+            x, y = xy(i, bars(d))
+            canvas.create_rectangle(x - step * 0.4, y, x + step * 0.4, height - PAD / 2, fill=BAR_COLOR, width=0)
+    for f, color in lines:
+        points = [c for i, d in enumerate(series) for c in xy(i, f(d))]
+        if len(points) >= 4:
+            canvas.create_line(*points, fill=color, width=2)
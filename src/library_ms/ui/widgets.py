@@ -25,7 +25,13 @@ from __future__ import annotations
 
 import tkinter as tk
 from tkinter import messagebox, ttk
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+Suggestions = List[Tuple[int, str]]
+# fetch(sort, descending, limit, offset) -> rows
+Fetch = Callable[[str, bool, int, int], Sequence[Any]]
+
+WINDOW_ROWS = 200  # rows fetched per "More" click
 
 
 class LabeledEntry(ttk.Frame):
@@ -45,10 +51,193 @@ class LabeledEntry(ttk.Frame):
         self.entry.insert(0, value)
 
 
+class AutocompleteEntry(LabeledEntry):
+    """LabeledEntry with a drop-down of suggestions from ``suggest(text)``.
+
+    ``suggest`` returns ``(id, label)`` pairs and is called on every keystroke,
+    so it must be an in-memory lookup. Choosing a suggestion remembers its id;
+    ``#42`` names id 42 directly, as does a bare number nothing matches.
+    """
+
+    def __init__(self, master: tk.Widget, text: str, suggest: Callable[[str], Suggestions],
+                 width: int = 30, **entry_kwargs) -> None:
+        super().__init__(master, text, width=width, **entry_kwargs)
+        self.suggest = suggest
+        self.selected_id: Optional[int] = None
+        self._items: Suggestions = []
+        self._popup: Optional[tk.Toplevel] = None
+        self._listbox: Optional[tk.Listbox] = None
+        self.entry.bind("<KeyRelease>", self._on_key)
+        self.entry.bind("<Down>", self._focus_list)
+        self.entry.bind("<Escape>", lambda _e: self._hide())
+        self.entry.bind("<FocusOut>", lambda _e: self.after(150, self._hide_unless_focused))
+
+    def set(self, value: str) -> None:
+        super().set(value)
+        self.selected_id = None
+
+    def get_id(self) -> int:
+        """Id of the chosen suggestion, the only match, or a typed ``#id``.
+
+        Digits are matched first, so a scanned ISBN finds its book rather
+        than being taken as an id; a bare number is an id only when nothing
+        matches it.
+
+        Raises:
+            ValueError: if the text does not identify exactly one entry.
+        """
+        if self.selected_id is not None:
+            return self.selected_id
+        text = self.get().strip()
+        if text.startswith("#") and text[1:].isdigit():
+            return int(text[1:])
+        items = self.suggest(text) if text else []
+        if len(items) == 1:
+            return items[0][0]
+        if not items and text.isdigit():
+            return int(text)
+        raise ValueError(f"Pick a match for '{text}' from the suggestions.")
+
+    # --- popup ---
+    def _on_key(self, event: tk.Event) -> None:
+        if event.keysym in ("Up", "Down", "Return", "Escape", "Tab"):
+            return
+        self.selected_id = None
+        text = self.get().strip()
+        items = self.suggest(text) if text else []
+        if items:
+            self._show(items)
+        else:
+            self._hide()
+
+    def _ensure_popup(self) -> tk.Listbox:
+        if self._popup is None:
+            self._popup = tk.Toplevel(self)
+            self._popup.overrideredirect(True)
+            self._popup.withdraw()
+            self._listbox = tk.Listbox(self._popup, exportselection=False, activestyle="dotbox")
+            self._listbox.pack(fill=tk.BOTH, expand=True)
+            self._listbox.bind("<Return>", self._choose)
+            self._listbox.bind("<ButtonRelease-1>", self._choose)
+            self._listbox.bind("<Escape>", lambda _e: (self._hide(), self.entry.focus_set()))
+        return self._listbox
+
+    def _show(self, items: Suggestions) -> None:
+        listbox = self._ensure_popup()
+        self._items = items
+        listbox.delete(0, tk.END)
+        for _, label in items:
+            listbox.insert(tk.END, label)
+        listbox.configure(height=len(items), width=max(self.entry.cget("width"), 20))
+        x = self.entry.winfo_rootx()
+        y = self.entry.winfo_rooty() + self.entry.winfo_height()
+        self._popup.geometry(f"+{x}+{y}")
+        self._popup.deiconify()
+        self._popup.lift()
+
+    def _hide(self) -> None:
+        if self._popup is not None:
+            self._popup.withdraw()
+
+    def _hide_unless_focused(self) -> None:
+        if self._listbox is None or self.focus_get() is not self._listbox:
+            self._hide()
+
+    def _focus_list(self, _event: tk.Event) -> None:
+        if self._listbox is not None and self._items and self._popup.winfo_viewable():
+            self._listbox.focus_set()
+            self._listbox.selection_clear(0, tk.END)
+            self._listbox.selection_set(0)
+            self._listbox.activate(0)
+
+    def _choose(self, _event: tk.Event) -> None:
+        sel = self._listbox.curselection() if self._listbox is not None else ()
+        if not sel:
+            return
+        id_, label = self._items[sel[0]]
+        self.set(label)
+        self.selected_id = id_
+        self._hide()
+        self.entry.focus_set()
+        self.entry.icursor(tk.END)
+
+
+class SortedWindow:
+    """Sorting and windowed loading for a Treeview, done by the database.
+
+    Clicking a sortable heading sorts by that column's key, and clicking it
+    again reverses the order; the active heading shows an arrow. Rows come in
+    windows of ``size`` from ``fetch``, and ``more`` (a button) loads the next
+    window. Fetch errors that are ValueErrors (bad filter input) are shown to
+    the user and leave the tree as it was.
+    """
+
+    def __init__(self, tree: ttk.Treeview, sortable: Dict[str, str], sort: str, descending: bool,
+                 fetch: Fetch, insert: Callable[[Any], None], more: ttk.Button, size: int = WINDOW_ROWS) -> None:
+        self.tree = tree
+        self.sortable = sortable  # column -> sort key
+        self.sort = sort
+        self.descending = descending
+        self.fetch = fetch
+        self.insert = insert
+        self.more = more
+        self.size = size
+        self.loaded = 0
+        self._titles = {col: tree.heading(col, "text") for col in sortable}
+        for col in sortable:
+            tree.heading(col, command=lambda c=col: self.sort_by(c))
+        more.configure(command=self.load_more)
+
+    def sort_by(self, column: str) -> None:
+        key = self.sortable[column]
+        self.descending = not self.descending if key == self.sort else False
+        self.sort = key
+        self.reload()
+
+    def reload(self) -> None:
+        """Fetch the first window again (after a sort, filter or data change)."""
+        rows = self._fetch(0)
+        if rows is None:
+            return
+        self.tree.delete(*self.tree.get_children())
+        self.loaded = 0
+        for col, title in self._titles.items():
+            arrow = (" \u25bc" if self.descending else " \u25b2") if self.sortable[col] == self.sort else ""
+            self.tree.heading(col, text=title + arrow)
+        self._show(rows)
+
+    def load_more(self) -> None:
+        rows = self._fetch(self.loaded)
+        if rows is not None:
+            self._show(rows)
+
+    def _fetch(self, offset: int) -> Optional[Sequence[Any]]:
+        try:
+            return self.fetch(self.sort, self.descending, self.size + 1, offset)  # one extra: is there more?
+        except ValueError as ex:
+            alert_error(str(ex))
+            return None
+
+    def _show(self, rows: Sequence[Any]) -> None:
+        for row in rows[:self.size]:
+            self.insert(row)
+        self.loaded += min(len(rows), self.size)
+        self.more.state(["!disabled"] if len(rows) > self.size else ["disabled"])
+
+
 def ask_confirm(title: str, message: str) -> bool:
     return messagebox.askyesno(title, message)
 
 
+def ask_overwrite(entity: str, message: str) -> bool:
+    """Ask how to resolve an edit conflict: True = overwrite, False = reload."""
+    return messagebox.askyesno(
+        "Edit Conflict",
+        f"{message}.\n\nYes: save your changes over theirs.\nNo: reload the current {entity} and discard your changes.",
+        icon=messagebox.WARNING,
+    )
+
+
 def alert_error(message: str, title: str = "Error") -> None:
     messagebox.showerror(title, message)
 
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: prefix_index.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+In-memory prefix index over short text terms, backed by a sorted list and
+bisect. Used for per-keystroke typeahead without touching SQLite.
+
+Usage: 
+from library_ms.utils.prefix_index import PrefixIndex
+idx = PrefixIndex(); idx.put(1, "Dune", ["dune", "herbert"]); idx.search("he")
+
+Notes: 
+- Thread-safe: a background loader and the UI thread may share an index.
+
+===================================================================
+"""
+from __future__ import annotations
+
+import re
+import threading
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+_WORD_RE = re.compile(r"[\w@.+-]+")
+
+
+def terms_for(*values: Optional[str]) -> List[str]:
+    """Lower-cased words of each value, plus each full value, for indexing."""
+    out: List[str] = []
+    for v in values:
+        if not v:
+            continue
+        v = v.lower().strip()
+        out.append(v)
+        out.extend(w for w in _WORD_RE.findall(v) if w != v)
+    return out
+
+
+class PrefixIndex:
+    """Map text prefixes to ids; each id has a display label."""
+
+    def __init__(self) -> None:
+        self._keys: List[Tuple[str, int]] = []
+        self._terms: Dict[int, List[str]] = {}
+        self._labels: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    @classmethod
+    def build(cls, entries: Iterable[Tuple[int, str, List[str]]]) -> "PrefixIndex":
+        """Bulk-load ``(id, label, terms)`` entries with a single sort."""
+        idx = cls()
+        for id_, label, terms in entries:
+            uniq = sorted(set(terms))
+            idx._labels[id_] = label
+            idx._terms[id_] = uniq
+            idx._keys.extend((t, id_) for t in uniq)
+        idx._keys.sort()
+        return idx
+
+    def put(self, id_: int, label: str, terms: Iterable[str]) -> None:
+        """Insert or replace the entry for ``id_``."""
+        uniq = sorted(set(terms))
+        with self._lock:
+            self._remove_locked(id_)
+            self._labels[id_] = label
+            self._terms[id_] = uniq
+            for t in uniq:
+                insort(self._keys, (t, id_))
+
+    def remove(self, id_: int) -> None:
+        with self._lock:
+            self._remove_locked(id_)
+
+    def _remove_locked(self, id_: int) -> None:
+        for t in self._terms.pop(id_, ()):
+            i = bisect_left(self._keys, (t, id_))
+            if i < len(self._keys) and self._keys[i] == (t, id_):
+                del self._keys[i]
+        self._labels.pop(id_, None)
+
+    def _ids_with_prefix(self, prefix: str) -> Set[int]:
+        ids: Set[int] = set()
+        i = bisect_left(self._keys, (prefix, -1))
+        keys = self._keys
+        while i < len(keys) and keys[i][0].startswith(prefix):
+            ids.add(keys[i][1])
+            i += 1
+        return ids
+
+    def search(self, text: str, limit: int = 10) -> List[Tuple[int, str]]:
+        """Return up to ``limit`` ``(id, label)`` pairs matching every word of ``text``.
+
+        A single word is matched against whole values too, so "ali@ex" finds
+        an e-mail address. Every match is collected before sorting, so the
+        result is the alphabetical first ``limit`` labels.
+        """
+        words = text.lower().split()
+        if not words:
+            return []
+        with self._lock:
+            ids = self._ids_with_prefix(words[0])
+            for w in words[1:]:
+                ids &= self._ids_with_prefix(w)
+                if not ids:
+                    break
+            hits = [(i, self._labels[i]) for i in ids]
+        hits.sort(key=lambda h: h[1].lower())
+        return hits[:limit]
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: profiling.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Lightweight phase timer used to report application startup timings.
+
+Usage: 
+from library_ms.utils.profiling import StartupProfile
+profile = StartupProfile(); profile.mark("import"); print(profile.report())
+
+Notes: 
+- Enabled in the app with LIBRARY_MS_PROFILE_STARTUP=1 (report on stderr).
+
+===================================================================
+"""
+from __future__ import annotations
+
+import os
+import time
+from typing import List, Optional, Tuple
+
+PROFILE_ENV = "LIBRARY_MS_PROFILE_STARTUP"
+
+
+def profiling_enabled() -> bool:
+    return os.environ.get(PROFILE_ENV, "").strip().lower() not in ("", "0", "false", "no")
+
+
+class StartupProfile:
+    """Record named checkpoints relative to a start time."""
+
+    def __init__(self, start: Optional[float] = None) -> None:
+        self.start = time.perf_counter() if start is None else start
+        self.marks: List[Tuple[str, float]] = []
+
+    def mark(self, name: str) -> float:
+        """Record ``name`` now; returns seconds since start."""
+        elapsed = time.perf_counter() - self.start
+        self.marks.append((name, elapsed))
+        return elapsed
+
+    def elapsed(self, name: str) -> Optional[float]:
+        return next((t for n, t in self.marks if n == name), None)
+
+    def report(self) -> str:
+        lines = ["startup timings (ms):"]
+        prev = 0.0
+        for name, t in self.marks:
+            lines.append(f"  {name:<14}{t * 1000:9.1f}  (+{(t - prev) * 1000:.1f})")
+            prev = t
+        return "\n".join(lines)
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: conftest.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Shared fixtures. ``repo`` runs a test once per Repository backend
+(SQLite on a temp file, and in-memory).
+
+Usage: 
+pytest -q
+
+Notes: 
+- Tests needing SQLite-only features should build LibraryRepository directly.
+
+===================================================================
+"""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from library_ms.db import migrate
+from library_ms.memory_repository import InMemoryRepository
+from library_ms.repository import LibraryRepository
+from library_ms.services import LibraryService
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def repo(request, tmp_path: Path):
+    if request.param == "memory":
+        return InMemoryRepository()
+    path = str(tmp_path / "test.db")
+    migrate(path)
+    return LibraryRepository(path)
+
+
+@pytest.fixture
+def svc(repo) -> LibraryService:
+    return LibraryService(repo)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: test_analytics.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Tests for the cached daily circulation series.
+
+Usage: 
+pytest -q
+
+Notes: 
+- Expected values are counted loan by loan in Python.
+
+===================================================================
+"""
+from __future__ import annotations
+
+import random
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+
+import pytest
+
+from library_ms.analytics import CirculationAnalytics
+from library_ms.db import get_connection, migrate
+from library_ms.models import Book, Member, to_epoch
+from library_ms.queries import CATALOGUE, explain
+from library_ms.repository import LibraryRepository
+
+TODAY = date(2026, 3, 15)
+NOW = to_epoch(datetime.combine(TODAY, time(12)))
+
+
+def _loans(seed: int = 7):
+    """(loaned_at, due_at, returned_at) around TODAY, some never returned."""
+    rng = random.Random(seed)
+    loans = []
+    for _ in range(400):
+        loaned = NOW - rng.randrange(150 * 86400)
+        due = loaned + rng.choice((7, 14, 21)) * 86400
+        returned = loaned + rng.randrange(40 * 86400)
+        loans.append((loaned, due, returned if returned <= NOW and rng.random() < 0.85 else None))
+    return loans
+
+
+@pytest.fixture
+def path(tmp_path: Path) -> str:
+    p = str(tmp_path / "test.db")
+    migrate(p)
+    repo = LibraryRepository(p)
+    book = repo.add_book(Book(None, "1", "Dune", "Herbert", 1965, 1, 1))
+    member = repo.add_member(Member(None, "Ann", None, None))
+    with get_connection(p) as conn:
+        for i, (loaned, due, returned) in enumerate(_loans()):
+            table = "loan_history" if returned is not None and i % 2 else "loans"  # some archived
+            conn.execute(
+                f"INSERT INTO {table}(book_id, member_id, loaned_at, due_at, returned_at) VALUES(?, ?, ?, ?, ?)",
+                (book, member, loaned, due, returned),
+            )
+    return p
+
+
+def _expected(day: date):
+    end = to_epoch(datetime.combine(day + timedelta(days=1), time()))
+    start = end - 86400
+    loans = _loans()
+
+    def out_at(t, since):
+        return sum(1 for l in loans if since(l) < t and (l[2] is None or l[2] >= t))
+
+    daily = [sum(1 for l in loans if start - k * 86400 <= l[0] < end - k * 86400) for k in range(30)]
+    return (
+        daily[0],
+        sum(1 for l in loans if l[2] is not None and start <= l[2] < end),
+        sum(daily[:7]) / 7,
+        sum(daily) / 30,
+        out_at(end, lambda l: l[0]),
+        out_at(end, lambda l: l[1]),
+    )
+
+
+def test_series_matches_a_loan_by_loan_count(path: str):
+    series = CirculationAnalytics(path).series(days=60, today=TODAY)
+    assert [d.day for d in series] == [TODAY - timedelta(days=59 - i) for i in range(60)]
+    for d in series:
+        got = (d.loans, d.returns, d.loans_7d, d.loans_30d, d.outstanding, d.overdue)
+        assert got == pytest.approx(_expected(d.day)), d.day
+    assert 0 < series[-1].overdue_rate < 1
+
+
+def test_finished_days_are_cached_and_today_is_recomputed(path: str):
+    analytics = CirculationAnalytics(path)
+    first = analytics.series(days=10, today=TODAY)
+    assert analytics.queries == 2  # finished days, then today
+    with get_connection(path) as conn:
+        conn.execute("INSERT INTO loans(book_id, member_id, loaned_at, due_at) VALUES(1, 1, ?, ?)",
+                     (NOW + 60, NOW + 86400))
+    second = analytics.series(days=10, today=TODAY)
+    assert analytics.queries == 3  # only the open bucket
+    assert second[:-1] == first[:-1]
+    assert (second[-1].loans, second[-1].outstanding) == (first[-1].loans + 1, first[-1].outstanding + 1)
+    assert second[-1].loans_7d == pytest.approx(first[-1].loans_7d + 1 / 7)
+
+    analytics.series(days=40, today=TODAY)  # only the older days are fetched
+    assert analytics.queries == 5
+    assert analytics.series(days=40, today=TODAY + timedelta(days=1))[-2].day == TODAY
+    assert analytics.queries == 7
+    analytics.invalidate()
+    assert analytics.series(days=5, today=TODAY) == second[-5:]
+    assert analytics.queries == 9
+    with pytest.raises(ValueError, match="days must be"):
+        analytics.series(days=0)
+
+
+def test_series_reads_timestamp_index_ranges(path: str):
+    with get_connection(path) as conn:
+        plan = explain(conn, CATALOGUE["circulation_series"])
+    tables = [step for step in plan if " loans" in step or "loan_history" in step]
+    assert tables and all(step.startswith("SEARCH") for step in tables)
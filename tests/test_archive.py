@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: test_archive.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Tests for the loan archival job and history UNION queries.
+
+Usage: 
+pytest -q
+
+Notes: 
+- Back-dates returned_at directly in SQL to simulate old loans.
+
+===================================================================
+"""
+from __future__ import annotations
+
+from pathlib import Path
+
+from library_ms.archive import archive_returned_loans
+from library_ms.db import get_connection, migrate
+from library_ms.repository import LibraryRepository
+from library_ms.services import LibraryService
+
+
+def test_archive_moves_old_returned_loans(tmp_path: Path):
+    path = str(tmp_path / "test.db")
+    migrate(path)
+    svc = LibraryService(LibraryRepository(path))
+    b_id = svc.add_book("123456789X", "Test Book", "Author", copies=10)
+    m_id = svc.add_member("Alice")
+
+    loan_ids = [svc.borrow_book(b_id, m_id) for _ in range(7)]
+    for loan_id in loan_ids[:5]:
+        svc.return_book(loan_id)
+    with get_connection(path) as conn:
+        conn.execute(
+            "UPDATE loans SET returned_at=returned_at - 400 * 86400 WHERE id IN (?, ?, ?, ?)",
+            loan_ids[:4],
+        )
+        conn.execute("UPDATE loans SET renewals=2 WHERE id=?", (loan_ids[0],))
+        linked = conn.execute("SELECT id, renewals, copy_id FROM loans ORDER BY id").fetchall()[:4]
+
+    assert archive_returned_loans(365, chunk_size=3, db_path=path) == 4
+    assert archive_returned_loans(365, chunk_size=3, db_path=path) == 0
+    with get_connection(path) as conn:  # renewals and the item that went out are kept
+        assert conn.execute("SELECT id, renewals, copy_id FROM loan_history ORDER BY id").fetchall() == linked
+    assert linked[0][1] == 2 and all(copy_id is not None for _, _, copy_id in linked)
+
+    hot = svc.list_loans()
+    assert {l.id for l in hot} == set(loan_ids[4:])
+    everything = svc.list_loans(include_history=True)
+    assert sorted(l.id for l in everything) == sorted(loan_ids)
+    assert all(l.returned_at is not None for l in everything if l.id in loan_ids[:4])
+    assert len(svc.list_loans(active_only=True)) == 2
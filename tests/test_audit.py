@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: test_audit.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Tests for the batched, append-only audit log.
+
+Usage: 
+pytest -q
+
+Notes: 
+- Flushes are driven by hand except in the background-thread test.
+
+===================================================================
+"""
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from library_ms.audit import AuditLog, entity_history
+from library_ms.db import get_connection, migrate
+from library_ms.repository import LibraryRepository
+from library_ms.services import LibraryService
+
+
+@pytest.fixture
+def path(tmp_path: Path) -> str:
+    p = str(tmp_path / "test.db")
+    migrate(p)
+    return p
+
+
+def test_events_are_buffered_then_flushed_in_batches(path: str):
+    svc = LibraryService(LibraryRepository(path), actor="alice")
+    audit = AuditLog(path, batch_size=2, interval=60)
+    audit.attach(svc)
+    book = svc.add_book("111", "Dune", "Herbert", copies=2)
+    member = svc.add_member("Ann")
+    svc.update_book(book, title="Dune Messiah")
+    loan = svc.borrow_book(book, member)
+    assert audit.pending == 4 and entity_history("book", book, db_path=path) == []
+
+    assert audit.flush() == 4
+    update, add = audit.history("book", book)
+    assert (update.actor, update.action) == ("alice", "update")
+    assert update.before == {"title": "Dune"} and update.after == {"title": "Dune Messiah"}
+    assert add.after["isbn"] == "111" and add.before == {}
+    assert audit.history("loan", loan)[0].after["member_id"] == member
+
+    svc.delete_member(member)
+    deleted = audit.history("member", member)[0]
+    assert deleted.action == "delete" and deleted.before["name"] == "Ann"
+
+
+def test_ring_drops_oldest_when_full(path: str):
+    svc = LibraryService(LibraryRepository(path))
+    audit = AuditLog(path, capacity=3, interval=60)
+    audit.attach(svc)
+    ids = [svc.add_member(f"M{i}") for i in range(5)]
+    assert audit.dropped == 2 and audit.flush() == 3
+    assert entity_history("member", ids[0], db_path=path) == []
+    assert len(entity_history("member", ids[4], db_path=path)) == 1
+
+
+def test_background_flush_and_close(path: str):
+    svc = LibraryService(LibraryRepository(path))
+    audit = AuditLog(path, batch_size=1000, interval=60)
+    audit.attach(svc)
+    audit.start()
+    book = svc.add_book("1", "T", "A")
+    audit.close()  # final flush; detaches from the service
+    svc.update_book(book, title="U")
+    assert [e.action for e in entity_history("book", book, db_path=path)] == ["add"]
+    assert audit.pending == 0
+
+
+def test_audit_log_is_append_only(path: str):
+    svc = LibraryService(LibraryRepository(path))
+    audit = AuditLog(path)
+    audit.attach(svc)
+    svc.add_member("Ann")
+    audit.flush()
+    with pytest.raises(sqlite3.IntegrityError):
+        with get_connection(path) as conn:
+            conn.execute("DELETE FROM audit_log")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: test_backup.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Tests for online backups: page-stepped copy, compression and rotation.
+
+Usage: 
+pytest -q
+
+Notes: 
+- Uses small page steps so the copy spans several backup steps.
+
+===================================================================
+"""
+from __future__ import annotations
+
+import gzip
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from library_ms import backup, db
+from library_ms.backup import BackupScheduler, backup_database, rotate_backups
+
+
+def _seed(path: Path, n: int = 200) -> None:
+    db.migrate(str(path))
+    with db.get_connection(str(path)) as conn:
+        conn.executemany(
+            "INSERT INTO books(isbn, title, author) VALUES(?, ?, ?)",
+            [(f"isbn-{i}", f"Title {i}" * 10, "Author") for i in range(n)],
+        )
+
+
+def test_backup_copies_all_rows(tmp_path: Path):
+    src = tmp_path / "library.db"
+    _seed(src)
+    result = backup_database(tmp_path / "copy.db", db_path=str(src), pages_per_step=2, step_sleep=0)
+
+    assert result.integrity_ok
+    assert result.pages > 2 and result.steps > 1
+    conn = sqlite3.connect(result.path)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM books").fetchone()[0] == 200
+    finally:
+        conn.close()
+
+
+def test_compressed_backup_and_rotation(tmp_path: Path):
+    src = tmp_path / "library.db"
+    _seed(src, n=10)
+    out = tmp_path / "backups"
+    sched = BackupScheduler(out, interval=0, keep=2, db_path=str(src), compress=True, step_sleep=0)
+    for _ in range(3):
+        sched.run_once()
+
+    files = sorted(out.iterdir())
+    assert len(files) == 2
+    assert all(p.name.endswith(".db.gz") for p in files)
+    restored = tmp_path / "restored.db"
+    restored.write_bytes(gzip.decompress(files[-1].read_bytes()))
+    conn = sqlite3.connect(restored)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM books").fetchone()[0] == 10
+    finally:
+        conn.close()
+    assert rotate_backups(out, keep=5) == []
+
+
+def test_failed_compression_publishes_nothing(tmp_path: Path, monkeypatch):
+    src = tmp_path / "library.db"
+    _seed(src, n=10)
+    out = tmp_path / "backups"
+    out.mkdir()
+
+    def broken_copy(fin, fout):
+        fout.write(fin.read(100))
+        raise OSError("disk full")
+
+    monkeypatch.setattr(backup.shutil, "copyfileobj", broken_copy)
+    with pytest.raises(OSError, match="disk full"):
+        backup_database(out, db_path=str(src), compress=True, step_sleep=0)
+    assert list(out.iterdir()) == []
+
+
+def test_scheduler_reports_every_run_until_stopped(tmp_path: Path):
+    src = tmp_path / "library.db"
+    _seed(src, n=10)
+    sched = BackupScheduler(tmp_path / "backups", interval=0, db_path=str(src), step_sleep=0)
+    seen = []
+
+    def on_run(s: BackupScheduler) -> None:
+        seen.append((s.last_result.path, s.last_error))
+        if len(seen) == 2:
+            s.stop()
+
+    sched.run_forever(on_run)
+    assert len(seen) == 2 and all(err is None and path.exists() for path, err in seen)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: test_copies.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Tests for item-level copies: barcode checkout and check-in, the cached copy
+counters, hold-shelf copies and the migration that expands counters into
+copy rows.
+
+Usage: 
+pytest -q
+
+Notes: 
+- The migration test builds a pre-copies (schema 8) database by hand.
+
+===================================================================
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from library_ms.db import get_connection, migrate
+from library_ms.models import (
+    COPY_AVAILABLE, COPY_MISSING, COPY_ON_HOLD_SHELF, COPY_ON_LOAN, COPY_WITHDRAWN, HOLD_FULFILLED,
+)
+from library_ms.repository import LibraryRepository
+from library_ms.services import LibraryService
+
+
+def _counts(svc: LibraryService, book_id: int):
+    book = svc.get_book(book_id)
+    return book.total_copies, book.available_copies
+
+
+def test_checkout_and_return_by_barcode(svc: LibraryService):
+    book = svc.add_book("123456789X", "Dune", "Herbert", copies=2)
+    ann = svc.add_member("Ann")
+    first, second = svc.list_copies(book)
+    assert (first.barcode, second.barcode) == ("B000001-001", "B000001-002")
+
+    loan = svc.checkout_barcode(f" {second.barcode} ", ann)
+    assert svc.repo.get_loan(loan).copy_id == second.id
+    assert svc.get_copy_by_barcode(second.barcode).status == COPY_ON_LOAN
+    assert _counts(svc, book) == (2, 1)
+    with pytest.raises(ValueError, match="on loan"):
+        svc.checkout_barcode(second.barcode, ann)
+    with pytest.raises(ValueError, match="unknown barcode"):
+        svc.checkout_barcode("nope", ann)
+
+    assert svc.borrow_book(book, ann) != loan  # takes the other copy
+    assert svc.get_copy_by_barcode(first.barcode).status == COPY_ON_LOAN
+    assert _counts(svc, book) == (2, 0)
+
+    assert svc.return_barcode(second.barcode) is None
+    assert svc.get_copy_by_barcode(second.barcode).status == COPY_AVAILABLE
+    assert svc.repo.get_loan(loan).returned_at is not None
+    assert _counts(svc, book) == (2, 1)
+    with pytest.raises(ValueError, match="not on loan"):
+        svc.return_barcode(second.barcode)
+    with pytest.raises(ValueError, match="unknown barcode"):
+        svc.return_barcode("nope")
+
+
+def test_returned_copy_waits_on_the_hold_shelf(svc: LibraryService):
+    book = svc.add_book("123456789X", "Dune", "Herbert")
+    m0, m1, m2 = (svc.add_member(f"M{i}") for i in range(3))
+    (copy,) = svc.list_copies(book)
+    svc.checkout_barcode(copy.barcode, m0)
+    hold = svc.place_hold(book, m1)
+
+    ready = svc.return_barcode(copy.barcode)
+    assert (ready.id, ready.copy_id) == (hold, copy.id)
+    assert svc.get_copy_by_barcode(copy.barcode).status == COPY_ON_HOLD_SHELF
+    assert _counts(svc, book) == (1, 0)
+    with pytest.raises(ValueError, match="another member"):
+        svc.checkout_barcode(copy.barcode, m2)
+
+    loan = svc.checkout_barcode(copy.barcode, m1)
+    assert svc.repo.get_loan(loan).copy_id == copy.id
+    assert svc.repo.get_hold(hold).status == HOLD_FULFILLED
+
+    # Cancelling or expiring a ready hold puts its copy back on the open shelf.
+    hold = svc.place_hold(book, m2)
+    svc.return_book(loan)
+    assert svc.expire_holds(now=datetime.now() + timedelta(days=8)) == 1
+    assert svc.repo.get_hold(hold).copy_id == copy.id
+    assert svc.get_copy_by_barcode(copy.barcode).status == COPY_AVAILABLE
+    assert _counts(svc, book) == (1, 1)
+
+
+def test_copy_management_keeps_counters_in_step(svc: LibraryService):
+    book = svc.add_book("123456789X", "Dune", "Herbert", copies=2)
+    extra = svc.add_copy(book, " SHELF-9 ", location="Annex")
+    assert svc.get_copy_by_barcode("SHELF-9").location == "Annex"
+    assert _counts(svc, book) == (3, 3)
+    with pytest.raises(ValueError, match="already in use"):
+        svc.add_copy(book, "SHELF-9")
+    with pytest.raises(ValueError, match="book not found"):
+        svc.add_copy(999)
+
+    svc.set_copy_status(extra, COPY_MISSING)
+    assert _counts(svc, book) == (3, 2)
+    svc.set_copy_status(extra, COPY_WITHDRAWN)
+    assert _counts(svc, book) == (2, 2)
+    with pytest.raises(ValueError, match="status must be"):
+        svc.set_copy_status(extra, COPY_ON_LOAN)
+
+    svc.update_book(book, total_copies=4)  # adds auto-barcoded copies
+    assert _counts(svc, book) == (4, 4)
+    assert svc.list_copies(book)[-1].barcode == "B000001-005"
+    svc.borrow_book(book, svc.add_member("Ann"))
+    with pytest.raises(ValueError, match="only 3 copies are on the shelf"):
+        svc.update_book(book, total_copies=0)
+    svc.update_book(book, total_copies=1, title="Dune (2nd ed.)")
+    assert _counts(svc, book) == (1, 0)
+    assert [c.status for c in svc.list_copies(book)].count(COPY_WITHDRAWN) == 4
+    with pytest.raises(ValueError, match="available copies"):
+        svc.update_book(book, available_copies=5)
+
+
+def test_migration_expands_counters_into_copies(tmp_path: Path):
+    path = str(tmp_path / "old.db")
+    migrate(path)
+    with get_connection(path) as conn:
+        # Schema 8 state: counters only, no copy rows or links.
+        conn.executemany(
+            "INSERT INTO books(isbn, title, author, total_copies, available_copies) VALUES(?, ?, ?, ?, ?)",
+            [("1", "Lent and held", "A", 3, 1), ("2", "Unaccounted", "B", 4, 2), ("3", "Drifted", "C", 1, 0)],
+        )
+        conn.executemany("INSERT INTO members(name) VALUES(?)", [("M1",), ("M2",)])
+        conn.executemany(
+            "INSERT INTO loans(book_id, member_id, due_at) VALUES(?, ?, 0)", [(1, 1), (3, 1), (3, 2)]
+        )
+        conn.execute("INSERT INTO holds(book_id, member_id, status, expires_at) VALUES(1, 2, 'ready', 9999999999)")
+        conn.execute("PRAGMA user_version = 8;")
+
+    migrate(path)
+    with get_connection(path) as conn:
+        copies = conn.execute("SELECT book_id, barcode, status FROM copies ORDER BY id").fetchall()
+        counters = conn.execute("SELECT total_copies, available_copies FROM books ORDER BY id").fetchall()
+        loan_copies = conn.execute("SELECT c.barcode FROM loans l JOIN copies c ON c.id = l.copy_id ORDER BY l.id")
+        assert [r[0] for r in loan_copies] == ["B000001-002", "B000003-001", "B000003-002"]
+        assert conn.execute("SELECT c.status FROM holds h JOIN copies c ON c.id = h.copy_id").fetchall() == [
+            (COPY_ON_HOLD_SHELF,)
+        ]
+    assert copies == [
+        (1, "B000001-001", COPY_AVAILABLE), (1, "B000001-002", COPY_ON_LOAN), (1, "B000001-003", COPY_ON_HOLD_SHELF),
+        (2, "B000002-001", COPY_AVAILABLE), (2, "B000002-002", COPY_AVAILABLE),
+        (2, "B000002-003", COPY_MISSING), (2, "B000002-004", COPY_MISSING),
+        (3, "B000003-001", COPY_ON_LOAN), (3, "B000003-002", COPY_ON_LOAN),
+    ]
+    assert counters == [(3, 1), (4, 2), (2, 0)]
+
+    svc = LibraryService(LibraryRepository(path))
+    assert svc.return_barcode("B000003-002") is None
+    assert _counts(svc, 3) == (2, 1)
+    migrate(path)  # idempotent
+    with get_connection(path) as conn:
+        assert conn.execute("SELECT count(*) FROM copies").fetchone()[0] == 9
@@ -23,7 +23,12 @@ Notes:
 """
 from __future__ import annotations
 
+import sqlite3
+from datetime import datetime, timezone
 from pathlib import Path
+
+import pytest
+
 from library_ms import db
 
 
@@ -34,3 +39,61 @@ def test_migrate_creates_db(tmp_path: Path):
     with db.get_connection(str(path)) as conn:
         cur = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='books';")
         assert cur.fetchone() is not None
+
+
+def test_migrate_converts_text_loan_times_to_epoch(tmp_path: Path):
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE books (id INTEGER PRIMARY KEY AUTOINCREMENT, isbn TEXT UNIQUE NOT NULL,
+            title TEXT NOT NULL, author TEXT NOT NULL, year INTEGER,
+            total_copies INTEGER NOT NULL DEFAULT 1, available_copies INTEGER NOT NULL DEFAULT 1,
+            created_at TEXT NOT NULL DEFAULT (datetime('now')), updated_at TEXT);
+        CREATE TABLE members (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL,
+            email TEXT UNIQUE, phone TEXT, created_at TEXT NOT NULL DEFAULT (datetime('now')), updated_at TEXT);
+        CREATE TABLE loans (id INTEGER PRIMARY KEY AUTOINCREMENT, book_id INTEGER NOT NULL,
+            member_id INTEGER NOT NULL, loaned_at TEXT NOT NULL DEFAULT (datetime('now')),
+            due_at TEXT NOT NULL, returned_at TEXT);
+        INSERT INTO books(isbn, title, author) VALUES ('1', 'T', 'A');
+        INSERT INTO members(name) VALUES ('M');
+        INSERT INTO loans(book_id, member_id, loaned_at, due_at, returned_at)
+            VALUES (1, 1, '2024-01-01 10:00:00', '2024-01-15T12:00:00', '2024-01-10 09:30:00');
+        INSERT INTO loans(book_id, member_id, due_at) VALUES (1, 1, '2024-02-01T00:00:00');
+        DELETE FROM loans WHERE id = 2;
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    db.migrate(str(path))
+    db.migrate(str(path))
+    with db.get_connection(str(path)) as conn:
+        row = conn.execute("SELECT loaned_at, due_at, returned_at FROM loans").fetchone()
+        assert row == (
+            int(datetime(2024, 1, 1, 10, tzinfo=timezone.utc).timestamp()),
+            int(datetime(2024, 1, 15, 12).timestamp()),  # due_at was naive local time
+            int(datetime(2024, 1, 10, 9, 30, tzinfo=timezone.utc).timestamp()),
+        )
+        assert conn.execute("SELECT loaned_at, due_at, returned_at FROM loans_iso").fetchone() == (
+            "2024-01-01 10:00:00", "2024-01-15T12:00:00", "2024-01-10 09:30:00",
+        )
+        new_id = conn.execute("INSERT INTO loans(book_id, member_id, due_at) VALUES (1, 1, 0)").lastrowid
+        assert new_id == 3  # AUTOINCREMENT high-water mark survives the rebuild
+        assert conn.execute("SELECT version, deleted_at FROM books").fetchone() == (1, None)  # added to old tables
+        # The catalog rebuild (UNIQUE -> partial unique index) must not cascade into loans.
+        assert conn.execute("SELECT count(*) FROM loans").fetchone() == (2,)
+        conn.execute("UPDATE books SET deleted_at = 1")
+        conn.execute("INSERT INTO books(isbn, title, author) VALUES ('1', 'T', 'A')")
+        with pytest.raises(sqlite3.IntegrityError):
+            conn.execute("INSERT INTO books(isbn, title, author) VALUES ('1', 'T', 'A')")
+
+
+def test_needs_migration_tracks_schema_version(tmp_path: Path):
+    path = str(tmp_path / "test.db")
+    assert db.needs_migration(path)
+    db.migrate(path)
+    assert not db.needs_migration(path)
+    with db.get_connection(path) as conn:
+        conn.execute("PRAGMA user_version = 0;")
+    assert db.needs_migration(path)
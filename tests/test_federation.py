@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: test_federation.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Tests for cross-branch search over several branch databases.
+
+Usage: 
+pytest -q
+
+Notes: 
+- The ATTACH/UNION and threaded paths must return identical results.
+
+===================================================================
+"""
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from library_ms.db import migrate
+from library_ms.federation import FederatedRepository, parse_branches
+from library_ms.repository import LibraryRepository
+from library_ms.services import LibraryService
+
+
+def _branch(tmp_path: Path, name: str, books) -> str:
+    path = str(tmp_path / f"{name}.db")
+    migrate(path)
+    svc = LibraryService(LibraryRepository(path))
+    for isbn, title, copies in books:
+        svc.add_book(isbn, title, "Author", copies=copies)
+    return path
+
+
+def test_federated_search_and_availability(tmp_path: Path):
+    fed = FederatedRepository({
+        "main": _branch(tmp_path, "main", [("111", "beta", 1), ("222", "Alpha", 2)]),
+        "north": _branch(tmp_path, "north", [("222", "Alpha", 5), ("333", "Gamma", 1)]),
+    })
+
+    union = fed.search_books_union()
+    threaded = fed.search_books()
+    assert [(r.branch, r.book.title) for r in union] == [
+        ("main", "Alpha"), ("north", "Alpha"), ("main", "beta"), ("north", "Gamma"),
+    ]
+    assert [(r.branch, r.book) for r in threaded] == [(r.branch, r.book) for r in union]
+
+    north = LibraryService(LibraryRepository(fed.branches["north"]))
+    gamma = next(r.book for r in union if r.book.title == "Gamma")
+    north.update_book(gamma.id, expected_version=gamma.version, year=1999)
+    union, threaded = fed.search_books_union("gamma"), fed.search_books("gamma")
+    assert [r.book.version for r in union] == [2]  # edits carry their version across branches
+    assert [(r.branch, r.book) for r in threaded] == [(r.branch, r.book) for r in union]
+
+    assert [r.book.title for r in fed.search_books("a", branches=["north"])] == ["Alpha", "Gamma"]
+    assert [(r.branch, r.book.available_copies) for r in fed.availability("222")] == [("main", 2), ("north", 5)]
+    with pytest.raises(ValueError):
+        fed.search_books(branches=["south"])
+
+
+def test_missing_branch_is_an_error_not_a_new_database(tmp_path: Path):
+    missing = tmp_path / "south.db"
+    fed = FederatedRepository({"main": _branch(tmp_path, "main", [("111", "Alpha", 1)]), "south": str(missing)})
+    with pytest.raises(sqlite3.OperationalError):
+        fed.search_books()
+    with pytest.raises(sqlite3.OperationalError):
+        fed.search_books_union()
+    assert not missing.exists()
+    assert [r.book.title for r in fed.search_books(branches=["main"])] == ["Alpha"]
+
+
+def test_parse_branches():
+    assert parse_branches(" a=one.db, b = two.db ,") == {"a": "one.db", "b": "two.db"}
+    assert parse_branches("") == {}
+    with pytest.raises(ValueError):
+        parse_branches("nameonly")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: test_holds.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Tests for the holds queue: placement, allocation on return, pickup,
+cancellation and hold-shelf expiry (run against every backend).
+
+Usage: 
+pytest -q
+
+Notes: 
+- Expiry is driven by passing a future ``now``.
+
+===================================================================
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from library_ms.db import get_connection, migrate
+from library_ms.models import (
+    COPY_AVAILABLE, COPY_MISSING, COPY_ON_HOLD_SHELF, HOLD_EXPIRED, HOLD_FULFILLED, HOLD_READY, HOLD_WAITING,
+)
+from library_ms.services import LibraryService
+
+
+@pytest.fixture
+def lib(svc: LibraryService):
+    book = svc.add_book("123456789X", "Blockbuster", "Author")
+    members = [svc.add_member(f"M{i}") for i in range(4)]
+    loan = svc.borrow_book(book, members[0])
+    return svc, book, members, loan
+
+
+def test_queue_order_and_pickup(lib):
+    svc, book, (m0, m1, m2, m3), loan = lib
+    with pytest.raises(ValueError, match="available"):
+        svc.place_hold(svc.add_book("0306406152", "Other", "A"), m1)
+
+    h1 = svc.place_hold(book, m1)
+    h2 = svc.place_hold(book, m2)
+    h3 = svc.place_hold(book, m3, priority=-1)  # staff priority jumps the queue
+    with pytest.raises(ValueError, match="already has a hold"):
+        svc.place_hold(book, m1)
+    assert [h.id for h in svc.list_holds(book_id=book)] == [h3, h1, h2]
+
+    events = []
+    svc.subscribe(events.append)
+    ready = svc.return_book(loan)
+    assert (ready.id, ready.status) == (h3, HOLD_READY)
+    assert ready.expires_at > datetime.now() + timedelta(days=6)
+    assert [(e.action, e.entity) for e in events] == [("return", "loan"), ("ready", "hold")]
+    assert svc.return_book(loan) is None
+
+    assert svc.repo.get_book(book).available_copies == 0  # the copy is on the hold shelf
+    with pytest.raises(ValueError, match="not available"):
+        svc.borrow_book(book, m1)
+    svc.borrow_book(book, m3)
+    assert svc.repo.get_hold(h3).status == HOLD_FULFILLED
+    assert [h.id for h in svc.list_holds(book_id=book)] == [h1, h2]
+    assert svc.list_holds(member_id=m1)[0].status == HOLD_WAITING
+
+
+def test_cancel_and_expiry_pass_the_copy_on(lib):
+    svc, book, (m0, m1, m2, m3), loan = lib
+    h1, h2, h3 = (svc.place_hold(book, m) for m in (m1, m2, m3))
+    svc.delete_member(m2)  # deleted members are skipped
+
+    assert svc.return_book(loan).id == h1
+    assert svc.cancel_hold(h1).id == h3
+    assert svc.cancel_hold(h1) is None
+
+    assert svc.expire_holds() == 0
+    assert svc.expire_holds(now=datetime.now() + timedelta(days=8), batch_size=1) == 1
+    assert svc.repo.get_hold(h3).status == HOLD_EXPIRED
+    assert svc.repo.get_book(book).available_copies == 1  # nobody eligible left
+    assert svc.repo.get_hold(h2).status == HOLD_WAITING
+
+
+def test_new_and_found_copies_serve_the_queue_first(lib):
+    svc, book, (m0, m1, m2, m3), loan = lib
+    extra = svc.add_copy(book)
+    svc.set_copy_status(extra, COPY_MISSING)
+    h1, h2, h3 = (svc.place_hold(book, m) for m in (m1, m2, m3))
+    events = []
+    svc.subscribe(events.append)
+
+    added = svc.add_copy(book)
+    assert (svc.repo.get_hold(h1).status, svc.repo.get_hold(h1).copy_id) == (HOLD_READY, added)
+    svc.update_book(book, total_copies=4)
+    assert svc.repo.get_hold(h2).status == HOLD_READY
+    svc.set_copy_status(extra, COPY_AVAILABLE)  # found again
+    assert (svc.repo.get_hold(h3).status, svc.repo.get_hold(h3).copy_id) == (HOLD_READY, extra)
+    assert svc.repo.get_copy(extra).status == COPY_ON_HOLD_SHELF
+    assert [e.entity_id for e in events if e.action == "ready"] == [h1, h2, h3]
+
+    book_row = svc.repo.get_book(book)
+    assert (book_row.total_copies, book_row.available_copies) == (4, 0)
+    with pytest.raises(ValueError, match="not available"):
+        svc.borrow_book(book, svc.add_member("Not queued"))
+
+
+def test_hold_queries_are_index_bound(tmp_path: Path):
+    path = str(tmp_path / "test.db")
+    migrate(path)
+    queries = {
+        "idx_holds_queue": "SELECT id FROM holds WHERE book_id = 1 AND status = 'waiting' "
+                           "ORDER BY priority, created_at, id LIMIT 1",
+        "idx_holds_shelf": "SELECT id FROM holds WHERE status='ready' AND expires_at < 0 ORDER BY expires_at",
+        "ux_holds_open": "SELECT id FROM holds WHERE member_id=1 AND book_id=1 AND status IN ('waiting', 'ready')",
+    }
+    with get_connection(path) as conn:
+        for index, sql in queries.items():
+            plan = " ".join(r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + sql))
+            assert index in plan and "TEMP B-TREE" not in plan, plan
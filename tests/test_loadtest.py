@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: test_loadtest.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Tests for the busy retry policy and a short multi-desk load run.
+
+Usage: 
+pytest -q
+
+Notes: 
+- The load run is kept to a fraction of a second.
+
+===================================================================
+"""
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from library_ms.db import RetryPolicy, busy_timeout_ms, retry_policy, run_with_retry
+from library_ms.loadtest import parse_mix, run_load
+
+
+def test_run_with_retry_retries_only_busy_errors():
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise sqlite3.OperationalError("database is locked")
+        return "ok"
+
+    policy = RetryPolicy(attempts=3, base_delay=0.001)
+    assert run_with_retry(flaky, policy=policy) == "ok"
+    assert len(calls) == 3
+
+    calls.clear()
+    with pytest.raises(sqlite3.OperationalError):
+        run_with_retry(flaky, policy=RetryPolicy(attempts=2, base_delay=0.001))
+
+    def broken():
+        calls.append(1)
+        raise sqlite3.OperationalError("no such table: books")
+
+    calls.clear()
+    with pytest.raises(sqlite3.OperationalError):
+        run_with_retry(broken, policy=policy)
+    assert len(calls) == 1
+
+
+def test_short_load_run_reports_all_operations():
+    before = (busy_timeout_ms(), retry_policy())
+    report = run_load(desks=3, duration=0.5, books=20, members=10,
+                      busy_timeout_ms=before[0] + 500, policy=RetryPolicy(attempts=2))
+    assert (busy_timeout_ms(), retry_policy()) == before  # thread desks leave no settings behind
+    assert report.ops > 0 and report.lock_errors == 0 and report.other_errors == 0
+    assert set(report.percentiles) <= {"borrow", "return", "search"}
+    assert "throughput" in report.format()
+    assert parse_mix("borrow=1,search=3") == {"borrow": 0.25, "search": 0.75}
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: test_outbox.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Tests for change-data-capture triggers and the outbox consumer API.
+
+Usage: 
+pytest -q
+
+Notes: 
+- Drives changes through LibraryService to exercise real write paths.
+
+===================================================================
+"""
+from __future__ import annotations
+
+from pathlib import Path
+
+from library_ms.db import migrate
+from library_ms.outbox import ack, iter_changes, last_acked, prune
+from library_ms.purge import purge_deleted
+from library_ms.repository import LibraryRepository
+from library_ms.services import LibraryService
+
+
+def test_outbox_records_changes_in_order(tmp_path: Path):
+    path = str(tmp_path / "test.db")
+    migrate(path)
+    migrate(path)  # re-running migrations must not duplicate triggers
+    svc = LibraryService(LibraryRepository(path))
+
+    b_id = svc.add_book("123456789X", "Test Book", "Author", copies=2)
+    m_id = svc.add_member("Alice")
+    svc.update_member(m_id, phone="555")
+    svc.update_member(m_id, phone="555")  # no-op update is not recorded
+    loan_id = svc.borrow_book(b_id, m_id)
+    svc.delete_member(m_id)  # tombstone: an update of deleted_at
+    purge_deleted(db_path=path)
+
+    changes = [c for batch in iter_changes(batch_size=2, db_path=path) for c in batch]
+    summary = [(c.table, c.op, c.row_id) for c in changes]
+    assert summary == [
+        ("books", "I", b_id),
+        ("copies", "I", 1),
+        ("copies", "I", 2),
+        ("members", "I", m_id),
+        ("members", "U", m_id),
+        ("loans", "I", loan_id),
+        ("copies", "U", 1),
+        ("books", "U", b_id),
+        ("members", "U", m_id),
+        ("copies", "U", 1),  # purge puts the dropped loan's copy back on the shelf
+        ("books", "U", b_id),
+        ("loans", "D", loan_id),
+        ("members", "D", m_id),
+    ]
+    assert changes[4].changed == ("phone",)
+    assert changes[6].changed == ("status",)
+    assert changes[7].changed == ("available_copies",)
+    assert changes[8].changed == ("deleted_at",)
+    assert [c.seq for c in changes] == sorted(c.seq for c in changes)
+
+    # Consumers resume from their acknowledged position; pruning waits for all.
+    ack("central", changes[3].seq, path)
+    ack("central", changes[1].seq, path)  # never moves backwards
+    assert last_acked("central", path) == changes[3].seq
+    ack("audit", changes[5].seq, path)
+    assert prune(path) == 4
+    rest = [c for batch in iter_changes(last_acked("central", path), db_path=path) for c in batch]
+    assert [c.seq for c in rest] == [c.seq for c in changes[4:]]
+
+
+def test_outbox_records_holds_and_copy_moves(tmp_path: Path):
+    path = str(tmp_path / "test.db")
+    migrate(path)
+    svc = LibraryService(LibraryRepository(path))
+    b_id = svc.add_book("123456789X", "Test Book", "Author")
+    loan_id = svc.borrow_book(b_id, svc.add_member("Ann"))
+    hold_id = svc.place_hold(b_id, svc.add_member("Bob"))
+    before = [c for batch in iter_changes(db_path=path) for c in batch]
+    assert (before[-1].table, before[-1].op, before[-1].row_id) == ("holds", "I", hold_id)
+    svc.return_book(loan_id)  # the copy goes to Bob's hold, not the open shelf
+
+    changes = [c for batch in iter_changes(before[-1].seq, db_path=path) for c in batch]
+    assert [(c.table, c.op, c.row_id, c.changed) for c in changes if c.table != "loans"] == [
+        ("holds", "U", hold_id, ("status", "expires_at", "copy_id")),
+        ("copies", "U", 1, ("status",)),
+    ]
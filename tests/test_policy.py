@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: test_policy.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Tests for member loan limits, renewals and paginated member history.
+
+Usage: 
+pytest -q
+
+Notes: 
+- Plan checks pin the per-member queries to idx_loans_member.
+
+===================================================================
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from library_ms.archive import archive_returned_loans
+from library_ms.db import get_connection, migrate
+from library_ms.repository import LibraryRepository
+from library_ms.services import LibraryService, LoanPolicy
+
+
+def test_limits_and_overdue_block(repo):
+    svc = LibraryService(repo, policy=LoanPolicy(max_open_loans=2, max_renewals=1))
+    book = svc.add_book("123456789X", "Book", "Author", copies=5)
+    ann, ben = svc.add_member("Ann"), svc.add_member("Ben")
+
+    first = svc.borrow_book(book, ann)
+    svc.borrow_book(book, ann)
+    with pytest.raises(ValueError, match="limit 2"):
+        svc.borrow_book(book, ann)
+    svc.return_book(first)
+    svc.borrow_book(book, ann)
+    assert svc.member_loan_stats(ann) == (2, 0)
+
+    late = svc.borrow_book(book, ben, days=-1)
+    assert svc.member_loan_stats(ben) == (1, 1)
+    with pytest.raises(ValueError, match="1 overdue item"):
+        svc.borrow_book(book, ben)
+
+    due = svc.renew_loan(late, days=7)
+    assert due > datetime.now() + timedelta(days=6)
+    assert svc.repo.get_loan(late).renewals == 1
+    with pytest.raises(ValueError, match="renewal limit"):
+        svc.renew_loan(late)
+    svc.borrow_book(book, ben)  # no longer overdue
+
+
+def test_renewal_blocked_by_waiting_hold(svc: LibraryService):
+    book = svc.add_book("123456789X", "Book", "Author")
+    ann, ben = svc.add_member("Ann"), svc.add_member("Ben")
+    loan = svc.borrow_book(book, ann, days=3)
+    svc.place_hold(book, ben)
+    with pytest.raises(ValueError, match="waiting"):
+        svc.renew_loan(loan)
+    svc.return_book(loan)
+    with pytest.raises(ValueError, match="not active"):
+        svc.renew_loan(loan)
+
+
+def test_member_history_pages(svc: LibraryService):
+    book = svc.add_book("123456789X", "Book", "Author", copies=3)
+    ann, ben = svc.add_member("Ann"), svc.add_member("Ben")
+    loans = []
+    for _ in range(7):
+        loans.append(svc.borrow_book(book, ann))
+        svc.return_book(loans[-1])
+    svc.borrow_book(book, ben)
+    current = svc.borrow_book(book, ann)
+
+    seen, cursor = [], None
+    while True:
+        page = svc.member_loan_history(ann, limit=3, cursor=cursor)
+        seen.append([l.id for l in page.loans])
+        if page.cursor is None:
+            break
+        cursor = page.cursor
+    # Latest return first; ties (same second) fall back to id.
+    assert seen == [loans[:3:-1], loans[3:0:-1], loans[:1]]
+    assert [l.id for l in svc.member_open_loans(ann)] == [current]
+
+
+def test_history_includes_archive_and_uses_member_index(tmp_path: Path):
+    path = str(tmp_path / "test.db")
+    migrate(path)
+    svc = LibraryService(LibraryRepository(path))
+    book = svc.add_book("123456789X", "Book", "Author")
+    ann = svc.add_member("Ann")
+    old = svc.borrow_book(book, ann)
+    svc.return_book(old)
+    new = svc.borrow_book(book, ann)
+    svc.return_book(new)
+    with get_connection(path) as conn:
+        conn.execute("UPDATE loans SET returned_at = returned_at - 400 * 86400 WHERE id=?", (old,))
+    assert archive_returned_loans(365, db_path=path) == 1
+
+    page = svc.member_loan_history(ann, limit=1)
+    assert [l.id for l in page.loans] == [new]
+    assert [l.id for l in svc.member_loan_history(ann, limit=1, cursor=page.cursor).loans] == [old]
+
+    with get_connection(path) as conn:
+        for sql in (
+            "SELECT count(*) FROM loans WHERE member_id=1 AND returned_at IS NULL AND due_at < 0",
+            "SELECT id FROM loans WHERE member_id=1 AND returned_at IS NOT NULL "
+            "AND (returned_at, due_at, id) < (9, 9, 9) ORDER BY returned_at DESC, due_at DESC, id DESC",
+            "SELECT id FROM loan_history WHERE member_id=1 AND returned_at IS NOT NULL "
+            "ORDER BY returned_at DESC, due_at DESC, id DESC",
+        ):
+            plan = " ".join(r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + sql))
+            assert "_member" in plan and "TEMP B-TREE" not in plan, plan
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: test_purge.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Tests for soft deletes and the chunked purge job.
+
+Usage: 
+pytest -q
+
+Notes: 
+- Back-dates deleted_at directly in SQL to simulate old tombstones.
+
+===================================================================
+"""
+from __future__ import annotations
+
+from pathlib import Path
+
+from library_ms.db import get_connection, migrate
+from library_ms.models import COPY_AVAILABLE, COPY_ON_HOLD_SHELF, HOLD_READY
+from library_ms.purge import purge_deleted
+from library_ms.repository import LibraryRepository
+from library_ms.services import LibraryService
+
+
+def test_purge_removes_tombstones_and_archives_their_loans(tmp_path: Path):
+    path = str(tmp_path / "test.db")
+    migrate(path)
+    svc = LibraryService(LibraryRepository(path))
+    book = svc.add_book("123456789X", "Book", "Author", copies=10)
+    keep = svc.add_member("Keep")
+    gone = svc.add_member("Gone")
+    kept_loan = svc.borrow_book(book, keep)
+    returned = [svc.borrow_book(book, gone) for _ in range(5)]
+    for loan_id in returned:
+        svc.return_book(loan_id)
+    open_loan = svc.borrow_book(book, gone)
+
+    svc.delete_member(gone)
+    assert purge_deleted(30, db_path=path).members == 0  # still in its grace period
+    with get_connection(path) as conn:
+        conn.execute("UPDATE members SET deleted_at = deleted_at - 31 * 86400 WHERE id=?", (gone,))
+
+    result = purge_deleted(30, chunk_size=2, db_path=path)
+    assert (result.members, result.books, result.loans_archived, result.loans_dropped) == (1, 0, 5, 1)
+    assert purge_deleted(30, db_path=path).members == 0
+
+    with get_connection(path) as conn:
+        assert conn.execute("SELECT count(*) FROM members WHERE id=?", (gone,)).fetchone() == (0,)
+    assert [l.id for l in svc.list_loans()] == [kept_loan]
+    history = {l.id for l in svc.list_loans(include_history=True)}
+    assert history == {kept_loan, *returned} and open_loan not in history
+    with get_connection(path) as conn:
+        assert conn.execute("SELECT count(*) FROM loan_history WHERE copy_id IS NULL").fetchone() == (0,)
+
+
+def test_purging_a_member_releases_their_copies(tmp_path: Path):
+    path = str(tmp_path / "test.db")
+    migrate(path)
+    svc = LibraryService(LibraryRepository(path))
+    lent = svc.add_book("123456789X", "Lent", "Author", copies=2)
+    shelved = svc.add_book("0123456789", "Shelved", "Author")
+    gone, waiting, other = (svc.add_member(n) for n in ("Gone", "Waiting", "Other"))
+    loan = svc.borrow_book(lent, gone)
+    (copy,) = svc.list_copies(shelved)
+    svc.checkout_barcode(copy.barcode, other)
+    svc.place_hold(shelved, gone)
+    svc.place_hold(shelved, waiting)
+    ready = svc.return_barcode(copy.barcode)
+    assert ready.member_id == gone
+    svc.delete_member(gone)
+
+    result = purge_deleted(0, db_path=path)
+    assert (result.members, result.loans_dropped, result.copies_released) == (1, 1, 2)
+    assert svc.get_book(lent).available_copies == 2
+    assert {c.status for c in svc.list_copies(lent)} == {COPY_AVAILABLE}
+    assert svc.repo.get_loan(loan) is None
+    # The shelved copy moves on to the next waiting hold instead of staying stuck.
+    assert svc.get_copy_by_barcode(copy.barcode).status == COPY_ON_HOLD_SHELF
+    assert svc.repo.find_open_hold(shelved, waiting).status == HOLD_READY
+    assert svc.checkout_barcode(copy.barcode, waiting)
+
+
+def test_list_queries_use_live_partial_indexes(tmp_path: Path):
+    path = str(tmp_path / "test.db")
+    migrate(path)
+    with get_connection(path) as conn:
+        plans = {
+            sql: " ".join(r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + sql))
+            for sql in (
+                "SELECT id FROM books WHERE deleted_at IS NULL ORDER BY title COLLATE NOCASE, id",
+                "SELECT id FROM members WHERE deleted_at IS NULL ORDER BY name COLLATE NOCASE, id",
+            )
+        }
+    for sql, plan in plans.items():
+        assert "_live_" in plan and "TEMP B-TREE" not in plan, (sql, plan)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: test_query_plans.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Query plan regression guard over the catalogue in queries.py.
+
+Usage: 
+pytest -q
+
+Notes: 
+- A failing hot query means a schema or SQL change lost its index; run
+  ``python -m library_ms.queries`` to see every plan.
+
+===================================================================
+"""
+from __future__ import annotations
+
+import re
+from pathlib import Path
+
+import pytest
+
+from library_ms import queries
+from library_ms.db import get_connection, migrate
+from library_ms.queries import CATALOGUE, explain, plan_problems
+
+
+@pytest.fixture(scope="module")
+def conn(tmp_path_factory):
+    db = str(tmp_path_factory.mktemp("plans") / "plans.db")
+    migrate(db)
+    with get_connection(db) as c:
+        yield c
+
+
+@pytest.mark.parametrize("name", sorted(CATALOGUE))
+def test_catalogued_query_plan(conn, name: str):
+    query = CATALOGUE[name]
+    plan = explain(conn, query)  # also proves the statement compiles against the schema
+    if query.hot:
+        assert plan_problems(plan) == [], f"{name}: " + " | ".join(plan)
+
+
+def test_plan_problems_flags_scans_and_sorts():
+    assert plan_problems(["SCAN loans", "USE TEMP B-TREE FOR ORDER BY"]) == [
+        "SCAN loans", "USE TEMP B-TREE FOR ORDER BY",
+    ]
+    assert plan_problems(["SCAN books USING INDEX idx_books_live_title", "SCAN CONSTANT ROW"]) == []
+
+
+def test_register_rejects_duplicates():
+    with pytest.raises(ValueError):
+        queries.register("get_book", "SELECT 1")
+
+
+def test_repository_has_no_inline_sql():
+    source = (Path(queries.__file__).parent / "repository.py").read_text(encoding="utf-8")
+    strings = re.findall(r'"""(.*?)"""|"([^"\n]*)"', source, re.S)
+    inline = [s for pair in strings for s in pair if re.match(r"\s*(SELECT|INSERT|UPDATE|DELETE)\b", s)]
+    assert inline == []
+
+
+def test_plan_report_lists_every_query():
+    report = queries.plan_report()
+    for name in CATALOGUE:
+        assert f"] {name}\n" in report + "\n"
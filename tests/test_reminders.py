@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: test_reminders.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Tests for the due-soon/overdue reminder scheduler and its sinks.
+
+Usage: 
+pytest -q
+
+Notes: 
+- Uses an in-memory sink to inspect batches.
+
+===================================================================
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from email import message_from_bytes
+from pathlib import Path
+
+from library_ms.db import migrate
+from library_ms.reminders import DUE_SOON, OVERDUE, MailSpoolSink, ReminderScheduler
+from library_ms.repository import LibraryRepository
+from library_ms.services import LibraryService
+
+
+class ListSink:
+    def __init__(self):
+        self.batches = []
+
+    def send(self, batch):
+        self.batches.append(list(batch))
+
+
+def test_reminders_grouped_batched_and_idempotent(tmp_path: Path):
+    path = str(tmp_path / "test.db")
+    migrate(path)
+    svc = LibraryService(LibraryRepository(path))
+    b1 = svc.add_book("1111111111", "Dune", "Herbert", copies=5)
+    b2 = svc.add_book("2222222222", "Emma", "Austen", copies=5)
+    alice = svc.add_member("Alice", email="alice@example.org")
+    bob = svc.add_member("Bob")
+
+    svc.borrow_book(b1, alice, days=1)
+    svc.borrow_book(b2, alice, days=2)
+    svc.borrow_book(b2, bob, days=10)  # outside the window
+    returned = svc.borrow_book(b2, bob, days=-2)
+    svc.return_book(returned)
+    svc.borrow_book(b1, bob, days=-1)
+
+    sink = ListSink()
+    sched = ReminderScheduler(sink, db_path=path, lead_days=2, batch_size=1)
+    now = datetime.now() + timedelta(minutes=1)
+    run = sched.run_once(now)
+    assert (run.due_soon, run.overdue, run.notifications, run.batches) == (2, 1, 2, 2)
+    (soon,), (late,) = sink.batches
+    assert (soon.kind, soon.member_id, [i.book_title for i in soon.items]) == (DUE_SOON, alice, ["Dune", "Emma"])
+    assert (late.kind, late.member_id, [i.book_title for i in late.items]) == (OVERDUE, bob, ["Dune"])
+
+    assert sched.run_once(now).notifications == 0  # nothing is sent twice
+
+    # Alice's Dune loan later becomes overdue and gets its own notice.
+    run = sched.run_once(now + timedelta(days=1, hours=1))
+    assert (run.due_soon, run.overdue) == (0, 1)
+
+
+def test_renewed_loan_is_reminded_of_its_new_due_date(tmp_path: Path):
+    path = str(tmp_path / "test.db")
+    migrate(path)
+    svc = LibraryService(LibraryRepository(path))
+    loan = svc.borrow_book(svc.add_book("1111111111", "Dune", "Herbert"), svc.add_member("Alice"), days=1)
+    sched = ReminderScheduler(ListSink(), db_path=path, lead_days=1)
+    due = svc.repo.get_loan(loan).due_at
+    assert sched.run_once(due - timedelta(hours=20)).due_soon == 1
+
+    new_due = svc.renew_loan(loan, days=14)
+    assert sched.run_once(new_due - timedelta(hours=20)).due_soon == 1
+    assert sched.run_once(new_due + timedelta(hours=1)).overdue == 1
+
+
+def test_mail_spool_sink_writes_messages(tmp_path: Path):
+    path = str(tmp_path / "test.db")
+    migrate(path)
+    svc = LibraryService(LibraryRepository(path))
+    book = svc.add_book("1111111111", "Dune", "Herbert")
+    member = svc.add_member("Alice", email="alice@example.org")
+    svc.borrow_book(book, member, days=1)
+
+    spool = tmp_path / "spool"
+    ReminderScheduler(MailSpoolSink(spool), db_path=path).run_once()
+    (eml,) = spool.glob("*.eml")
+    msg = message_from_bytes(eml.read_bytes())
+    assert msg["To"] == "alice@example.org"
+    assert "Dune" in msg.get_payload()
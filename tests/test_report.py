@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: test_report.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Tests for the sharded annual circulation report.
+
+Usage: 
+pytest -q
+
+Notes: 
+- The multi-process run must agree with the in-process one.
+
+===================================================================
+"""
+from __future__ import annotations
+
+import csv
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from library_ms.archive import archive_returned_loans
+from library_ms.db import get_connection, migrate
+from library_ms.models import Book, Member, to_epoch
+from library_ms.report import build_annual_report, shard_ranges, write_report
+from library_ms.repository import LibraryRepository
+
+
+@pytest.fixture
+def path(tmp_path: Path) -> str:
+    p = str(tmp_path / "test.db")
+    migrate(p)
+    repo = LibraryRepository(p)
+    dune = repo.add_book(Book(None, "1", "Dune", "Herbert", 1965, 2, 2))
+    emma = repo.add_book(Book(None, "2", "Emma", "Austen", 1815, 1, 1))
+    ann = repo.add_member(Member(None, "Ann", None, None))
+    bob = repo.add_member(Member(None, "Bob", None, None))
+    loans = [  # (book, member, loaned_at)
+        (dune, ann, datetime(2025, 1, 5)),
+        (dune, bob, datetime(2025, 1, 20)),
+        (dune, ann, datetime(2025, 3, 1)),
+        (emma, bob, datetime(2025, 12, 31, 23)),
+        (emma, ann, datetime(2024, 12, 31, 23)),  # previous year
+        (emma, bob, datetime(2026, 1, 1)),  # next year
+    ]
+    with get_connection(p) as conn:
+        conn.execute("UPDATE members SET created_at = '2019-04-01 10:00:00' WHERE id = ?", (bob,))
+        for book_id, member_id, when in loans:
+            conn.execute(
+                "INSERT INTO loans(book_id, member_id, loaned_at, due_at, returned_at) VALUES(?, ?, ?, ?, ?)",
+                (book_id, member_id, to_epoch(when), to_epoch(when + timedelta(days=14)),
+                 to_epoch(when + timedelta(days=7))),
+            )
+    archive_returned_loans(0, chunk_size=2, db_path=p)  # half in loan_history
+    return p
+
+
+def test_shards_cover_every_loan_once(path: str):
+    ranges = shard_ranges(path, shards=4)
+    with get_connection(path) as conn:
+        expected = {(t, r[0]) for t in ("loans", "loan_history") for r in conn.execute(f"SELECT id FROM {t}")}
+        covered = [(t, i) for t, lo, hi in ranges for i in range(lo, hi + 1)
+                   if conn.execute(f"SELECT 1 FROM {t} WHERE id=?", (i,)).fetchone()]
+    assert len(covered) == len(expected) and set(covered) == expected
+    with pytest.raises(ValueError):
+        shard_ranges(path, shards=0)
+
+
+def test_annual_report_counts(path: str):
+    report = build_annual_report(2025, path, workers=1, shards=3)
+    assert report.loans == 4
+    assert report.by_month == [2, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 1]
+    assert report.by_author == [("Herbert", 3), ("Austen", 1)]
+    assert [(t.title, t.loans, t.turnover) for t in report.turnover] == [("Dune", 3, 1.5), ("Emma", 1, 1.0)]
+    cohorts = {c.cohort: (c.borrowers, c.loans) for c in report.by_cohort}
+    assert cohorts["2019"] == (1, 2)
+    assert sum(b for b, _ in cohorts.values()) == 2
+
+    parallel = build_annual_report(2025, path, workers=2, shards=3)
+    assert parallel == report
+
+
+def test_write_report(path: str, tmp_path: Path):
+    report = build_annual_report(2025, path, workers=1)
+    files = write_report(report, tmp_path / "out")
+    assert sorted(f.name for f in files) == [
+        "2025-authors.csv", "2025-cohorts.csv", "2025-months.csv", "2025-report.json", "2025-turnover.csv",
+    ]
+    with (tmp_path / "out" / "2025-months.csv").open() as fh:
+        assert list(csv.reader(fh))[1] == ["1", "2"]
+    assert json.loads((tmp_path / "out" / "2025-report.json").read_text())["loans"] == 4
+    with pytest.raises(ValueError):
+        write_report(report, tmp_path / "out", ["xlsx"])
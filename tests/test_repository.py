@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: test_repository.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Contract tests every Repository backend must pass (SQLite and in-memory).
+
+Usage: 
+pytest -q tests/test_repository.py
+
+Notes: 
+- Parametrised through the ``repo`` fixture in conftest.py.
+
+===================================================================
+"""
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from library_ms.models import COPY_AVAILABLE, Book, Member
+from library_ms.repository import VersionConflictError
+from library_ms.services import LibraryService
+
+
+def test_book_crud_search_and_ordering(repo):
+    a = repo.add_book(Book(None, "111", "beta", "Zed"))
+    b = repo.add_book(Book(None, "222", "Alpha", "Young", year=1999, total_copies=2, available_copies=2))
+    c = repo.add_book(Book(None, "333", "alpha", "Xavier"))
+    d = repo.add_book(Book(None, "444", "Éclair", "Wolf"))
+
+    assert [x.id for x in repo.list_books()] == [b, c, a, d]  # NOCASE, ties by id, non-ASCII last
+    assert [x.id for x in repo.list_books("ALP")] == [b, c]
+    assert [x.id for x in repo.list_books("zed")] == [a]
+    assert [x.id for x in repo.list_books("33")] == [c]
+    assert repo.list_books("éCLAIR") == []  # LIKE only folds ASCII
+    assert repo.get_book(b) == Book(b, "222", "Alpha", "Young", 1999, 2, 2)
+    assert repo.get_book(999) is None
+
+    repo.update_book(a, title="Aardvark", year=2001)
+    assert [x.id for x in repo.list_books()] == [a, b, c, d]
+    assert repo.get_book(a).year == 2001
+    with pytest.raises(sqlite3.IntegrityError):
+        repo.add_book(Book(None, "111", "dup", "dup"))
+    with pytest.raises(sqlite3.IntegrityError):
+        repo.update_book(a, isbn="222")
+    with pytest.raises(sqlite3.OperationalError):
+        repo.update_book(a, nonsense=1)
+
+    repo.delete_book(c)
+    assert [x.id for x in repo.list_books()] == [a, b, d]
+    assert repo.list_books("333") == [] and repo.get_book(c) is None
+    repo.update_book(c, title="ghost")  # tombstones are not editable
+    assert repo.get_book(c) is None
+    assert repo.add_book(Book(None, "333", "Reissue", "Xavier")) > d  # ISBN freed, id not reused
+
+
+def test_member_crud_and_search(repo):
+    bob = repo.add_member(Member(None, "bob", "bob@example.org"))
+    amy = repo.add_member(Member(None, "Amy", None, "555-0100"))
+    assert [m.id for m in repo.list_members()] == [amy, bob]
+    assert [m.id for m in repo.list_members("0100")] == [amy]
+    assert [m.id for m in repo.list_members("EXAMPLE")] == [bob]
+    with pytest.raises(sqlite3.IntegrityError):
+        repo.add_member(Member(None, "Other", "bob@example.org"))
+    repo.add_member(Member(None, "No Email"))
+    repo.add_member(Member(None, "No Email Either"))  # NULL emails never collide
+
+    repo.update_member(bob, name="Aaron", email=None)
+    assert repo.get_member(bob) == Member(bob, "Aaron", None, None, version=2)
+    assert [m.name for m in repo.list_members()][:2] == ["Aaron", "Amy"]
+    repo.delete_member(amy)
+    assert repo.get_member(amy) is None
+    assert amy not in [m.id for m in repo.list_members("Amy")]
+    repo.add_member(Member(None, "Aaron", "bob@example.org"))  # email was released by the update
+
+
+def test_sorted_filtered_windows(repo):
+    a = repo.add_book(Book(None, "333", "Dune", "herbert", 1965, total_copies=0, available_copies=0))
+    b = repo.add_book(Book(None, "111", "Emma", "Austen", 1815, total_copies=2, available_copies=2))
+    c = repo.add_book(Book(None, "222", "Ulysses", "Joyce", total_copies=1, available_copies=1))
+    d = repo.add_book(Book(None, "444", "Beloved", "Morrison", 1987, total_copies=1, available_copies=1))
+
+    def ids(**kw):
+        return [x.id for x in repo.list_books(**kw)]
+
+    assert ids(sort="author") == [b, a, c, d]  # NOCASE
+    assert ids(sort="year") == [c, b, a, d]  # no year sorts first
+    assert ids(sort="year", descending=True) == [d, a, b, c]
+    assert ids(sort="isbn", descending=True) == [d, a, c, b]
+    assert ids(sort="available", descending=True) == [b, d, c, a]  # ties by id, same direction
+    assert ids(available_only=True) == [d, b, c]
+    assert ids(year_from=1900) == [d, a] and ids(year_to=1900) == [b]
+    assert ids(sort="year", year_from=1800, year_to=1970, available_only=True) == [b]
+    assert [x.id for x in repo.list_books("e", sort="year", descending=True)] == [d, a, b, c]
+    assert ids(limit=2) == [d, a] and ids(limit=2, offset=2) == [b, c] and ids(offset=4) == []
+    with pytest.raises(ValueError, match="cannot sort books by 'version'"):
+        repo.list_books(sort="version")
+    with pytest.raises(ValueError, match="limit"):
+        repo.list_books(limit=0)
+
+    amy = repo.add_member(Member(None, "amy", "z@example.org"))
+    bob = repo.add_member(Member(None, "Bob"))
+    cat = repo.add_member(Member(None, "Cat", "a@example.org"))
+    assert [m.id for m in repo.list_members(sort="email")] == [bob, cat, amy]
+    assert [m.id for m in repo.list_members("example", sort="name", descending=True, limit=1)] == [cat]
+
+    now = datetime.now()
+    def lend(book_id, member_id, due_at):
+        return repo.checkout_copy(repo.find_available_copy(book_id).id, member_id, due_at)
+
+    soon = lend(b, amy, now + timedelta(days=3))
+    late = lend(d, bob, now - timedelta(days=1))
+    later = lend(c, cat, now - timedelta(days=5))
+    repo.return_loan(later, now)
+    assert [l.id for l in repo.list_active_loans(sort="due", descending=False)] == [late, soon]
+    assert [l.id for l in repo.list_active_loans()] == [late, soon]  # newest first
+    assert [l.id for l in repo.list_active_loans(overdue_before=now, limit=5)] == [late]
+
+
+def test_updates_with_expected_version(repo):
+    book = repo.add_book(Book(None, "111", "Draft", "A"))
+    member = repo.add_member(Member(None, "Ann"))
+
+    repo.update_book(book, expected_version=1, title="Desk A")
+    with pytest.raises(VersionConflictError) as info:
+        repo.update_book(book, expected_version=1, title="Desk B")  # stale read
+    assert (info.value.expected, info.value.current) == (1, 2)
+    assert repo.get_book(book).title == "Desk A"
+
+    repo.update_book(book, available_copies=0)  # circulation does not bump the version
+    repo.update_book(book, expected_version=2, title="Desk B")
+    assert repo.get_book(book).version == 3
+    repo.update_book(book, year=2000)  # unconditional edits still bump it
+    assert repo.get_book(book).version == 4
+
+    other = repo.add_book(Book(None, "222", "Copies", "B"))
+    repo.update_book(other, expected_version=1, ready_until=datetime.now(), total_copies=3)  # copies-only edits are versioned too
+    assert (repo.get_book(other).version, repo.get_book(other).total_copies) == (2, 3)
+    with pytest.raises(VersionConflictError):
+        repo.update_book(other, expected_version=1, total_copies=1)
+    repo.checkout_copy(repo.find_available_copy(other).id, member, datetime.now())
+    with pytest.raises(ValueError, match="only 2 copies are on the shelf"):
+        repo.update_book(other, expected_version=2, total_copies=0, title="Gone")
+    got = repo.get_book(other)  # all or nothing
+    assert (got.version, got.title, got.total_copies, got.available_copies) == (2, "Copies", 3, 2)
+    assert [c.status for c in repo.list_copies(other)].count(COPY_AVAILABLE) == 2
+
+    repo.update_member(member, expected_version=1, phone="1")
+    with pytest.raises(VersionConflictError):
+        repo.update_member(member, expected_version=1, phone="2")
+    repo.delete_member(member)
+    with pytest.raises(VersionConflictError) as info:
+        repo.update_member(member, expected_version=2, phone="3")
+    assert info.value.current is None
+
+
+def test_loan_rules_through_service(repo):
+    svc = LibraryService(repo)
+    book = svc.add_book("123456789X", "Only Copy", "Author")
+    alice = svc.add_member("Alice")
+    bob = svc.add_member("Bob")
+
+    first = svc.borrow_book(book, alice, days=-1)
+    with pytest.raises(ValueError, match="not available"):
+        svc.borrow_book(book, bob)
+    with pytest.raises(ValueError, match="not found"):
+        svc.borrow_book(999, bob)
+    assert [l.id for l in svc.list_overdue()] == [first]
+
+    svc.return_book(first)
+    svc.return_book(first)  # second return is a no-op
+    assert repo.get_book(book).available_copies == 1
+    assert svc.list_loans(active_only=True) == []
+
+    second = svc.borrow_book(book, bob, days=3)
+    loans = svc.list_loans()
+    assert [l.id for l in loans] == [second, first]
+    assert loans[1].returned_at is not None
+    assert loans[0].due_at - loans[0].loaned_at > timedelta(days=2)
+    assert svc.list_loans(include_history=True) == loans
+
+    svc.delete_member(bob)  # soft delete: loans stay until purged
+    assert [l.id for l in svc.list_loans()] == [second, first]
+    with pytest.raises(ValueError, match="member not found"):
+        svc.borrow_book(svc.add_book("0306406152", "Other", "A"), bob)
+    rows = repo.list_loan_rows()
+    assert rows[0][0] == second and isinstance(rows[0][3], int)
+
+
+def test_every_loan_listing_returns_the_full_loan(svc):
+    book = svc.add_book("123456789X", "Two Copies", "Author", copies=2)
+    ann = svc.add_member("Ann")
+    out = svc.borrow_book(book, ann)
+    svc.renew_loan(out)
+    back = svc.borrow_book(book, ann)
+    svc.return_book(back)
+
+    loan = svc.repo.get_loan(out)
+    assert loan.renewals == 1 and loan.copy_id is not None
+    assert svc.repo.list_active_loans() == [loan]
+    assert svc.repo.member_open_loans(ann) == [loan]
+    assert [r.to_loan() for r in svc.repo.list_loan_records(active_only=True)] == [loan]
+    returned = svc.repo.get_loan(back)
+    assert returned.copy_id is not None
+    assert svc.repo.list_loans(include_history=True) == [returned, loan]
+    assert svc.repo.member_loan_history(ann).loans == [returned]
+
+
+def test_loans_require_existing_member(repo):
+    book = repo.add_book(Book(None, "111", "One", "A"))
+    with pytest.raises(sqlite3.IntegrityError):
+        repo.checkout_copy(repo.find_available_copy(book).id, 999, datetime.now())
+    assert repo.get_book(book).available_copies == 1
+    assert repo.checkout_copy(999, 1, datetime.now()) is None  # no such copy
@@ -11,7 +11,8 @@ License: MIT License (see LICENSE file for details)
 =================================================================== 
 
 Description: 
-Basic unit tests for LibraryService borrow/return logic using a temp db.
+Basic unit tests for LibraryService borrow/return logic, run against
+every repository backend via the ``svc`` fixture.
 
 Usage: 
 pytest -q
@@ -23,32 +24,11 @@ Notes:
 """
 from __future__ import annotations
 
-from pathlib import Path
-from library_ms.db import migrate, get_connection
-from library_ms.repository import LibraryRepository
+from datetime import datetime, timedelta
 from library_ms.services import LibraryService
-from library_ms.models import Book, Member
 
 
-def _bind_temp_db(path: Path):
-    # Monkeypatch db.get_db_path used inside repo connections via environment
-    import importlib
-    from library_ms import db as _db
-
-    def _fake_get_db_path(custom_path=None):
-        return path
-
-    _db.get_db_path = _fake_get_db_path  # type: ignore
-    importlib.reload(_db)
-
-
-def test_borrow_and_return(tmp_path: Path):
-    path = tmp_path / "test.db"
-    _bind_temp_db(path)
-    migrate(str(path))
-
-    svc = LibraryService(LibraryRepository())
-
+def test_borrow_and_return(svc: LibraryService):
     # seed
     b_id = svc.add_book("123456789X", "Test Book", "Author", copies=2)
     m_id = svc.add_member("Alice")
@@ -61,3 +41,19 @@ def test_borrow_and_return(tmp_path: Path):
     svc.return_book(loan_id)
     b = next(b for b in svc.list_books() if b.id == b_id)
     assert b.available_copies == 2
+
+
+def test_overdue_and_lazy_loan_records(svc: LibraryService):
+    b_id = svc.add_book("123456789X", "Test Book", "Author", copies=3)
+    alice, bob, carol = (svc.add_member(n) for n in ("Alice", "Bob", "Carol"))
+
+    late = svc.borrow_book(b_id, alice, days=-3)
+    later = svc.borrow_book(b_id, bob, days=-1)  # one member with an overdue item can't borrow again
+    svc.borrow_book(b_id, carol, days=7)
+
+    assert [l.id for l in svc.list_overdue()] == [late, later]
+    assert [l.id for l in svc.list_overdue(datetime.now() - timedelta(days=2))] == [late]
+
+    records = svc.repo.list_loan_records(active_only=True)
+    assert [r.to_loan() for r in records] == svc.list_loans(active_only=True)
+    assert isinstance(records[0].due_ts, int) and records[0].returned_at is None
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: test_snapshot.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Round-trip tests for the columnar kiosk catalog snapshot.
+
+Usage: 
+pytest -q
+
+Notes: 
+- Compares snapshot rows against the live repository.
+
+===================================================================
+"""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from library_ms.db import migrate
+from library_ms.repository import LibraryRepository
+from library_ms.services import LibraryService
+from library_ms.snapshot import CatalogSnapshot, export_snapshot
+
+
+def test_snapshot_round_trip_and_search(tmp_path: Path):
+    path = str(tmp_path / "test.db")
+    migrate(path)
+    svc = LibraryService(LibraryRepository(path))
+    svc.add_book("9780261103573", "The Fellowship of the Ring", "J. R. R. Tolkien", year=1954, copies=3)
+    svc.add_book("9780261102217", "The Hobbit", "J. R. R. Tolkien", year=1937)
+    svc.add_book("9780141439518", "Pride and Prejudice", "Jane Austen")
+    cien = svc.add_book("9788420412146", "Cien años de soledad", "Gabriel García Márquez", year=1967)
+    svc.update_book(cien, expected_version=1, year=1968)
+
+    out = tmp_path / "catalog.lmsc"
+    assert export_snapshot(out, path) == 4
+
+    with CatalogSnapshot(out) as snap:
+        assert [snap.book(i) for i in range(len(snap))] == svc.list_books()
+        assert [snap.title(i) for i in snap.search("tolk")] == ["The Fellowship of the Ring", "The Hobbit"]
+        assert [snap.title(i) for i in snap.search("tolkien ring")] == ["The Fellowship of the Ring"]
+        assert [snap.author(i) for i in snap.search("garcía años")] == ["Gabriel García Márquez"]
+        assert snap.search_ids("9780141439518") == [b.id for b in svc.list_books("Pride")]
+        assert snap.search("hobbit austen") == []
+        assert snap.search("") == []
+        assert snap.year(snap.search("pride")[0]) is None
+        assert snap.version(snap.search("soledad")[0]) == 2  # edited books keep their version
+
+
+def test_snapshot_rejects_other_files(tmp_path: Path):
+    bogus = tmp_path / "bogus.lmsc"
+    bogus.write_bytes(b"not a snapshot at all, just some bytes")
+    with pytest.raises(ValueError):
+        CatalogSnapshot(bogus)
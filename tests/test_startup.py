@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: test_startup.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Tests for the startup phase timer and the lazily loaded main window tabs.
+
+Usage: 
+pytest -q
+
+Notes: 
+- No display is needed: App methods run against a stub window.
+
+===================================================================
+"""
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from library_ms.main import App
+from library_ms.utils import profiling
+from library_ms.utils.profiling import StartupProfile
+
+
+def test_startup_profile_marks_in_order(monkeypatch):
+    clock = iter([0.010, 0.250, 0.300])
+    monkeypatch.setattr(profiling.time, "perf_counter", lambda: next(clock))
+    profile = StartupProfile(start=0.0)
+    assert profile.mark("import") == 0.010
+    profile.mark("first_paint")
+    profile.mark("first_data")
+
+    assert [name for name, _ in profile.marks] == ["import", "first_paint", "first_data"]
+    assert profile.elapsed("first_paint") == 0.250 and profile.elapsed("missing") is None
+    lines = profile.report().splitlines()
+    assert lines[0] == "startup timings (ms):"
+    assert lines[2].split() == ["first_paint", "250.0", "(+240.0)"]
+    assert lines[3].split() == ["first_data", "300.0", "(+50.0)"]
+
+
+def test_only_the_visible_tab_loads_at_startup():
+    refreshed = []
+    views = {name: SimpleNamespace(refresh=lambda n=name: refreshed.append(n)) for name in ("books", "loans")}
+    bindings = {}
+    notebook = SimpleNamespace(
+        current="books",
+        bind=lambda event, handler: bindings.__setitem__(event, handler),
+    )
+    notebook.select = lambda: notebook.current
+    app = SimpleNamespace(
+        notebook=notebook, nametowidget=views.__getitem__, _loaded=set(),
+        typeahead=SimpleNamespace(start=lambda: None),
+    )
+    app._load_current_tab = lambda: App._load_current_tab(app)
+
+    App.activate(app)
+    assert refreshed == ["books"]
+
+    notebook.current = "loans"
+    bindings["<<NotebookTabChanged>>"](None)
+    notebook.current = "books"
+    bindings["<<NotebookTabChanged>>"](None)
+    assert refreshed == ["books", "loans"]  # each tab loads once, when first shown
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: test_storage.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Tests for storage profiles, the tuning benchmark and maintenance.
+
+Usage: 
+pytest -q
+
+Notes: 
+- Every test restores the process-wide profile it started with.
+
+===================================================================
+"""
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from library_ms import db
+from library_ms.models import Book, Member
+from library_ms.repository import LibraryRepository
+from library_ms.storage import run_maintenance, tune
+
+
+@pytest.fixture(autouse=True)
+def restore_profile():
+    previous = db.storage_profile()
+    yield
+    db.configure_connections(profile=previous)
+
+
+@pytest.fixture
+def path(tmp_path: Path) -> str:
+    p = str(tmp_path / "test.db")
+    db.migrate(p)
+    repo = LibraryRepository(p)
+    for i in range(5):
+        repo.add_book(Book(None, f"isbn-{i}", f"Title {i}", "Author", 2000, 2, 2))
+        repo.add_member(Member(None, f"Member {i}", f"m{i}@example.com", None))
+    return p
+
+
+def test_profile_pragmas_are_applied(path: str):
+    db.configure_connections(profile="reporting")
+    with db.get_connection(path) as conn:
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -64 * 1024
+        assert conn.execute("PRAGMA mmap_size").fetchone()[0] == 256 * 1024 * 1024
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    with pytest.raises(ValueError):
+        db.configure_connections(profile="turbo")
+
+
+def test_readonly_profile_refuses_writes(path: str):
+    db.configure_connections(profile="kiosk-readonly")
+    assert [b.title for b in LibraryRepository(path).list_books("Title 1")] == ["Title 1"]
+    with pytest.raises(sqlite3.OperationalError):
+        LibraryRepository(path).add_member(Member(None, "X", None, None))
+    with pytest.raises(ValueError):
+        run_maintenance(path)
+
+
+def test_maintenance_checkpoints_wal(path: str):
+    result = run_maintenance(path, checkpoint="truncate")
+    assert not result.busy and result.checkpointed == result.wal_pages
+    with pytest.raises(ValueError):
+        run_maintenance(path, checkpoint="SOMETIMES")
+
+
+def test_tune_recommends_durable_profile_without_touching_db(path: str):
+    before = Path(path).read_bytes()
+    report = tune(path, rounds=1)
+    assert [t.profile for t in report.timings] == list(db.PROFILES)
+    assert report.recommended in ("desk", "reporting")
+    assert next(t for t in report.timings if t.profile == "kiosk-readonly").write_ms is None
+    assert db.storage_profile().name == db.DEFAULT_STORAGE_PROFILE
+    assert Path(path).read_bytes() == before
+    assert tune(path, rounds=1, profiles=["kiosk-readonly"], readonly=True).recommended == "kiosk-readonly"
+    with pytest.raises(ValueError):
+        tune(path, profiles=["bulk-import"])
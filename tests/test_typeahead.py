@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================== 
+Project: Library Management System 
+File: test_typeahead.py 
+Author: Mobin Yousefi (GitHub: github.com/mobinyousefi-cs) 
+Created: 2026-10-19 
+Updated: 2026-10-19 
+License: MIT License (see LICENSE file for details)
+=================================================================== 
+
+Description: 
+Tests for the prefix index and the event-driven catalog typeahead.
+
+Usage: 
+pytest -q
+
+Notes: 
+- The background build is joined before asserting.
+
+===================================================================
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from library_ms.db import migrate
+from library_ms.repository import LibraryRepository
+from library_ms.services import LibraryService
+from library_ms.typeahead import CatalogTypeahead
+from library_ms.ui.widgets import AutocompleteEntry
+from library_ms.utils.prefix_index import PrefixIndex, terms_for
+
+
+def test_prefix_index_put_remove_search():
+    idx = PrefixIndex.build([(1, "Dune", terms_for("Dune", "Frank Herbert"))])
+    idx.put(2, "Emma", terms_for("Emma", "Jane Austen"))
+    idx.put(3, "Dune Messiah", terms_for("Dune Messiah", "Frank Herbert"))
+    assert idx.search("du") == [(1, "Dune"), (3, "Dune Messiah")]
+    assert idx.search("dune mess") == [(3, "Dune Messiah")]
+    assert idx.search("JANE") == [(2, "Emma")]
+    idx.put(1, "Dune (2nd ed.)", terms_for("Dune", "Frank Herbert"))
+    idx.remove(3)
+    assert idx.search("herb") == [(1, "Dune (2nd ed.)")]
+    assert idx.search("") == [] and len(idx) == 2
+
+
+def test_single_word_search_returns_the_alphabetical_first_matches():
+    # Ids run against label order, so term order differs from label order.
+    idx = PrefixIndex.build(
+        (n, f"Book {99 - n:02d}", terms_for(f"Book {99 - n:02d}", "Same Author")) for n in range(60)
+    )
+    assert idx.search("same", limit=3) == [(59, "Book 40"), (58, "Book 41"), (57, "Book 42")]
+
+
+def test_typeahead_stays_fresh_from_service_events(tmp_path: Path):
+    path = str(tmp_path / "test.db")
+    migrate(path)
+    svc = LibraryService(LibraryRepository(path))
+    dune = svc.add_book("978-0441013593", "Dune", "Frank Herbert")
+    alice = svc.add_member("Alice Smith", email="alice@example.org")
+
+    ta = CatalogTypeahead(svc)
+    ta.start().join()
+    assert ta.suggest_books("dun") == [(dune, "Dune (978-0441013593)")]
+    assert ta.suggest_books("9780441") == [(dune, "Dune (978-0441013593)")]
+    assert ta.suggest_members("alice@ex") == [(alice, "Alice Smith <alice@example.org>")]
+
+    emma = svc.add_book("9780141439587", "Emma", "Jane Austen")
+    svc.update_member(alice, name="Alicia Smith")
+    svc.delete_book(dune)
+    assert ta.suggest_books("e") == [(emma, "Emma (9780141439587)")]
+    assert ta.suggest_books("dune") == []
+    assert ta.suggest_members("smi") == [(alice, "Alicia Smith <alice@example.org>")]
+    ta.close()
+
+
+def test_picker_prefers_matches_over_raw_ids():
+    books = {7: "Dune (978-0441013593)", 8: "Emma (978-0141439587)"}
+
+    def get_id(text: str) -> int:
+        suggest = lambda t: [(i, label) for i, label in books.items() if t.replace("-", "") in label.replace("-", "")]
+        entry = SimpleNamespace(selected_id=None, get=lambda: text, suggest=suggest)
+        return AutocompleteEntry.get_id(entry)
+
+    assert get_id("9780441013593") == 7  # a scanned ISBN is not a book id
+    assert get_id("#8") == 8 and get_id("42") == 42  # explicit, or nothing matches
+    with pytest.raises(ValueError, match="Pick a match"):
+        get_id("978")